@@ -36,6 +36,8 @@ def main():
         try:
             user = Practica.objects.get(username=username)
             
+            # save() dispara la señal que invalida el rol cacheado en la sesión del
+            # usuario (la caché debe ser la compartida con la app, ver REDIS_URL)
             if choice == '1':
                 user.is_admin = True
                 user.save()
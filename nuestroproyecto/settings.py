@@ -65,14 +65,23 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve static files
+    'vistas.middleware.PerfiladoMiddleware',  # Server-Timing y peticiones lentas (PERFILADO_PETICIONES)
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'vistas.middleware.UsuarioActualMiddleware',  # request.usuario (perezoso)
+    'vistas.middleware.ReplicaMiddleware',  # lecturas en la réplica, salvo tras escribir
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'vistas.middleware.PerfiladoVistaMiddleware',  # tiempo de la vista (PERFILADO_PETICIONES)
 ]
 
+# Perfilado por petición (ver vistas/perfilado.py). Desactivado, sus middlewares
+# se descartan al arrancar. PERFILADO_LENTA_MS: umbral del registro de peticiones lentas.
+PERFILADO_PETICIONES = os.environ.get("PERFILADO_PETICIONES", "0") == "1"
+PERFILADO_LENTA_MS = float(os.environ.get("PERFILADO_LENTA_MS", "500"))
+
 ROOT_URLCONF = 'nuestroproyecto.urls'
 
 TEMPLATES = [
@@ -103,6 +112,125 @@ DATABASES = {
     }
 }
 
+# Conexiones a PostgreSQL (por worker de gunicorn):
+# - DB_POOL=1: pool de psycopg 3 en cada proceso, de DB_POOL_MIN_SIZE a DB_POOL_MAX_SIZE
+#   conexiones; si no hay una libre en DB_POOL_TIMEOUT segundos la petición falla.
+#   Total en PostgreSQL: workers x DB_POOL_MAX_SIZE (debe caber en max_connections).
+# - Sin pool: conexiones persistentes, cada worker reutiliza la suya durante
+#   DB_CONN_MAX_AGE segundos (0 = abrir y cerrar en cada petición) y comprueba
+#   que siga viva antes de usarla (DB_CONN_HEALTH_CHECKS).
+# Con SERVIDOR=asgi cada petición corre en su propio hilo y una conexión persistente
+# no se reutiliza entre peticiones, así que ahí se recomienda el pool.
+DB_POOL = os.environ.get("DB_POOL", "0") == "1"
+if DB_POOL:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "1")),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "4")),
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.environ.get("DB_CONN_MAX_AGE", "0" if os.environ.get("SERVIDOR") == "asgi" else "60")
+    )
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = os.environ.get("DB_CONN_HEALTH_CHECKS", "1") == "1"
+
+# Réplica de lectura opcional (POSTGRES_REPLICA_HOST): mismas credenciales que la primaria
+if os.environ.get("POSTGRES_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["POSTGRES_REPLICA_HOST"],
+        "PORT": os.environ.get("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "OPTIONS": dict(DATABASES["default"].get("OPTIONS", {})),
+        "TEST": {"MIRROR": "default"},
+    }
+
+# DB_ENGINE=sqlite usa db.sqlite3 (pruebas / desarrollo local sin PostgreSQL).
+# La "réplica" es DB_REPLICA_NAME (otro archivo, p. ej. una copia atrasada) o el mismo archivo.
+# En las pruebas la réplica es un espejo de la base en memoria de "default" (TEST MIRROR) y
+# read_uncommitted le deja leer lo que cada TestCase escribe sin confirmar en su transacción.
+if os.environ.get("DB_ENGINE") == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        },
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_REPLICA_NAME", BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {"init_command": "PRAGMA read_uncommitted = 1"},
+            "TEST": {"MIRROR": "default"},
+        },
+    }
+
+# Lecturas que pueden ir a la réplica (ver vistas/router.py); el resto siempre a la primaria
+DATABASE_ROUTERS = ["vistas.router.RouterReplica"]
+DATABASE_REPLICA_MODELOS = ["vistas.tour", "vistas.reserva"]
+# Segundos que quien escribe sigue leyendo de la primaria (read-your-writes)
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get("DB_REPLICA_STICKY_SECONDS", "10"))
+
+# Caché compartida entre workers (Redis si está configurado, memoria local si no)
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+# Solo con Redis todos los workers (y manage.py) ven la misma caché: lo que depende de
+# invalidar entre procesos (rol guardado en la sesión, sesiones en caché) lo comprueba
+CACHE_COMPARTIDA = bool(REDIS_URL)
+
+# Sesiones (solo guardan user_id, username y el rol; ver vistas/sesiones.py). SESION_PERFIL:
+#   db      -> tabla django_session: una lectura por petición autenticada y una escritura por cambio;
+#   cache   -> caché compartida con respaldo en la BD: leer no toca la BD. Requiere REDIS_URL
+#              (con caché local cada worker vería su propia copia); sin ella se usa db;
+#   cookies -> cookie firmada con SECRET_KEY, sin estado en el servidor. Cerrar sesión borra la
+#              cookie del navegador, pero una copia robada sigue valiendo hasta SESSION_COOKIE_AGE.
+SESION_PERFIL = os.environ.get("SESION_PERFIL", "db")
+if SESION_PERFIL == "cache" and not CACHE_COMPARTIDA:
+    SESION_PERFIL = "db"
+SESION_MOTORES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cache": "django.contrib.sessions.backends.cached_db",
+    "cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_ENGINE = SESION_MOTORES[SESION_PERFIL]
+SESSION_COOKIE_AGE = int(os.environ.get("SESSION_COOKIE_AGE", str(14 * 24 * 3600)))
+
+# Límite de intentos de login, registro y recuperación de contraseña (vistas/limites.py),
+# por IP y por identificador, en la caché compartida. Cada límite es "capacidad/segundos":
+# ráfaga admitida y tiempo en que se recupera. LIMITES_IP_CABECERA: cabecera con la IP real
+# detrás del proxy (HTTP_X_REAL_IP con nginx.conf); vacía = REMOTE_ADDR. Si el puerto de la
+# app queda expuesto sin el proxy, esa cabecera se puede falsificar. Sin REDIS_URL los
+# contadores quedan en la caché local de cada worker (cada uno admite la ráfaga completa);
+# al arrancar se avisa en el log 'vistas.limites'.
+def _limite(variable, defecto):
+    capacidad, segundos = os.environ.get(variable, defecto).split("/")
+    return int(capacidad), float(segundos)
+
+LIMITES_ACCESO_ACTIVOS = os.environ.get("LIMITES_ACCESO", "1") == "1"
+LIMITES_IP_CABECERA = os.environ.get("LIMITES_IP_CABECERA", "")
+LIMITES_ACCESO = {
+    "login": {"ip": _limite("LIMITE_LOGIN_IP", "20/60"), "identificador": _limite("LIMITE_LOGIN_ID", "10/300")},
+    "registro": {"ip": _limite("LIMITE_REGISTRO_IP", "5/600"), "identificador": _limite("LIMITE_REGISTRO_ID", "3/600")},
+    "recuperar": {"ip": _limite("LIMITE_RECUPERAR_IP", "5/600"), "identificador": _limite("LIMITE_RECUPERAR_ID", "3/3600")},
+}
+
+# Segundos que una versión del catálogo de tours permanece en caché
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", "300"))
+# Segundos que se guarda el HTML de cada tarjeta de tour (editar el tour la invalida antes)
+TARJETAS_CACHE_TIMEOUT = int(os.environ.get("TARJETAS_CACHE_TIMEOUT", "86400"))
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -120,6 +248,16 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hash de contraseñas de Practica: PBKDF2 con factor de trabajo ajustable.
+# Al cambiar las iteraciones, cada usuario se vuelve a cifrar en su próximo login.
+PASSWORD_HASHERS = [
+    'vistas.contrasenas.PBKDF2AjustableHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", "600000"))
+# Hashes de contraseña calculados a la vez (por proceso de gunicorn) y espera máxima por un cupo
+PASSWORD_VERIFY_MAX_PENDIENTES = int(os.environ.get("PASSWORD_VERIFY_MAX_PENDIENTES", "8"))
+PASSWORD_VERIFY_TIMEOUT = float(os.environ.get("PASSWORD_VERIFY_TIMEOUT", "5"))
+
 # Internationalization
 LANGUAGE_CODE = 'es-us'
 TIME_ZONE = 'UTC'
@@ -133,15 +271,55 @@ STATIC_URL = '/static/'
 # Directory where collectstatic will collect static files for deployment
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-# WhiteNoise configuration for serving static files efficiently
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise configuration for serving static files efficiently.
+# collectstatic escribe cada CSS/JS con el hash de su contenido en el nombre
+# (css/paginas/login.3f2a9c1b7d4e.css) y versiones gzip/brotli; WhiteNoise sirve
+# esos archivos con Cache-Control "max-age=315360000, immutable".
+# (Django 5.x ya no lee STATICFILES_STORAGE: hay que usar STORAGES.)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+# Solo donde se ejecutó collectstatic hay manifiesto: la imagen Docker pone
+# ESTATICOS_CON_HASH=1. Sin él (desarrollo, pruebas) o con DEBUG, nombres sin hash.
+ESTATICOS_CON_HASH = os.environ.get("ESTATICOS_CON_HASH", "0") == "1" and not DEBUG
+if not ESTATICOS_CON_HASH:
+    STORAGES["staticfiles"] = {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Imágenes de tours procesadas localmente (ver vistas/imagenes.py)
+TOUR_IMAGEN_ANCHOS = tuple(int(a) for a in os.environ.get("TOUR_IMAGEN_ANCHOS", "320,640,960").split(","))
+TOUR_IMAGEN_CALIDAD = int(os.environ.get("TOUR_IMAGEN_CALIDAD", "80"))
+TOUR_IMAGEN_WORKERS = int(os.environ.get("TOUR_IMAGEN_WORKERS", "2"))
+TOUR_IMAGEN_TIMEOUT = float(os.environ.get("TOUR_IMAGEN_TIMEOUT", "10"))
+TOUR_IMAGEN_MAX_BYTES = int(os.environ.get("TOUR_IMAGEN_MAX_BYTES", str(10 * 1024 * 1024)))
+# Solo para pruebas contra un servidor local: en producción las URLs a redes internas se rechazan
+TOUR_IMAGEN_PERMITIR_PRIVADAS = False
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# Email Backend for Development (Prints to Console)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# Correo: por SMTP si se define EMAIL_HOST; si no, se imprime en la consola (desarrollo).
+# Las vistas no envían: encolan en la bandeja de salida y 'manage.py enviar_correos' la vacía
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "")
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", "587"))
+EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS", "1") == "1"
+EMAIL_TIMEOUT = float(os.environ.get("EMAIL_TIMEOUT", "10"))
+EMAIL_BACKEND = (
+    'django.core.mail.backends.smtp.EmailBackend' if EMAIL_HOST
+    else 'django.core.mail.backends.console.EmailBackend'
+)
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "noreply@travelweb.com")
+
+# Bandeja de salida (vistas/correos.py): correos por lote, reintentos con espera
+# exponencial (base y tope en segundos) y cuánto reserva un worker un lote reclamado
+CORREO_LOTE = int(os.environ.get("CORREO_LOTE", "50"))
+CORREO_MAX_INTENTOS = int(os.environ.get("CORREO_MAX_INTENTOS", "5"))
+CORREO_REINTENTO_SEGUNDOS = int(os.environ.get("CORREO_REINTENTO_SEGUNDOS", "60"))
+CORREO_REINTENTO_MAX_SEGUNDOS = int(os.environ.get("CORREO_REINTENTO_MAX_SEGUNDOS", "3600"))
+CORREO_RECLAMO_SEGUNDOS = int(os.environ.get("CORREO_RECLAMO_SEGUNDOS", "300"))
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.urls.conf import include
 from django.contrib import admin
 from django.urls import path
@@ -5,4 +7,7 @@ from django.urls import path
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('vistas.urls')),
-]
\ No newline at end of file
+]
+
+# En desarrollo Django sirve MEDIA_ROOT; en producción lo hace nginx
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,5 +1,6 @@
-from django.contrib import admin  # Importa el módulo de administración de Django
-from .models import Practica  # Importa el modelo Practica para registrarlo
+from django.contrib import admin, messages  # Importa el módulo de administración de Django
+from .models import CorreoPendiente, Practica, Reserva, Tour  # Importa los modelos para registrarlos
+from .transiciones import cambiar_estado, TransicionInterrumpida
 
 # Decorador para registrar el modelo Practica con la configuración de PracticaAdmin
 @admin.register(Practica)
@@ -7,4 +8,45 @@ class PracticaAdmin(admin.ModelAdmin):
     list_display = ("id", "username", "is_admin", "password")  # Define qué columnas se muestran en la lista del panel de admin
     list_editable = ("is_admin",) # Allow editing directly in list
     search_fields = ("username",)                  # Habilita una barra de búsqueda para filtrar por username
-    list_filter = ("username",)                    # Agrega un filtro lateral para filtrar por username
\ No newline at end of file
+    list_filter = ("username",)                    # Agrega un filtro lateral para filtrar por username
+
+# Los cambios hechos aquí también invalidan la caché del catálogo (ver signals.py)
+@admin.register(Tour)
+class TourAdmin(admin.ModelAdmin):
+    list_display = ("id", "nombre", "categoria", "precio", "duracion")
+    search_fields = ("nombre",)
+    list_filter = ("categoria",)
+
+
+def _accion_estado(accion, participio):
+    """Acción del admin que confirma o cancela en bloque (ver transiciones.py)."""
+    def aplicar(modeladmin, request, queryset):
+        try:
+            cambiadas = cambiar_estado(queryset, accion)
+        except TransicionInterrumpida:
+            modeladmin.message_user(request, "Otras reservas cambiaron al mismo tiempo; inténtelo de nuevo.",
+                                    messages.ERROR)
+            return
+        modeladmin.message_user(request, f"{cambiadas} reservas {participio}.", messages.SUCCESS)
+    aplicar.__name__ = accion
+    aplicar.short_description = f"{accion.capitalize()} las reservas seleccionadas"
+    return aplicar
+
+@admin.register(Reserva)
+class ReservaAdmin(admin.ModelAdmin):
+    list_display = ("id", "nombre_cliente", "tour", "fecha_inicio", "numero_personas", "estado", "fecha_creacion")
+    list_filter = ("estado",)
+    list_select_related = ("tour",)
+    search_fields = ("nombre_cliente", "email_cliente")
+    date_hierarchy = "fecha_creacion"
+    # El estado solo cambia con las acciones: así se liberan cupos y se ajustan las estadísticas
+    readonly_fields = ("estado",)
+    actions = [_accion_estado('confirmar', 'confirmadas'), _accion_estado('cancelar', 'canceladas')]
+
+
+# Bandeja de salida: la vacía 'manage.py enviar_correos', que lleva intentos y errores
+@admin.register(CorreoPendiente)
+class CorreoPendienteAdmin(admin.ModelAdmin):
+    list_display = ("id", "asunto", "estado", "intentos", "proximo_intento", "fecha_envio")
+    list_filter = ("estado",)
+    readonly_fields = ("intentos", "ultimo_error", "fecha_envio")
@@ -1,5 +1,18 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class VistasConfig(AppConfig):
     name = 'vistas'
+
+    def ready(self):
+        # Registra las señales (invalidación de caché, etc.)
+        from . import signals  # noqa: F401
+
+        if settings.LIMITES_ACCESO_ACTIVOS and not settings.CACHE_COMPARTIDA and not settings.DEBUG:
+            # Con la caché local cada worker cuenta por su lado: la ráfaga admitida se multiplica
+            logging.getLogger('vistas.limites').warning(
+                "Límite de intentos sin caché compartida (REDIS_URL): cada proceso aplica su propia cubeta"
+            )
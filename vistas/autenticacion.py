@@ -0,0 +1,230 @@
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+from .models import Practica, normalizar_identificador
+
+logger = logging.getLogger(__name__)
+
+# --- Usuario autenticado de la petición ---
+# La sesión solo guarda 'user_id' y 'username'. El rol (is_admin) se guarda
+# también en la sesión junto con una "versión de rol" del usuario que vive en
+# la caché compartida; cuando alguien cambia a un Practica (editar_usuario,
+# perfil, admin de Django, manage_admin.py) la señal post_save genera una
+# versión nueva y la próxima petición de ese usuario vuelve a leer su rol de la
+# base de datos. Mientras tanto las páginas no consultan Practica en absoluto.
+# Esto solo vale con caché compartida (settings.CACHE_COMPARTIDA, Redis): con la
+# caché local de cada worker la invalidación no llega a los demás ni desde
+# manage.py, así que sin ella el rol se lee siempre de la fila del usuario.
+# La versión expira a las SESSION_COOKIE_AGE: al perderse, la sesión relee el rol.
+
+
+def buscar_por_identificador(identificador):
+    """
+    Busca un Practica por username o email, sin distinguir mayúsculas.
+    Cada intento es una búsqueda exacta en un índice único (username_login /
+    email_login); el email solo se prueba si el texto contiene '@', así que un
+    login fallido cuesta como mucho dos consultas.
+    Lanza Practica.DoesNotExist si no hay coincidencia.
+    """
+    valor = normalizar_identificador(identificador)
+    if not valor:
+        raise Practica.DoesNotExist()
+    if '@' in valor:
+        usuario = Practica.objects.filter(email_login=valor).first()
+        if usuario is not None:
+            return usuario
+    usuario = Practica.objects.filter(username_login=valor).first()
+    if usuario is None:
+        raise Practica.DoesNotExist()
+    return usuario
+
+
+def rellenar_identificadores(modelo_practica, alias=None):
+    """
+    Calcula username_login/email_login de todos los usuarios (migraciones 0012 y 0020).
+    Si dos chocan al ignorar mayúsculas el más antiguo conserva el valor; el más
+    nuevo recibe un username libre con sufijo '-<n>' y pierde el email repetido
+    (es el mismo buzón que el de la cuenta más antigua). Solo escribe las filas
+    que cambian. Devuelve cuántos usuarios se renombraron.
+    """
+    usuarios = modelo_practica.objects.using(alias)
+    ocupados = {normalizar_identificador(nombre) for nombre in usuarios.values_list('username', flat=True)}
+    usernames, emails = set(), set()
+    renombrados = 0
+    campos = ('username', 'email', 'username_login', 'email_login')
+    for usuario in usuarios.order_by('id').only('id', *campos).iterator(chunk_size=1000):
+        antes = tuple(getattr(usuario, campo) for campo in campos)
+        username = normalizar_identificador(usuario.username) or None
+        if username in usernames:
+            base, n = usuario.username.strip()[:140], usuario.pk
+            while normalizar_identificador(f'{base}-{n}') in ocupados:
+                n += 1
+            usuario.username = f'{base}-{n}'
+            username = normalizar_identificador(usuario.username)
+            ocupados.add(username)
+            renombrados += 1
+        email = normalizar_identificador(usuario.email) or None
+        if email in emails:
+            usuario.email = email = None
+        if username:
+            usernames.add(username)
+        if email:
+            emails.add(email)
+        usuario.username_login, usuario.email_login = username, email
+        if tuple(getattr(usuario, campo) for campo in campos) != antes:
+            usuarios.filter(pk=usuario.pk).update(**{campo: getattr(usuario, campo) for campo in campos})
+    return renombrados
+
+
+def _clave_rol(user_id):
+    return f'practica:{user_id}:rol'
+
+
+def version_rol(user_id):
+    """
+    Versión actual del rol del usuario, o None si no se puede confiar en la caché
+    (no compartida o caída): entonces el rol se lee de la base de datos.
+    """
+    if not settings.CACHE_COMPARTIDA:
+        return None
+    try:
+        version = cache.get(_clave_rol(user_id))
+        if version is None:
+            # Valor único: si la clave se pierde (expiración, reinicio) ninguna
+            # sesión vieja puede coincidir por casualidad.
+            cache.add(_clave_rol(user_id), uuid.uuid4().hex, timeout=settings.SESSION_COOKIE_AGE)
+            version = cache.get(_clave_rol(user_id))
+        return version
+    except Exception:
+        logger.warning("Caché no disponible para la versión de rol", exc_info=True)
+        return None
+
+
+async def aversion_rol(user_id):
+    if not settings.CACHE_COMPARTIDA:
+        return None
+    try:
+        version = await cache.aget(_clave_rol(user_id))
+        if version is None:
+            await cache.aadd(_clave_rol(user_id), uuid.uuid4().hex, timeout=settings.SESSION_COOKIE_AGE)
+            version = await cache.aget(_clave_rol(user_id))
+        return version
+    except Exception:
+        logger.warning("Caché no disponible para la versión de rol", exc_info=True)
+        return None
+
+
+def invalidar_rol(user_id):
+    try:
+        cache.set(_clave_rol(user_id), uuid.uuid4().hex, timeout=settings.SESSION_COOKIE_AGE)
+    except Exception:
+        logger.warning("No se pudo invalidar el rol del usuario %s", user_id, exc_info=True)
+
+
+def iniciar_sesion(request, usuario):
+    """Guarda en la sesión los datos del usuario que acaba de iniciar sesión."""
+    request.session['user_id'] = usuario.id
+    request.session['username'] = usuario.username
+    _guardar_rol(request.session, usuario, version_rol(usuario.id))
+    request.usuario = UsuarioActual(request, practica=usuario)
+
+
+def _guardar_rol(session, usuario, version):
+    session['is_admin'] = usuario.is_admin
+    if version is None:
+        session.pop('rol_version', None)
+    else:
+        session['rol_version'] = version
+
+
+class UsuarioActual:
+    """
+    Usuario de la petición actual, resuelto de forma perezosa.
+    - 'practica' hace como máximo una consulta por petición.
+    - 'es_admin' usa el rol guardado en la sesión mientras siga vigente (solo con
+      caché compartida; si no, lo lee de 'practica').
+    """
+
+    def __init__(self, request, practica=None):
+        self.session = request.session
+        self.eliminado = False  # True si la sesión apunta a un usuario que ya no existe
+        if practica is not None:
+            self.__dict__['practica'] = practica
+
+    @property
+    def id(self):
+        return self.session.get('user_id')
+
+    @property
+    def username(self):
+        return self.session.get('username')
+
+    @property
+    def autenticado(self):
+        return self.id is not None
+
+    @cached_property
+    def practica(self):
+        if not self.autenticado:
+            return None
+        try:
+            return Practica.objects.get(id=self.id)
+        except Practica.DoesNotExist:
+            self.eliminado = True
+            return None
+
+    async def apractica(self):
+        """Versión asíncrona de 'practica' (comparte el mismo caché por petición)."""
+        if 'practica' not in self.__dict__:
+            usuario = None
+            user_id = await self.session.aget('user_id')
+            if user_id is not None:
+                try:
+                    usuario = await Practica.objects.aget(id=user_id)
+                except Practica.DoesNotExist:
+                    self.eliminado = True
+            self.__dict__['practica'] = usuario
+        return self.__dict__['practica']
+
+    async def aes_admin(self):
+        """Versión asíncrona de 'es_admin' para vistas async (usa la sesión y la caché async)."""
+        if 'es_admin' not in self.__dict__:
+            self.__dict__['es_admin'] = await self._aresolver_admin()
+        return self.__dict__['es_admin']
+
+    async def _aresolver_admin(self):
+        user_id = await self.session.aget('user_id')
+        if user_id is None:
+            return False
+        version = await aversion_rol(user_id)
+        if (version is not None and await self.session.ahas_key('is_admin')
+                and await self.session.aget('rol_version') == version):
+            return await self.session.aget('is_admin')
+
+        usuario = await self.apractica()
+        if usuario is None:
+            return False
+        await self.session.aset('is_admin', usuario.is_admin)
+        if version is None:
+            await self.session.apop('rol_version', None)
+        else:
+            await self.session.aset('rol_version', version)
+        return usuario.is_admin
+
+    @cached_property
+    def es_admin(self):
+        if not self.autenticado:
+            return False
+        version = version_rol(self.id)
+        if version is not None and 'is_admin' in self.session and self.session.get('rol_version') == version:
+            return self.session['is_admin']
+
+        usuario = self.practica
+        if usuario is None:
+            return False
+        _guardar_rol(self.session, usuario, version)
+        return usuario.is_admin
@@ -0,0 +1,75 @@
+import functools
+import hashlib
+import io
+import logging
+import re
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+# --- Avatares con iniciales generados en el servidor ---
+# Reemplazan las llamadas a ui-avatars.com. Cada avatar es un PNG en
+# MEDIA_ROOT/avatares/<hash>.png cuyo nombre se deriva de las iniciales, los
+# colores y el tamaño: el mismo avatar se genera una sola vez y su contenido
+# nunca cambia, así que nginx lo sirve con caché inmutable. Cada proceso
+# recuerda qué avatares ya existen para no tocar el disco en cada página.
+
+CARPETA = 'avatares'
+TAMANO = 128
+# Colores de fondo para 'aleatorio' (se elige uno fijo por nombre)
+PALETA = ('667eea', '764ba2', 'f093fb', '3f5e33', 'e67e22', '16a085', '2980b9', 'c0392b', '8e44ad', '2c3e50')
+_HEX = re.compile(r'^[0-9a-f]{3}([0-9a-f]{3})?$')
+
+
+def iniciales(nombre):
+    """Hasta dos iniciales en mayúscula: 'maria rodriguez' -> 'MR', 'admin' -> 'A'."""
+    palabras = re.findall(r'\w+', nombre or '')
+    return ''.join(p[0] for p in palabras[:2]).upper() or '?'
+
+
+def _normalizar_color(color):
+    color = (color or '').strip().lstrip('#').lower()
+    if not _HEX.match(color):
+        raise ValueError(f"Color inválido: {color!r}")
+    return color if len(color) == 6 else ''.join(c * 2 for c in color)
+
+
+def color_para(nombre):
+    """Color de fondo estable para un nombre (sustituye a background=random)."""
+    indice = int(hashlib.sha1((nombre or '').encode('utf-8')).hexdigest(), 16) % len(PALETA)
+    return PALETA[indice]
+
+
+def generar_png(texto, fondo, color, tamano=TAMANO):
+    imagen = Image.new('RGB', (tamano, tamano), f'#{fondo}')
+    dibujo = ImageDraw.Draw(imagen)
+    fuente = ImageFont.load_default(size=round(tamano * 0.42))
+    dibujo.text((tamano / 2, tamano / 2), texto, fill=f'#{color}', font=fuente, anchor='mm')
+    salida = io.BytesIO()
+    imagen.save(salida, 'PNG', optimize=True)
+    return salida.getvalue()
+
+
+@functools.lru_cache(maxsize=4096)
+def _asegurar(texto, fondo, color, tamano):
+    huella = hashlib.sha1(f'{texto}|{fondo}|{color}|{tamano}'.encode('utf-8')).hexdigest()[:20]
+    ruta = f'{CARPETA}/{huella}.png'
+    if not default_storage.exists(ruta):
+        default_storage.save(ruta, ContentFile(generar_png(texto, fondo, color, tamano)))
+    return default_storage.url(ruta)
+
+
+def url_avatar(nombre, fondo=None, color='fff', tamano=TAMANO):
+    """
+    URL del avatar con las iniciales de 'nombre'. Sin 'fondo' se usa un color
+    de la paleta elegido por el nombre.
+    """
+    fondo = _normalizar_color(fondo) if fondo else color_para(nombre)
+    try:
+        return _asegurar(iniciales(nombre), fondo, _normalizar_color(color), tamano)
+    except OSError:
+        logger.warning("No se pudo guardar el avatar de %r", nombre, exc_info=True)
+        return ''
@@ -0,0 +1,83 @@
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+# --- Búsqueda de Tours ---
+# Cada Tour guarda en 'busqueda' su nombre y descripción en minúsculas y sin
+# tildes. En PostgreSQL un trigger mantiene además la columna 'search_vector'
+# (tsvector con pesos A=nombre, B=descripción) y hay índices GIN para el
+# tsvector y para trigramas sobre 'busqueda' (ver migración 0010). En SQLite
+# (pruebas/desarrollo) se usa un filtro LIKE sobre 'busqueda' como respaldo.
+
+CONFIG_TS = 'spanish'
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni diacríticos y con espacios colapsados ('Bogotá' -> 'bogota')."""
+    if not texto:
+        return ''
+    descompuesto = unicodedata.normalize('NFKD', str(texto))
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.lower().split())
+
+
+def documento_busqueda(nombre, descripcion):
+    """Texto normalizado que se guarda en Tour.busqueda."""
+    return normalizar(f"{nombre or ''} {descripcion or ''}")
+
+
+def _terminos(texto):
+    return re.findall(r'[a-z0-9]+', normalizar(texto))
+
+
+def buscar_tours(texto, queryset):
+    """
+    Devuelve los tours que coinciden con 'texto', ordenados por relevancia.
+    - Ignora tildes y mayúsculas ("dias" encuentra "días").
+    - Cada término se trata como prefijo, útil para búsquedas mientras se escribe.
+    - En PostgreSQL tolera errores de tipeo gracias a la similitud por trigramas.
+    """
+    terminos = _terminos(texto)
+    if not terminos:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        return _buscar_postgres(queryset, terminos)
+    return _buscar_generico(queryset, terminos)
+
+
+def _buscar_postgres(queryset, terminos):
+    consulta_ts = ' & '.join(f"{t}:*" for t in terminos)
+    frase = ' '.join(terminos)
+    tabla = queryset.model._meta.db_table
+    return queryset.annotate(
+        coincide=RawSQL(
+            f"({tabla}.search_vector @@ to_tsquery(%s, %s) OR %s <%% {tabla}.busqueda)",
+            (CONFIG_TS, consulta_ts, frase),
+            output_field=BooleanField(),
+        ),
+        relevancia=RawSQL(
+            f"(ts_rank_cd({tabla}.search_vector, to_tsquery(%s, %s)) "
+            f"+ word_similarity(%s, {tabla}.busqueda))",
+            (CONFIG_TS, consulta_ts, frase),
+            output_field=FloatField(),
+        ),
+    ).filter(coincide=True).order_by('-relevancia', 'nombre')
+
+
+def _buscar_generico(queryset, terminos):
+    filtro = Q()
+    for termino in terminos:
+        filtro &= Q(busqueda__contains=termino)
+    # El nombre va al inicio del documento: si empieza por el primer término
+    # se considera más relevante.
+    return queryset.filter(filtro).annotate(
+        relevancia=Case(
+            When(busqueda__startswith=terminos[0], then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by('-relevancia', 'nombre')
@@ -0,0 +1,177 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Tour
+from .router import PRIMARIA
+
+logger = logging.getLogger(__name__)
+
+# --- Caché versionada del catálogo de Tours ---
+# El catálogo casi nunca cambia, así que las listas de tours se guardan en la
+# caché compartida bajo una clave que incluye un número de versión. Cada vez que
+# se escribe un Tour (vistas, admin, scripts) se incrementa la versión y las
+# claves viejas simplemente dejan de leerse hasta que expiran.
+
+CLAVE_VERSION = 'catalogo:version'
+CLAVE_HITS = 'catalogo:stats:hits'
+CLAVE_MISSES = 'catalogo:stats:misses'
+CATEGORIAS = ('ciudad', 'lugar')
+
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+def _contar(clave):
+    """Incrementa un contador de estadísticas sin romper la petición si la caché falla."""
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # La clave no existe todavía (o expiró): se crea con valor 1
+        cache.add(clave, 0, timeout=None)
+        try:
+            cache.incr(clave)
+        except Exception:
+            pass
+    except Exception:
+        pass
+
+
+def version_catalogo():
+    """Devuelve la versión actual del catálogo (la crea en 1 si no existe)."""
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, 1, timeout=None)
+        version = cache.get(CLAVE_VERSION, 1)
+    return version
+
+
+def invalidar_catalogo():
+    """
+    Incrementa la versión del catálogo.
+    Se llama desde las señales de Tour (crear, editar, eliminar) y desde cualquier
+    escritura masiva que no dispare señales (por ejemplo queryset.update()).
+    """
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.add(CLAVE_VERSION, 1, timeout=None)
+    except Exception:
+        logger.warning("No se pudo invalidar la caché del catálogo", exc_info=True)
+
+
+def _consultar(categoria):
+    # Se llena desde la primaria: justo después de invalidar, una réplica atrasada
+    # dejaría guardada en caché una versión vieja del catálogo hasta que expire.
+    tours = Tour.objects.using(PRIMARIA)
+    if categoria:
+        tours = tours.filter(categoria=categoria)
+    return list(tours)
+
+
+def obtener_tours(categoria=None):
+    """
+    Lista de tours (opcionalmente filtrada por 'ciudad' o 'lugar') desde la caché.
+    Si la caché no está disponible se consulta la base de datos directamente.
+    """
+    if categoria is not None and categoria not in CATEGORIAS:
+        raise ValueError(f"Categoría desconocida: {categoria}")
+
+    try:
+        clave = f"catalogo:v{version_catalogo()}:{categoria or 'todos'}"
+        tours = cache.get(clave)
+    except Exception:
+        logger.warning("Caché del catálogo no disponible, usando la base de datos", exc_info=True)
+        return _consultar(categoria)
+
+    if tours is not None:
+        _contar(CLAVE_HITS)
+        return tours
+
+    _contar(CLAVE_MISSES)
+    tours = _consultar(categoria)
+    try:
+        cache.set(clave, tours, _timeout())
+    except Exception:
+        logger.warning("No se pudo guardar el catálogo en caché", exc_info=True)
+    return tours
+
+
+async def _acontar(clave):
+    try:
+        await cache.aincr(clave)
+    except ValueError:
+        await cache.aadd(clave, 0, timeout=None)
+        try:
+            await cache.aincr(clave)
+        except Exception:
+            pass
+    except Exception:
+        pass
+
+
+async def aversion_catalogo():
+    version = await cache.aget(CLAVE_VERSION)
+    if version is None:
+        await cache.aadd(CLAVE_VERSION, 1, timeout=None)
+        version = await cache.aget(CLAVE_VERSION, 1)
+    return version
+
+
+async def _aconsultar(categoria):
+    tours = Tour.objects.using(PRIMARIA)
+    if categoria:
+        tours = tours.filter(categoria=categoria)
+    return [tour async for tour in tours]
+
+
+async def aobtener_tours(categoria=None):
+    """Versión asíncrona de obtener_tours() para las vistas async (ASGI)."""
+    if categoria is not None and categoria not in CATEGORIAS:
+        raise ValueError(f"Categoría desconocida: {categoria}")
+
+    try:
+        clave = f"catalogo:v{await aversion_catalogo()}:{categoria or 'todos'}"
+        tours = await cache.aget(clave)
+    except Exception:
+        logger.warning("Caché del catálogo no disponible, usando la base de datos", exc_info=True)
+        return await _aconsultar(categoria)
+
+    if tours is not None:
+        await _acontar(CLAVE_HITS)
+        return tours
+
+    await _acontar(CLAVE_MISSES)
+    tours = await _aconsultar(categoria)
+    try:
+        await cache.aset(clave, tours, _timeout())
+    except Exception:
+        logger.warning("No se pudo guardar el catálogo en caché", exc_info=True)
+    return tours
+
+
+def estadisticas_cache():
+    """Contadores de aciertos/fallos de la caché del catálogo (compartidos entre workers)."""
+    try:
+        valores = cache.get_many([CLAVE_HITS, CLAVE_MISSES, CLAVE_VERSION])
+    except Exception:
+        return {'hits': None, 'misses': None, 'version': None, 'disponible': False}
+    hits = valores.get(CLAVE_HITS, 0)
+    misses = valores.get(CLAVE_MISSES, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'ratio': round(hits / total, 4) if total else 0.0,
+        'version': valores.get(CLAVE_VERSION),
+        'disponible': True,
+    }
+
+
+def reiniciar_estadisticas():
+    try:
+        cache.delete_many([CLAVE_HITS, CLAVE_MISSES])
+    except Exception:
+        pass
@@ -0,0 +1,185 @@
+import functools
+import hashlib
+import logging
+import uuid
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.middleware.csrf import get_token
+from django.template import engines
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+# --- GET condicional (ETag / Last-Modified) ---
+# Las páginas del catálogo y el panel de reservas dependen de pocas cosas:
+# las filas de los modelos que muestran, el usuario (nombre y rol), la URL con
+# sus filtros, el código desplegado (plantillas y nombres de los estáticos) y
+# la cookie CSRF (el token de los formularios de la página sale de ella).
+# Con eso se calcula un ETag antes de ejecutar la vista; si coincide con el
+# If-None-Match del navegador se responde 304 sin consultar los tours ni
+# renderizar la plantilla. Por modelo basta el máximo de fecha_actualizacion
+# (indexado) y una "versión de cambios" en la caché compartida que se renueva
+# con cada alta, edición o borrado (señales y escrituras masivas); un borrado
+# no mueve el máximo. Sin caché compartida la versión no llegaría a los demás
+# workers, así que ahí se cuentan las filas como antes.
+
+
+@functools.lru_cache(maxsize=None)
+def version_despliegue():
+    """Huella de las plantillas y del manifiesto de estáticos (una vez por proceso)."""
+    huella = hashlib.sha1()
+    for motor in engines.all():
+        for directorio in getattr(motor, 'template_dirs', ()):
+            for ruta in sorted(Path(directorio).rglob('*')):
+                if ruta.is_file():
+                    huella.update(str(ruta).encode('utf-8'))
+                    huella.update(ruta.read_bytes())
+    for original, con_hash in sorted(getattr(staticfiles_storage, 'hashed_files', {}).items()):
+        huella.update(f'{original}={con_hash}'.encode('utf-8'))
+    return huella.hexdigest()
+
+
+def _clave_cambios(modelo):
+    return f'condicional:{modelo._meta.label_lower}:cambios'
+
+
+def version_cambios(modelo):
+    """
+    Versión de cambios del modelo, o None si no se puede confiar en la caché
+    (no compartida o caída): entonces se cuentan sus filas.
+    """
+    if not settings.CACHE_COMPARTIDA:
+        return None
+    try:
+        version = cache.get(_clave_cambios(modelo))
+        if version is None:
+            # Valor único: si la clave se pierde ningún ETag viejo puede coincidir por casualidad
+            cache.add(_clave_cambios(modelo), uuid.uuid4().hex, timeout=None)
+            version = cache.get(_clave_cambios(modelo))
+        return version
+    except Exception:
+        logger.warning("Caché no disponible para la versión de cambios", exc_info=True)
+        return None
+
+
+async def aversion_cambios(modelo):
+    if not settings.CACHE_COMPARTIDA:
+        return None
+    try:
+        version = await cache.aget(_clave_cambios(modelo))
+        if version is None:
+            await cache.aadd(_clave_cambios(modelo), uuid.uuid4().hex, timeout=None)
+            version = await cache.aget(_clave_cambios(modelo))
+        return version
+    except Exception:
+        logger.warning("Caché no disponible para la versión de cambios", exc_info=True)
+        return None
+
+
+def registrar_cambio(modelo):
+    """
+    Renueva la versión de cambios del modelo. Se llama desde las señales de Tour y
+    Reserva y desde las escrituras masivas que no las disparan (import_tours, transiciones).
+    """
+    try:
+        cache.set(_clave_cambios(modelo), uuid.uuid4().hex, timeout=None)
+    except Exception:
+        logger.warning("No se pudo renovar la versión de cambios de %s", modelo._meta.label, exc_info=True)
+
+
+def _agregados(version):
+    if version is None:
+        return {'ultimo': Max('fecha_actualizacion'), 'cambios': Count('pk')}
+    return {'ultimo': Max('fecha_actualizacion')}
+
+
+def _agregado(modelo):
+    version = version_cambios(modelo)
+    return {'cambios': version, **modelo.objects.order_by().aggregate(**_agregados(version))}
+
+
+async def _aagregado(modelo):
+    version = await aversion_cambios(modelo)
+    return {'cambios': version, **await modelo.objects.order_by().aaggregate(**_agregados(version))}
+
+
+def _validadores(request, agregados, es_admin):
+    """(ETag, fecha de la última modificación o None) de la petición."""
+    # get_token() crea la cookie CSRF si falta: la primera respuesta y su revalidación comparten token
+    get_token(request)
+    partes = [
+        version_despliegue(),
+        request.get_full_path(),
+        str(request.session.get('user_id')),
+        str(request.session.get('username')),
+        str(es_admin),
+        request.META['CSRF_COOKIE'],
+    ]
+    partes += [f"{a['ultimo'].isoformat() if a['ultimo'] else '-'}/{a['cambios']}" for a in agregados]
+    etag = quote_etag(hashlib.sha1('|'.join(partes).encode('utf-8')).hexdigest())
+    fechas = [a['ultimo'] for a in agregados if a['ultimo']]
+    return etag, (int(max(fechas).timestamp()) if fechas else None)
+
+
+def _hay_mensajes(request):
+    """
+    Un mensaje pendiente (p. ej. el resultado de una acción antes del redirect) se
+    muestra una sola vez: esa página no debe quedar en la caché del navegador.
+    """
+    return len(get_messages(request)) > 0
+
+
+def _marcar(respuesta, etag, ultimo):
+    if respuesta.status_code in (200, 304):
+        respuesta.headers.setdefault('ETag', etag)
+        if ultimo is not None:
+            respuesta.headers.setdefault('Last-Modified', http_date(ultimo))
+        # Página personal: el navegador la guarda pero pregunta siempre antes de usarla
+        patch_cache_control(respuesta, private=True, no_cache=True)
+    return respuesta
+
+
+def condicional(*modelos):
+    """
+    Responde 304 Not Modified a un GET cuando no cambió nada de lo que muestra
+    la vista para ese usuario. 'modelos' son los modelos cuyas filas aparecen en
+    la página (deben tener 'fecha_actualizacion'). Va debajo de login_required
+    o admin_required. Uso: @condicional(Tour) o @condicional(Reserva, Tour).
+    """
+    def decorador(view):
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def envoltura_async(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                agregados = [await _aagregado(modelo) for modelo in modelos]
+                # aget() carga la sesión: después los accesos sync no consultan la BD
+                await request.session.aget('user_id')
+                if _hay_mensajes(request):
+                    return await view(request, *args, **kwargs)
+                etag, ultimo = _validadores(request, agregados, await request.usuario.aes_admin())
+                respuesta = get_conditional_response(request, etag=etag, last_modified=ultimo)
+                if respuesta is None:
+                    respuesta = await view(request, *args, **kwargs)
+                return _marcar(respuesta, etag, ultimo)
+            return envoltura_async
+
+        @functools.wraps(view)
+        def envoltura(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or _hay_mensajes(request):
+                return view(request, *args, **kwargs)
+            agregados = [_agregado(modelo) for modelo in modelos]
+            etag, ultimo = _validadores(request, agregados, request.usuario.es_admin)
+            respuesta = get_conditional_response(request, etag=etag, last_modified=ultimo)
+            if respuesta is None:
+                respuesta = view(request, *args, **kwargs)
+            return _marcar(respuesta, etag, ultimo)
+        return envoltura
+    return decorador
@@ -0,0 +1,67 @@
+import os
+import threading
+
+from django.db import connections
+
+# --- Estadísticas de conexiones a la base de datos ---
+# Cada worker lleva su propia cuenta de cuántas veces abrió una conexión
+# (señal connection_created) y de cuántas peticiones atendió. Con conexiones
+# persistentes o con pool, las aperturas deben quedarse muy por debajo de las
+# peticiones; si crecen a la par es que cada petición paga el handshake TCP + auth.
+
+_lock = threading.Lock()
+_contadores = {'aperturas': {}, 'peticiones': 0}
+
+
+def conexion_abierta(sender, connection, **kwargs):
+    """Receptor de connection_created (registrado en signals.py)."""
+    with _lock:
+        _contadores['aperturas'][connection.alias] = _contadores['aperturas'].get(connection.alias, 0) + 1
+
+
+def peticion_atendida(sender, **kwargs):
+    """Receptor de request_finished (registrado en signals.py)."""
+    with _lock:
+        _contadores['peticiones'] += 1
+
+
+def modo(alias='default'):
+    """'pool', 'persistente' o 'por_peticion' según la configuración de la conexión."""
+    ajustes = connections[alias].settings_dict
+    if ajustes.get('OPTIONS', {}).get('pool'):
+        return 'pool'
+    if ajustes.get('CONN_MAX_AGE'):
+        return 'persistente'
+    return 'por_peticion'
+
+
+def estadisticas_conexiones():
+    """Estado de las conexiones de este worker (una entrada por alias configurado)."""
+    with _lock:
+        aperturas = dict(_contadores['aperturas'])
+        peticiones = _contadores['peticiones']
+
+    bases = {}
+    for alias in connections:
+        conexion = connections[alias]
+        ajustes = conexion.settings_dict
+        datos = {
+            'motor': conexion.vendor,
+            'modo': modo(alias),
+            'conn_max_age': ajustes.get('CONN_MAX_AGE'),
+            'health_checks': ajustes.get('CONN_HEALTH_CHECKS', False),
+            'aperturas': aperturas.get(alias, 0),
+        }
+        pool = getattr(conexion, 'pool', None)
+        if pool is not None:
+            # Estadísticas de psycopg_pool: pool_size, pool_available, requests_num,
+            # requests_waiting, connections_num, ...
+            datos['pool'] = pool.get_stats()
+        bases[alias] = datos
+    return {'pid': os.getpid(), 'peticiones': peticiones, 'bases': bases}
+
+
+def reiniciar_contadores():
+    with _lock:
+        _contadores['aperturas'].clear()
+        _contadores['peticiones'] = 0
@@ -0,0 +1,82 @@
+import threading
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, identify_hasher, make_password
+from django.utils.crypto import constant_time_compare
+
+# --- Contraseñas ---
+# Las contraseñas se guardan con PBKDF2 (hash de Django). Derivar la clave es
+# trabajo de CPU y las vistas son síncronas: el hilo de la petición espera el
+# hash de todos modos, así que se calcula en línea (pasarlo a otro hilo solo
+# añadía un salto). Lo que sí se acota es cuántos hashes corren a la vez en el
+# proceso: un semáforo con PASSWORD_VERIFY_MAX_PENDIENTES cupos (hashlib libera
+# el GIL, así que varios cupos aprovechan varios núcleos). Si no hay cupo en
+# PASSWORD_VERIFY_TIMEOUT segundos se responde "ocupado" en vez de encolar sin fin.
+#
+# Las filas antiguas con la contraseña en texto plano se aceptan una última vez
+# y se vuelven a guardar cifradas (lo mismo si cambia el factor de trabajo).
+
+
+class PBKDF2AjustableHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 con el número de iteraciones tomado de settings.PASSWORD_HASH_ITERATIONS."""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class ServicioOcupado(Exception):
+    """No hubo cupo para calcular el hash a tiempo."""
+
+
+_cupos = threading.BoundedSemaphore(getattr(settings, 'PASSWORD_VERIFY_MAX_PENDIENTES', 8))
+
+
+def _ejecutar(funcion, *args):
+    """Llama a 'funcion' en este mismo hilo cuando hay cupo; sin cupo a tiempo lanza ServicioOcupado."""
+    if not _cupos.acquire(timeout=getattr(settings, 'PASSWORD_VERIFY_TIMEOUT', 5)):
+        raise ServicioOcupado()
+    try:
+        return funcion(*args)
+    finally:
+        _cupos.release()
+
+
+def es_texto_plano(valor):
+    """True si el valor guardado no tiene el formato de ningún hash conocido (fila legacy)."""
+    try:
+        identify_hasher(valor)
+    except ValueError:
+        return True
+    return False
+
+
+def _verificar(password, guardado):
+    """Devuelve (correcta, hash_nuevo). hash_nuevo no es None si hay que volver a guardar."""
+    if not guardado or not password:
+        return False, None
+    if es_texto_plano(guardado):
+        correcta = constant_time_compare(guardado, password)
+        return correcta, (make_password(password) if correcta else None)
+
+    nuevo = []
+    correcta = check_password(password, guardado, setter=lambda p: nuevo.append(make_password(p)))
+    return correcta, (nuevo[0] if nuevo else None)
+
+
+def cifrar(password):
+    """Hash de la contraseña (en línea, dentro de los cupos)."""
+    return _ejecutar(make_password, password)
+
+
+def verificar(usuario, password):
+    """
+    Comprueba la contraseña de un Practica.
+    Si estaba en texto plano o con otro factor de trabajo, guarda el hash nuevo.
+    Lanza ServicioOcupado si no hay cupo a tiempo.
+    """
+    correcta, nuevo = _ejecutar(_verificar, password, usuario.password)
+    if correcta and nuevo:
+        usuario.password = nuevo
+        usuario.save(update_fields=['password'])
+    return correcta
@@ -0,0 +1,107 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+# --- Conversión de textos de Tour a valores numéricos ---
+# Tour.precio y Tour.duracion son textos libres ("7.5M", "4,500", "7 días de
+# viaje"). Estas funciones los convierten a números para poder ordenar y
+# filtrar en la base de datos (Tour.precio_centavos / Tour.duracion_dias).
+
+CENTAVOS_POR_PESO = 100
+MAX_CENTAVOS = 2 ** 63 - 1  # límite de BigIntegerField
+
+_SUFIJOS = {
+    'm': Decimal(1_000_000),
+    'mm': Decimal(1_000_000),
+    'millones': Decimal(1_000_000),
+    'millon': Decimal(1_000_000),
+    'millón': Decimal(1_000_000),
+    'k': Decimal(1_000),
+    'mil': Decimal(1_000),
+}
+_PRECIO = re.compile(r'(\d[\d.,]*)\s*([a-zñó]*)')
+_MILES = re.compile(r'^\d{1,3}([.,]\d{3})+$')
+
+
+def parsear_precio(texto):
+    """
+    Precio en centavos (int) a partir del texto del Tour, o None si no se entiende.
+    '7.5M' -> 750000000, '4,500' -> 450000, '$1.200.000 COP' -> 120000000.
+    """
+    if not texto:
+        return None
+    coincidencia = _PRECIO.search(str(texto).lower().replace('$', '').replace('cop', ''))
+    if not coincidencia:
+        return None
+    numero, sufijo = coincidencia.groups()
+    numero = numero.rstrip('.,')
+    multiplicador = _SUFIJOS.get(sufijo, Decimal(1))
+
+    if sufijo in _SUFIJOS:
+        # Con sufijo ("7.5M", "7,5M") el separador es decimal
+        numero = numero.replace(',', '.')
+    elif _MILES.match(numero):
+        # "4,500" / "1.200.000": separadores de miles
+        numero = numero.replace('.', '').replace(',', '')
+    else:
+        numero = numero.replace(',', '.')
+
+    try:
+        valor = Decimal(numero) * multiplicador
+    except InvalidOperation:
+        return None
+    centavos = int((valor * CENTAVOS_POR_PESO).to_integral_value())
+    return centavos if centavos <= MAX_CENTAVOS else None
+
+
+_DIAS_POR_UNIDAD = {
+    'día': 1, 'días': 1, 'dia': 1, 'dias': 1,
+    'semana': 7, 'semanas': 7,
+    'mes': 30, 'meses': 30,
+}
+# Número seguido de una unidad como palabra completa ("mesa" no es "mes")
+_CANTIDAD = re.compile(r'(\d+)\s*(' + '|'.join(sorted(_DIAS_POR_UNIDAD, key=len, reverse=True)) + r')\b')
+_NUMERO = re.compile(r'\d+')
+MAX_DIAS = 32767  # límite de PositiveSmallIntegerField
+
+
+def parsear_duracion(texto):
+    """
+    Duración en días a partir del texto del Tour: suma cada número con su unidad
+    ('7 días de viaje' -> 7, '1 mes y 2 semanas' -> 44). Sin unidades, el primer número son días.
+    """
+    if not texto:
+        return None
+    texto = str(texto).lower()
+    cantidades = _CANTIDAD.findall(texto)
+    if cantidades:
+        dias = sum(int(numero) * _DIAS_POR_UNIDAD[unidad] for numero, unidad in cantidades)
+    else:
+        coincidencia = _NUMERO.search(texto)
+        if not coincidencia:
+            return None
+        dias = int(coincidencia.group())
+    return dias if dias <= MAX_DIAS else None
+
+
+def rellenar_tours(modelo_tour, tamano_lote=500, alias=None):
+    """
+    Recalcula precio_centavos y duracion_dias de todos los tours por lotes
+    (recorriendo por id, un bulk_update por lote). Sirve tanto para la
+    migración (modelo histórico, con el alias que migra) como para el comando
+    'normalizar_tours'. Devuelve el número de tours procesados.
+    """
+    tours = modelo_tour.objects.using(alias)
+    ultimo_id = 0
+    total = 0
+    while True:
+        lote = list(
+            tours.filter(id__gt=ultimo_id).order_by('id').only('id', 'precio', 'duracion')[:tamano_lote]
+        )
+        if not lote:
+            return total
+        for tour in lote:
+            tour.precio_centavos = parsear_precio(tour.precio)
+            tour.duracion_dias = parsear_duracion(tour.duracion)
+        tours.bulk_update(lote, ['precio_centavos', 'duracion_dias'])
+        ultimo_id = lote[-1].id
+        total += len(lote)
@@ -0,0 +1,131 @@
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CorreoPendiente
+from .router import PRIMARIA
+
+logger = logging.getLogger(__name__)
+
+# --- Bandeja de salida de correos ---
+# Las vistas no hablan con el servidor SMTP: encolar() guarda el correo como
+# CorreoPendiente en la transacción en curso, así que solo existe si el cambio
+# que lo origina se confirma (y desaparece con él si se deshace).
+# 'manage.py enviar_correos' llama a enviar_pendientes() en bucle:
+#   1. reclama un lote de pendientes cuyo proximo_intento ya llegó (SELECT ...
+#      FOR UPDATE SKIP LOCKED en PostgreSQL) y lo corre CORREO_RECLAMO_SEGUNDOS:
+#      otro worker no lo toma y, si este muere a mitad, vuelve solo a la cola;
+#   2. envía el lote por una única conexión SMTP, abierta una vez y reutilizada;
+#   3. marca los enviados con un UPDATE; los fallidos se reprograman con espera
+#      exponencial y, tras CORREO_MAX_INTENTOS (o un rechazo 5xx), quedan 'fallido'.
+# La entrega es "al menos una vez": si el worker muere entre enviar y marcar,
+# ese lote se reenvía al vencer el reclamo.
+
+# Tras estos errores el servidor ya hizo RSET: la conexión sigue sirviendo
+_ERRORES_DEL_MENSAJE = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def encolar(asunto, cuerpo, destinatarios, remitente=None):
+    """Guarda un correo para enviarlo después. Llamar dentro de la transacción del cambio que lo origina."""
+    return CorreoPendiente.objects.using(PRIMARIA).create(
+        asunto=asunto, cuerpo=cuerpo, destinatarios=list(destinatarios),
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def confirmacion_reserva(reserva):
+    """Encola el aviso de reserva recibida para el cliente."""
+    cuerpo = (
+        f"Hola {reserva.nombre_cliente},\n\n"
+        f"Recibimos tu reserva del tour {reserva.tour.nombre} para el {reserva.fecha_inicio:%d/%m/%Y} "
+        f"({reserva.numero_personas} {'persona' if reserva.numero_personas == 1 else 'personas'}).\n"
+        f"Está pendiente de confirmación; te avisaremos cuando cambie.\n\n"
+        f"Travel Web"
+    )
+    return encolar(f'Reserva recibida - {reserva.tour.nombre}', cuerpo, [reserva.email_cliente])
+
+
+def espera(intentos):
+    """Segundos hasta el siguiente intento tras 'intentos' fallidos: base × 2^(intentos-1), con tope."""
+    return min(settings.CORREO_REINTENTO_SEGUNDOS * 2 ** (intentos - 1), settings.CORREO_REINTENTO_MAX_SEGUNDOS)
+
+
+def _permanente(error):
+    """Rechazo definitivo del servidor (5xx): reintentar no lo arregla."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(codigo >= 500 for codigo, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def reclamar(lote, ahora=None):
+    """Toma hasta 'lote' correos vencidos y los aparta CORREO_RECLAMO_SEGUNDOS para este worker."""
+    ahora = ahora or timezone.now()
+    correos = CorreoPendiente.objects.using(PRIMARIA)
+    with transaction.atomic(using=PRIMARIA):
+        reclamados = list(
+            correos.filter(estado='pendiente', proximo_intento__lte=ahora)
+            .order_by('proximo_intento', 'id').select_for_update(skip_locked=True)[:lote]
+        )
+        if reclamados:
+            correos.filter(pk__in=[correo.pk for correo in reclamados]).update(
+                proximo_intento=ahora + timedelta(seconds=settings.CORREO_RECLAMO_SEGUNDOS)
+            )
+    return reclamados
+
+
+def enviar_pendientes(conexion=None, lote=None):
+    """
+    Envía un lote de la bandeja por 'conexion' (un backend de correo), que queda
+    abierta para el siguiente lote: cerrarla es cosa de quien la pasó. Sin conexión
+    se usa get_connection() solo para este lote. Devuelve {'enviados', 'reintentos', 'fallidos'}.
+    Si el servidor no acepta la conexión, el error sube sin gastar intentos: el
+    lote vuelve a la cola cuando vence el reclamo.
+    """
+    reclamados = reclamar(lote or settings.CORREO_LOTE)
+    resultado = {'enviados': 0, 'reintentos': 0, 'fallidos': 0}
+    if not reclamados:
+        return resultado
+    propia = conexion is None
+    conexion = conexion or get_connection()
+    conexion.open()  # fuera del try: sin servidor no se gastan intentos
+    enviados = []
+    try:
+        for correo in reclamados:
+            mensaje = EmailMessage(correo.asunto, correo.cuerpo, correo.remitente, correo.destinatarios,
+                                   connection=conexion)
+            try:
+                conexion.open()  # no hace nada si ya está abierta; la reabre tras un error de conexión
+                mensaje.send()
+            except Exception as error:
+                if not isinstance(error, _ERRORES_DEL_MENSAJE):
+                    conexion.close()  # se reabre para el siguiente correo
+                _reprogramar(correo, error)
+                resultado['fallidos' if correo.estado == 'fallido' else 'reintentos'] += 1
+            else:
+                enviados.append(correo.pk)
+    finally:
+        if propia:
+            conexion.close()
+        if enviados:
+            CorreoPendiente.objects.using(PRIMARIA).filter(pk__in=enviados).update(
+                estado='enviado', fecha_envio=timezone.now(), intentos=F('intentos') + 1, ultimo_error=''
+            )
+    resultado['enviados'] = len(enviados)
+    return resultado
+
+
+def _reprogramar(correo, error):
+    correo.intentos += 1
+    correo.ultimo_error = f'{type(error).__name__}: {error}'[:1000]
+    if _permanente(error) or correo.intentos >= settings.CORREO_MAX_INTENTOS:
+        correo.estado = 'fallido'
+        logger.warning("correo %s fallido tras %s intentos: %s", correo.pk, correo.intentos, correo.ultimo_error)
+    else:
+        correo.proximo_intento = timezone.now() + timedelta(seconds=espera(correo.intentos))
+    correo.save(using=PRIMARIA, update_fields=['intentos', 'ultimo_error', 'estado', 'proximo_intento'])
@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models import F
+
+from .models import Reserva, Salida
+
+# --- Cupos por salida ---
+# Apartar cupos es un único UPDATE condicional:
+#   UPDATE salida SET reservados = reservados + n WHERE id = X AND reservados + n <= capacidad
+# La base de datos bloquea la fila solo durante ese UPDATE y el resto de la
+# transacción (crear la Reserva), así que dos reservas simultáneas nunca ven el
+# mismo cupo libre. Si el UPDATE no afecta filas, no hay cupo.
+
+
+class SinCupo(Exception):
+    def __init__(self, disponibles):
+        self.disponibles = disponibles
+        super().__init__(f"Solo quedan {disponibles} cupos")
+
+
+def obtener_salida(tour, fecha):
+    """Salida del tour en esa fecha, creándola con la capacidad por defecto del tour."""
+    salida, _ = Salida.objects.get_or_create(
+        tour=tour, fecha=fecha, defaults={'capacidad': tour.capacidad_por_salida}
+    )
+    return salida
+
+
+def reservar(tour, fecha_inicio, numero_personas, **datos):
+    """
+    Crea una Reserva apartando 'numero_personas' cupos de la salida del tour en 'fecha_inicio'.
+    Lanza SinCupo si no alcanzan; en ese caso no se guarda nada.
+    """
+    if numero_personas < 1:
+        raise ValueError("El número de personas debe ser al menos 1")
+
+    with transaction.atomic():
+        salida = obtener_salida(tour, fecha_inicio)
+        apartados = Salida.objects.filter(
+            pk=salida.pk, reservados__lte=F('capacidad') - numero_personas
+        ).update(reservados=F('reservados') + numero_personas)
+        if not apartados:
+            salida.refresh_from_db(fields=['capacidad', 'reservados'])
+            raise SinCupo(max(salida.disponibles, 0))
+
+        return Reserva.objects.create(
+            tour=tour, salida=salida, fecha_inicio=fecha_inicio, numero_personas=numero_personas, **datos
+        )
+
+
+def liberar(salida_id, numero_personas):
+    """Devuelve cupos a una salida (reserva cancelada o eliminada)."""
+    if salida_id is None or numero_personas <= 0:
+        return
+    Salida.objects.filter(pk=salida_id, reservados__gte=numero_personas).update(
+        reservados=F('reservados') - numero_personas
+    )
+
+
+def disponibles(tour, fecha):
+    salida = Salida.objects.filter(tour=tour, fecha=fecha).only('capacidad', 'reservados').first()
+    if salida is None:
+        return tour.capacidad_por_salida
+    return salida.disponibles
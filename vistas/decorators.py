@@ -0,0 +1,48 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.shortcuts import redirect
+
+
+def login_required(view):
+    """Redirige al login si no hay una sesión activa (vistas sync o async)."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def envoltura_async(request, *args, **kwargs):
+            # aget() carga la sesión sin bloquear; después el acceso sync ya no consulta la BD
+            if await request.session.aget('user_id') is None:
+                return redirect('login')
+            return await view(request, *args, **kwargs)
+        return envoltura_async
+
+    @wraps(view)
+    def envoltura(request, *args, **kwargs):
+        if not request.usuario.autenticado:
+            return redirect('login')
+        return view(request, *args, **kwargs)
+    return envoltura
+
+
+def admin_required(view=None, *, redireccion='home'):
+    """
+    Solo administradores. Sin sesión (o si el usuario ya no existe) redirige al
+    login; un usuario normal va a 'redireccion'.
+    Uso: @admin_required o @admin_required(redireccion='tours').
+    """
+    def decorador(view):
+        @wraps(view)
+        def envoltura(request, *args, **kwargs):
+            usuario = request.usuario
+            if not usuario.autenticado:
+                return redirect('login')
+            if not usuario.es_admin:
+                if usuario.eliminado:
+                    request.session.flush()
+                    return redirect('login')
+                return redirect(redireccion)
+            return view(request, *args, **kwargs)
+        return envoltura
+
+    if view is not None:
+        return decorador(view)
+    return decorador
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import EstadisticaReservas, Reserva
+from .router import PRIMARIA
+
+# --- Estadísticas de reservas por día y tour ---
+# Cada Reserva suma a la fila (día de creación, tour) de EstadisticaReservas:
+# +1 en el contador de su estado, sus personas si no está cancelada y, si está
+# confirmada, también en personas_confirmadas. Al crearla se suma su aporte, al
+# eliminarla se resta y al cambiarla se resta el anterior y se suma el nuevo
+# (señales en signals.py; las escrituras masivas llaman a registrar()).
+# Cada cambio es un UPDATE ... SET x = x + n, así que reservas simultáneas no
+# se pisan. Los ingresos se calculan al leer con el precio actual del tour
+# (la Reserva no guarda precio): es lo mismo que daría reconstruir().
+
+CONTADORES = {'pendiente': 'pendientes', 'confirmada': 'confirmadas', 'cancelada': 'canceladas'}
+CAMPOS = ('pendientes', 'confirmadas', 'canceladas', 'personas', 'personas_confirmadas')
+# Campos de la Reserva de los que depende su aporte (en este orden, ver huella())
+CAMPOS_HUELLA = ('fecha_creacion', 'tour_id', 'estado', 'numero_personas')
+DIAS_DASHBOARD = 30
+
+
+def huella(reserva):
+    """(fecha_creacion, tour_id, estado, numero_personas): lo que la reserva aporta al resumen."""
+    return tuple(getattr(reserva, campo) for campo in CAMPOS_HUELLA)
+
+
+def _aporte(estado, personas):
+    deltas = dict.fromkeys(CAMPOS, 0)
+    deltas[CONTADORES[estado]] = 1
+    if estado != 'cancelada':
+        deltas['personas'] = personas
+    if estado == 'confirmada':
+        deltas['personas_confirmadas'] = personas
+    return deltas
+
+
+def registrar(cambios):
+    """
+    Aplica cambios [(huella anterior, huella nueva)] al resumen; None en un lado
+    es una reserva creada o eliminada. Las huellas salen de huella() o de
+    values_list(*CAMPOS_HUELLA). Agrupa por (día, tour): una escritura masiva
+    hace un UPDATE por fila del resumen, no uno por reserva.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(CAMPOS, 0))
+    for anterior, nueva in cambios:
+        for huella_, signo in ((anterior, -1), (nueva, 1)):
+            if huella_ is None:
+                continue
+            fecha_creacion, tour_id, estado, personas = huella_
+            fila = deltas[(timezone.localdate(fecha_creacion), tour_id)]
+            for campo, valor in _aporte(estado, personas).items():
+                fila[campo] += signo * valor
+    for (dia, tour_id), fila in deltas.items():
+        fila = {campo: valor for campo, valor in fila.items() if valor}
+        if fila:
+            _aplicar(dia, tour_id, fila)
+
+
+def _aplicar(dia, tour_id, deltas):
+    filas = EstadisticaReservas.objects.using(PRIMARIA).filter(dia=dia, tour_id=tour_id)
+    incrementos = {campo: F(campo) + valor for campo, valor in deltas.items()}
+    if filas.update(**incrementos):
+        return
+    # Sin fila: solo se crea si hay algo que sumar (restar de una fila borrada
+    # junto con su tour, o de datos previos al resumen, no deja rastros negativos)
+    if all(valor <= 0 for valor in deltas.values()):
+        return
+    try:
+        with transaction.atomic(using=PRIMARIA):
+            EstadisticaReservas.objects.using(PRIMARIA).create(
+                dia=dia, tour_id=tour_id, **{campo: max(valor, 0) for campo, valor in deltas.items()}
+            )
+    except IntegrityError:
+        # Otra petición creó la fila entre el UPDATE y el INSERT
+        filas.update(**incrementos)
+
+
+def _inicio_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def reconstruir(desde=None, hasta=None, lote=1000):
+    """
+    Recalcula el resumen desde las reservas (todas, o creadas entre 'desde' y 'hasta',
+    inclusive) en una transacción. Devuelve cuántas filas quedaron.
+    """
+    reservas = Reserva.objects.using(PRIMARIA).order_by()
+    filas = EstadisticaReservas.objects.using(PRIMARIA)
+    if desde:
+        reservas = reservas.filter(fecha_creacion__gte=_inicio_dia(desde))
+        filas = filas.filter(dia__gte=desde)
+    if hasta:
+        reservas = reservas.filter(fecha_creacion__lt=_inicio_dia(hasta + timedelta(days=1)))
+        filas = filas.filter(dia__lte=hasta)
+    agregados = (
+        reservas.annotate(dia=TruncDate('fecha_creacion')).values('dia', 'tour_id')
+        .annotate(
+            pendientes=Count('pk', filter=Q(estado='pendiente')),
+            confirmadas=Count('pk', filter=Q(estado='confirmada')),
+            canceladas=Count('pk', filter=Q(estado='cancelada')),
+            personas=Coalesce(Sum('numero_personas', filter=~Q(estado='cancelada')), 0),
+            personas_confirmadas=Coalesce(Sum('numero_personas', filter=Q(estado='confirmada')), 0),
+        )
+    )
+    total = 0
+    with transaction.atomic(using=PRIMARIA):
+        filas.delete()
+        pendientes = []
+        for fila in agregados.iterator(chunk_size=lote):
+            pendientes.append(EstadisticaReservas(**fila))
+            if len(pendientes) == lote:
+                total += len(EstadisticaReservas.objects.using(PRIMARIA).bulk_create(pendientes))
+                pendientes = []
+        total += len(EstadisticaReservas.objects.using(PRIMARIA).bulk_create(pendientes))
+    return total
+
+
+def indicadores(dias=DIAS_DASHBOARD, hoy=None):
+    """
+    KPIs de las reservas creadas en los últimos 'dias' (hoy incluido): totales por estado,
+    personas, ingresos estimados (confirmadas × precio del tour) y los tours con más reservas.
+    """
+    hoy = hoy or timezone.localdate()
+    filas = EstadisticaReservas.objects.using(PRIMARIA).filter(dia__gt=hoy - timedelta(days=dias), dia__lte=hoy)
+    ingresos = Sum(F('personas_confirmadas') * F('tour__precio_centavos'))
+    # Los alias no pueden llamarse como los campos: luego Sum(campo) se referiría al agregado
+    sumas = filas.aggregate(
+        **{f'total_{campo}': Coalesce(Sum(campo), 0) for campo in CAMPOS},
+        ingresos_centavos=Coalesce(ingresos, 0),
+    )
+    totales = {campo: sumas[f'total_{campo}'] for campo in CAMPOS}
+    totales['ingresos_centavos'] = sumas['ingresos_centavos']
+    totales['reservas'] = totales['pendientes'] + totales['confirmadas'] + totales['canceladas']
+    totales['ingresos_pesos'] = totales['ingresos_centavos'] // 100
+    totales['dias'] = dias
+    totales['top_tours'] = list(
+        filas.values('tour_id', 'tour__nombre')
+        .annotate(reservas=Sum(F('pendientes') + F('confirmadas') + F('canceladas')), personas=Sum('personas'))
+        .order_by('-reservas', 'tour_id')[:5]
+    )
+    return totales
@@ -0,0 +1,86 @@
+import csv
+import json
+
+# --- Exportación de Reservas ---
+# Las filas se leen con values_list().iterator(chunk_size=...) (cursor del lado
+# del servidor en PostgreSQL) y se convierten a texto una por una, de modo que
+# la memoria usada no depende del tamaño de la tabla y los primeros bytes salen
+# de inmediato.
+
+COLUMNAS = [
+    ('id', 'ID'),
+    ('fecha_creacion', 'Fecha Reserva'),
+    ('estado', 'Estado'),
+    ('tour__nombre', 'Tour'),
+    ('tour__categoria', 'Categoría'),
+    ('fecha_inicio', 'Fecha Inicio'),
+    ('numero_personas', 'Personas'),
+    ('nombre_cliente', 'Cliente'),
+    ('email_cliente', 'Email'),
+    ('telefono_cliente', 'Teléfono'),
+    ('usuario__username', 'Usuario'),
+    ('observaciones', 'Observaciones'),
+]
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'json': ('application/json', 'json'),
+}
+
+TAMANO_LOTE = 2000
+
+# Una celda que empieza así es una fórmula para Excel/Sheets (=HYPERLINK(...)):
+# en el CSV se antepone ' para que se muestre como texto
+INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Eco:
+    """Objeto tipo archivo para csv.writer: devuelve la línea en vez de guardarla."""
+    def write(self, valor):
+        return valor
+
+
+def filas_reservas(reservas, tamano_lote=TAMANO_LOTE):
+    campos = [campo for campo, _ in COLUMNAS]
+    # order_by por id para recorrer el índice de la llave primaria
+    return reservas.order_by('id').values_list(*campos).iterator(chunk_size=tamano_lote)
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return valor
+
+
+def _celda(valor):
+    valor = _texto(valor)
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def generar_csv(filas):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel detecte UTF-8 (tildes en nombres)
+    yield '\ufeff' + escritor.writerow([titulo for _, titulo in COLUMNAS])
+    for fila in filas:
+        yield escritor.writerow([_celda(v) for v in fila])
+
+
+def generar_json(filas):
+    claves = [campo.replace('__', '_') for campo, _ in COLUMNAS]
+    yield '['
+    separador = '\n'
+    for fila in filas:
+        yield separador + json.dumps(dict(zip(claves, fila)), default=_texto, ensure_ascii=False)
+        separador = ',\n'
+    yield '\n]\n'
+
+
+def generar(formato, reservas, tamano_lote=TAMANO_LOTE):
+    filas = filas_reservas(reservas, tamano_lote)
+    if formato == 'json':
+        return generar_json(filas)
+    return generar_csv(filas)
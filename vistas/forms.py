@@ -1,5 +1,10 @@
+from datetime import datetime, time, timedelta
+
 from django import forms
-from .models import Practica, Tour
+from django.db.models import F
+from django.utils import timezone
+from .models import Practica, Tour, Reserva
+from .conversiones import CENTAVOS_POR_PESO
 
 class LoginForm(forms.Form):
     """
@@ -69,11 +74,142 @@ class TourForm(forms.ModelForm):
     """
     class Meta:
         model = Tour
-        fields = ['nombre', 'descripcion', 'imagen_url', 'duracion', 'categoria']
+        fields = ['nombre', 'descripcion', 'imagen_url', 'duracion', 'categoria', 'capacidad_por_salida']
         widgets = {
             'nombre': forms.TextInput(attrs={'class': 'form-control'}),
             'descripcion': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'duracion': forms.TextInput(attrs={'class': 'form-control'}),
             'imagen_url': forms.URLInput(attrs={'class': 'form-control', 'placeholder': 'https://ejemplo.com/imagen.jpg'}),
             'categoria': forms.Select(attrs={'class': 'form-control'}),
+            'capacidad_por_salida': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
         }
+
+class ImportarTourForm(TourForm):
+    """
+    Reglas de una fila de 'manage.py import_tours': las de TourForm más el precio.
+    Ver validar_fila().
+    """
+    class Meta(TourForm.Meta):
+        fields = TourForm.Meta.fields + ['precio']
+
+    def validar_fila(self, datos):
+        """
+        Tour sin guardar a partir de 'datos', o ValidationError con los errores por campo.
+        Valida como is_valid() (campos del formulario y luego el modelo) pero reutiliza
+        este formulario: crear uno por fila copia todos sus campos y es ~6 veces más lento.
+        La unicidad de (nombre, categoría) no se consulta: la resuelve el upsert.
+        """
+        limpios, errores = {}, {}
+        for nombre, campo in self.fields.items():
+            try:
+                limpios[nombre] = campo.clean(datos.get(nombre))
+            except forms.ValidationError as error:
+                errores[nombre] = error.messages
+        if errores:
+            raise forms.ValidationError(errores)
+        tour = Tour(**limpios)
+        tour.full_clean(validate_unique=False, validate_constraints=False)
+        return tour
+
+class FiltroReservasForm(forms.Form):
+    """
+    Filtros del panel de reservas (admin): estado, tour y rango de fechas de creación.
+    Todos son opcionales; del select de tours solo se leen id y nombre.
+    """
+    estado = forms.ChoiceField(required=False, choices=[('', 'Todos los estados')] + Reserva.ESTADOS,
+                               widget=forms.Select(attrs={'class': 'filtro'}))
+    tour = forms.TypedChoiceField(required=False, coerce=int, empty_value=None,
+                                  widget=forms.Select(attrs={'class': 'filtro'}))
+    desde = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'filtro'}))
+    hasta = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'filtro'}))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['tour'].choices = [('', 'Todos los tours')] + [
+            (t.id, t.nombre) for t in Tour.objects.only('id', 'nombre').order_by('nombre')
+        ]
+
+    def filtrar(self, reservas):
+        datos = self.cleaned_data
+        if datos.get('estado'):
+            reservas = reservas.filter(estado=datos['estado'])
+        if datos.get('tour'):
+            reservas = reservas.filter(tour_id=datos['tour'])
+        # Se compara contra límites de fecha/hora (no con __date) para que el
+        # índice sobre fecha_creacion siga sirviendo.
+        if datos.get('desde'):
+            inicio = datetime.combine(datos['desde'], time.min)
+            reservas = reservas.filter(fecha_creacion__gte=timezone.make_aware(inicio))
+        if datos.get('hasta'):
+            fin = datetime.combine(datos['hasta'] + timedelta(days=1), time.min)
+            reservas = reservas.filter(fecha_creacion__lt=timezone.make_aware(fin))
+        return reservas
+
+class AccionReservasForm(forms.Form):
+    """
+    Cambio de estado en bloque desde el panel de reservas (ver transiciones.py):
+    a las reservas marcadas (checkboxes 'reservas') o a todas las del filtro actual.
+    """
+    ALCANCES = [('seleccion', 'Seleccionadas'), ('filtro', 'Todas las del filtro')]
+
+    accion = forms.ChoiceField(choices=[('confirmar', 'Confirmar'), ('cancelar', 'Cancelar')])
+    alcance = forms.ChoiceField(choices=ALCANCES, initial='seleccion', widget=forms.Select(attrs={'class': 'filtro'}))
+
+    def clean(self):
+        datos = super().clean()
+        try:
+            datos['ids'] = {int(valor) for valor in self.data.getlist('reservas')}
+        except ValueError:
+            raise forms.ValidationError("Selección de reservas inválida.")
+        if datos.get('alcance') == 'seleccion' and not datos['ids']:
+            raise forms.ValidationError("Seleccione al menos una reserva.")
+        return datos
+
+class FiltroToursForm(forms.Form):
+    """
+    Orden y rangos (precio en pesos, duración en días) para los listados de tours.
+    Se aplican en la base de datos sobre precio_centavos / duracion_dias (indexados).
+    """
+    ORDENES = [
+        ('', 'Orden predeterminado'),
+        ('precio', 'Más baratos primero'),
+        ('-precio', 'Más caros primero'),
+        ('duracion', 'Más cortos primero'),
+        ('-duracion', 'Más largos primero'),
+        ('nombre', 'Nombre (A-Z)'),
+    ]
+    CAMPOS_ORDEN = {'precio': 'precio_centavos', 'duracion': 'duracion_dias', 'nombre': 'nombre'}
+
+    orden = forms.ChoiceField(required=False, choices=ORDENES, widget=forms.Select(attrs={'class': 'filtro'}))
+    precio_min = forms.IntegerField(required=False, min_value=0,
+                                    widget=forms.NumberInput(attrs={'class': 'filtro', 'placeholder': 'Precio mín.'}))
+    precio_max = forms.IntegerField(required=False, min_value=0,
+                                    widget=forms.NumberInput(attrs={'class': 'filtro', 'placeholder': 'Precio máx.'}))
+    dias_min = forms.IntegerField(required=False, min_value=0,
+                                  widget=forms.NumberInput(attrs={'class': 'filtro', 'placeholder': 'Días mín.'}))
+    dias_max = forms.IntegerField(required=False, min_value=0,
+                                  widget=forms.NumberInput(attrs={'class': 'filtro', 'placeholder': 'Días máx.'}))
+
+    def activo(self):
+        """True si hay algún filtro u orden que obligue a consultar la base de datos."""
+        return self.is_valid() and any(v not in (None, '') for v in self.cleaned_data.values())
+
+    def filtrar(self, tours):
+        if not self.is_valid():
+            return tours
+        datos = self.cleaned_data
+        if datos.get('precio_min') is not None:
+            tours = tours.filter(precio_centavos__gte=datos['precio_min'] * CENTAVOS_POR_PESO)
+        if datos.get('precio_max') is not None:
+            tours = tours.filter(precio_centavos__lte=datos['precio_max'] * CENTAVOS_POR_PESO)
+        if datos.get('dias_min') is not None:
+            tours = tours.filter(duracion_dias__gte=datos['dias_min'])
+        if datos.get('dias_max') is not None:
+            tours = tours.filter(duracion_dias__lte=datos['dias_max'])
+
+        orden = datos.get('orden')
+        if orden:
+            campo = F(self.CAMPOS_ORDEN[orden.lstrip('-')])
+            expresion = campo.desc(nulls_last=True) if orden.startswith('-') else campo.asc(nulls_last=True)
+            tours = tours.order_by(expresion, 'id')
+        return tours
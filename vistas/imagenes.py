@@ -0,0 +1,266 @@
+import base64
+import hashlib
+import http.client
+import io
+import ipaddress
+import logging
+import socket
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageFilter, ImageOps
+
+from .catalogo import invalidar_catalogo
+from .models import Tour
+from .router import PRIMARIA
+from .tarjetas import invalidar_tarjeta
+
+logger = logging.getLogger(__name__)
+
+# --- Imágenes locales de los tours ---
+# Cuando se guarda un Tour con una imagen_url nueva, un pool de hilos (fuera de
+# la petición) descarga la imagen una sola vez y genera con Pillow:
+#   - variantes WebP y JPEG de varios anchos (TOUR_IMAGEN_ANCHOS), y
+#   - un placeholder diminuto y desenfocado (data URI) que se ve mientras carga.
+# Los archivos van a MEDIA_ROOT/tours/<sha1 de la URL>/<ancho>.<ext>: la misma
+# URL en varios tours se descarga una vez y los nombres nunca cambian de
+# contenido, así que nginx puede servirlos con caché inmutable.
+# Mientras no estén listas las plantillas siguen usando la URL original.
+# imagen_url la escribe un admin pero la descarga la hace el servidor: solo se
+# aceptan http/https y, antes de cada conexión (también tras una redirección),
+# se rechazan los hosts que resuelven a redes privadas, loopback o link-local,
+# para que la URL no sirva para llegar a servicios internos (metadatos de la
+# nube, Redis, la BD...). Como el DNS puede responder otra cosa al conectar
+# (DNS rebinding), también se comprueba la dirección a la que se conectó el
+# socket antes de enviar nada.
+
+CARPETA = 'tours'
+ESQUEMAS = ('http', 'https')
+FORMATOS = (('webp', 'WEBP', 'image/webp'), ('jpg', 'JPEG', 'image/jpeg'))
+ANCHO_PLACEHOLDER = 16
+
+
+class ImagenInvalida(Exception):
+    """La URL no devolvió una imagen utilizable."""
+
+
+def _ajuste(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=_ajuste('TOUR_IMAGEN_WORKERS', 2),
+    thread_name_prefix='imagenes',
+)
+
+
+def clave_url(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:20]
+
+
+def ruta_variante(clave, ancho, extension):
+    return f'{CARPETA}/{clave}/{ancho}.{extension}'
+
+
+def _direccion_interna(ip):
+    direccion = ipaddress.ip_address(ip.split('%', 1)[0])
+    direccion = getattr(direccion, 'ipv4_mapped', None) or direccion  # ::ffff:10.0.0.1
+    return (direccion.is_private or direccion.is_loopback or direccion.is_link_local
+            or direccion.is_multicast or direccion.is_reserved or direccion.is_unspecified)
+
+
+def comprobar_url(url):
+    """Lanza ImagenInvalida si la URL no es http/https o su host resuelve a una dirección interna."""
+    partes = urllib.parse.urlsplit(url)
+    if partes.scheme.lower() not in ESQUEMAS or not partes.hostname:
+        raise ImagenInvalida(f"URL no permitida: {url}")
+    if _ajuste('TOUR_IMAGEN_PERMITIR_PRIVADAS', False):
+        return
+    try:
+        puerto = partes.port or (443 if partes.scheme.lower() == 'https' else 80)
+        direcciones = {info[4][0] for info in socket.getaddrinfo(partes.hostname, puerto, proto=socket.IPPROTO_TCP)}
+    except (OSError, ValueError) as error:
+        raise ImagenInvalida(f"No se pudo resolver {partes.hostname}: {error}") from error
+    if any(_direccion_interna(ip) for ip in direcciones):
+        raise ImagenInvalida(f"{partes.hostname} apunta a una dirección interna")
+
+
+def _conectar(direccion, *args, **kwargs):
+    """socket.create_connection que rechaza el socket si quedó conectado a una dirección interna."""
+    conexion = socket.create_connection(direccion, *args, **kwargs)
+    ip = conexion.getpeername()[0]
+    if not _ajuste('TOUR_IMAGEN_PERMITIR_PRIVADAS', False) and _direccion_interna(ip):
+        conexion.close()
+        raise ImagenInvalida(f"{direccion[0]} se conectó a una dirección interna ({ip})")
+    return conexion
+
+
+class _ConexionHTTP(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _conectar
+
+
+class _ConexionHTTPS(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _conectar  # antes del handshake TLS
+
+
+class _HTTP(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_ConexionHTTP, req)
+
+
+class _HTTPS(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_ConexionHTTPS, req, context=self._context)
+
+
+class _Redirecciones(urllib.request.HTTPRedirectHandler):
+    """Comprueba también el destino de cada redirección."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        comprobar_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_abridor = urllib.request.build_opener(_Redirecciones, _HTTP, _HTTPS)
+
+
+def descargar(url):
+    """Bytes de la imagen (con límite de tamaño y de tiempo). Solo URLs públicas http/https."""
+    comprobar_url(url)
+    limite = _ajuste('TOUR_IMAGEN_MAX_BYTES', 10 * 1024 * 1024)
+    peticion = urllib.request.Request(url, headers={'User-Agent': 'TravelWeb-imagenes/1.0'})
+    try:
+        with _abridor.open(peticion, timeout=_ajuste('TOUR_IMAGEN_TIMEOUT', 10)) as respuesta:
+            tipo = respuesta.headers.get_content_type()
+            if not tipo.startswith('image/'):
+                raise ImagenInvalida(f"Tipo de contenido {tipo}")
+            datos = respuesta.read(limite + 1)
+    except (OSError, ValueError) as error:
+        raise ImagenInvalida(str(error)) from error
+    if len(datos) > limite:
+        raise ImagenInvalida(f"La imagen supera {limite} bytes")
+    return datos
+
+
+def _abrir(datos):
+    try:
+        imagen = Image.open(io.BytesIO(datos))
+        imagen.load()
+    except (OSError, Image.DecompressionBombError) as error:
+        raise ImagenInvalida(str(error)) from error
+    imagen = ImageOps.exif_transpose(imagen)
+    return imagen.convert('RGB')
+
+
+def _codificar(imagen, formato, **opciones):
+    salida = io.BytesIO()
+    imagen.save(salida, formato, **opciones)
+    return salida.getvalue()
+
+
+def generar_variantes(datos, clave):
+    """
+    Guarda las variantes de la imagen y devuelve la descripción que va en
+    Tour.imagen_variantes: {'clave', 'anchos', 'proporcion', 'placeholder'}.
+    No se agranda la imagen: los anchos mayores que el original se omiten.
+    """
+    original = _abrir(datos)
+    calidad = _ajuste('TOUR_IMAGEN_CALIDAD', 80)
+    configurados = _ajuste('TOUR_IMAGEN_ANCHOS', (320, 640, 960))
+    anchos = sorted({a for a in configurados if a < original.width} | {min(original.width, max(configurados))})
+
+    for ancho in anchos:
+        alto = round(original.height * ancho / original.width)
+        variante = original if ancho == original.width else original.resize((ancho, alto), Image.LANCZOS)
+        for extension, formato, _ in FORMATOS:
+            ruta = ruta_variante(clave, ancho, extension)
+            if default_storage.exists(ruta):
+                continue
+            if formato == 'WEBP':
+                contenido = _codificar(variante, formato, quality=calidad, method=4)
+            else:
+                contenido = _codificar(variante, formato, quality=calidad, optimize=True, progressive=True)
+            default_storage.save(ruta, ContentFile(contenido))
+
+    alto = max(1, round(original.height * ANCHO_PLACEHOLDER / original.width))
+    diminuta = original.resize((ANCHO_PLACEHOLDER, alto), Image.BILINEAR).filter(ImageFilter.GaussianBlur(1))
+    placeholder = base64.b64encode(_codificar(diminuta, 'JPEG', quality=40)).decode('ascii')
+    return {
+        'clave': clave,
+        'anchos': anchos,
+        'proporcion': round(original.height / original.width, 4),
+        'placeholder': f'data:image/jpeg;base64,{placeholder}',
+    }
+
+
+def procesar(tour_id, url):
+    """
+    Descarga y procesa la imagen de un tour y guarda el resultado.
+    Solo se actualiza la fila si el tour sigue teniendo esa misma URL.
+    """
+    # Otro tour con la misma URL ya la procesó: se reutilizan sus variantes
+    existente = (
+        Tour.objects.using(PRIMARIA)
+        .filter(imagen_estado='lista', imagen_variantes__url=url)
+        .values_list('imagen_variantes', flat=True)
+        .first()
+    )
+    if existente and all(
+        default_storage.exists(ruta_variante(existente['clave'], ancho, 'jpg')) for ancho in existente['anchos']
+    ):
+        variantes, estado = existente, 'lista'
+    else:
+        try:
+            variantes = {'url': url, **generar_variantes(descargar(url), clave_url(url))}
+            estado = 'lista'
+        except ImagenInvalida as error:
+            logger.warning("No se pudo procesar la imagen del tour %s (%s): %s", tour_id, url, error)
+            variantes, estado = {'url': url}, 'error'
+
+    # update() no dispara señales ni auto_now: se invalidan a mano el catálogo y la tarjeta
+    actualizados = Tour.objects.filter(pk=tour_id, imagen_url=url).update(
+        imagen_estado=estado, imagen_variantes=variantes, fecha_actualizacion=timezone.now()
+    )
+    if actualizados:
+        invalidar_catalogo()
+        invalidar_tarjeta(tour_id)
+    return estado
+
+
+def _trabajo(tour_id, url):
+    try:
+        return procesar(tour_id, url)
+    except Exception:
+        logger.exception("Error procesando la imagen del tour %s", tour_id)
+    finally:
+        # Los hilos del pool viven mucho: no dejar conexiones abiertas entre trabajos
+        connections.close_all()
+
+
+def encolar(tour_id, url):
+    """Programa el procesamiento para cuando se confirme la transacción actual."""
+    transaction.on_commit(lambda: _executor.submit(_trabajo, tour_id, url))
+
+
+def srcset(variantes, extension):
+    return ', '.join(
+        f"{default_storage.url(ruta_variante(variantes['clave'], ancho, extension))} {ancho}w"
+        for ancho in variantes['anchos']
+    )
+
+
+def url_variante(variantes, extension='jpg', ancho=None):
+    """URL de la variante más cercana (por arriba) a 'ancho'; la mayor si no se indica."""
+    anchos = variantes['anchos']
+    elegido = next((a for a in anchos if ancho and a >= ancho), anchos[-1])
+    return default_storage.url(ruta_variante(variantes['clave'], elegido, extension))
@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .models import normalizar_identificador
+
+logger = logging.getLogger(__name__)
+
+# --- Límite de intentos (login, registro y recuperación de contraseña) ---
+# Cada regla de settings.LIMITES_ACCESO tiene una cubeta por IP y otra por
+# identificador (usuario o correo del formulario), con (capacidad, periodo):
+# se admiten 'capacidad' intentos seguidos y la cubeta se rellena a razón de
+# 'capacidad' por 'periodo' segundos. Los contadores viven en la caché
+# compartida, así todos los workers ven los mismos.
+# La caché de Django no tiene compare-and-set, así que la cubeta se aproxima
+# con contadores por ventana fija de 'periodo' segundos que solo se
+# incrementan (INCR atómico, sin carreras entre workers):
+#   consumo = ventana_anterior × (fracción de la anterior aún dentro del periodo) + ventana_actual
+# y el intento pasa si consumo <= capacidad. Los intentos rechazados también
+# cuentan: quien insiste sigue bloqueado.
+# El decorador responde 429 con Retry-After antes de tocar la BD (solo lee el
+# formulario). Si la caché falla se deja pasar: limitar no debe tumbar el login.
+# Las claves usan un hash de la IP/identificador: la caché no guarda datos personales.
+
+METRICAS = ('permitidas', 'rechazadas_ip', 'rechazadas_identificador')
+
+
+def _huella(valor):
+    return hashlib.blake2b(valor.encode(), digest_size=12).hexdigest()
+
+
+def _incrementar(clave, timeout):
+    try:
+        return cache.incr(clave)
+    except ValueError:  # no existe (primera vez o venció)
+        if cache.add(clave, 1, timeout):
+            return 1
+        return cache.incr(clave)  # otro worker la creó entre medio
+
+
+def _consumir(clave, capacidad, periodo, ahora):
+    """Suma un intento a la cubeta; devuelve 0 si cabe o los segundos sugeridos para reintentar."""
+    ventana, fraccion = divmod(ahora / periodo, 1)
+    actual = _incrementar(f'limite:{clave}:{int(ventana)}', timeout=math.ceil(2 * periodo))
+    anterior = cache.get(f'limite:{clave}:{int(ventana) - 1}', 0)
+    consumo = anterior * (1 - fraccion) + actual
+    if consumo <= capacidad:
+        return 0
+    if consumo - 1 <= capacidad:  # solo el primer rechazo de la racha
+        logger.warning("limite_superado %s", clave.rsplit(':', 1)[0])
+    return max(1, math.ceil((1 - fraccion) * periodo))
+
+
+def _contar(regla, metrica):
+    _incrementar(f'limite:metricas:{regla}:{metrica}', timeout=None)
+
+
+def comprobar(regla, ip, identificador=None, ahora=None):
+    """
+    Cuenta un intento de 'regla' para la IP y el identificador (si lo hay).
+    Devuelve 0 si se admite o los segundos que conviene esperar.
+    """
+    ahora = time.time() if ahora is None else ahora
+    limites = settings.LIMITES_ACCESO[regla]
+    cubetas = [('ip', ip)]
+    if identificador and normalizar_identificador(identificador):
+        cubetas.append(('identificador', normalizar_identificador(identificador)))
+    try:
+        for tipo, valor in cubetas:
+            capacidad, periodo = limites[tipo]
+            espera = _consumir(f'{regla}:{tipo}:{_huella(valor)}', capacidad, periodo, ahora)
+            if espera:
+                _contar(regla, f'rechazadas_{tipo}')
+                return espera
+        _contar(regla, 'permitidas')
+    except Exception:
+        logger.warning("Caché no disponible para el límite de intentos", exc_info=True)
+    return 0
+
+
+def ip_cliente(request):
+    """IP del cliente: REMOTE_ADDR o, detrás de un proxy, la cabecera settings.LIMITES_IP_CABECERA."""
+    cabecera = settings.LIMITES_IP_CABECERA
+    valor = (cabecera and request.META.get(cabecera)) or request.META.get('REMOTE_ADDR', '')
+    # En X-Forwarded-For la última entrada es la que vio el proxy de confianza
+    return valor.split(',')[-1].strip()
+
+
+def limitar(regla, campo=None):
+    """
+    Decorador: los POST que superan los límites de 'regla' (por IP y por el campo
+    'campo' del formulario) reciben un 429 sin llegar a la vista.
+    Uso: @limitar('login', campo='username').
+    """
+    def decorador(view):
+        @wraps(view)
+        def envoltura(request, *args, **kwargs):
+            if request.method == 'POST' and settings.LIMITES_ACCESO_ACTIVOS:
+                identificador = request.POST.get(campo) if campo else None
+                espera = comprobar(regla, ip_cliente(request), identificador)
+                if espera:
+                    respuesta = HttpResponse(
+                        'Demasiados intentos. Espera un momento y vuelve a intentarlo.',
+                        status=429, content_type='text/plain; charset=utf-8',
+                    )
+                    respuesta['Retry-After'] = str(espera)
+                    return respuesta
+            return view(request, *args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def metricas():
+    """Intentos admitidos y rechazados por regla desde que se vació la caché (todos los workers)."""
+    claves = {
+        f'limite:metricas:{regla}:{metrica}': (regla, metrica)
+        for regla in settings.LIMITES_ACCESO for metrica in METRICAS
+    }
+    valores = cache.get_many(list(claves))
+    datos = {regla: dict.fromkeys(METRICAS, 0) for regla in settings.LIMITES_ACCESO}
+    for clave, (regla, metrica) in claves.items():
+        datos[regla][metrica] = valores.get(clave, 0)
+    for regla, contadores in datos.items():
+        rechazadas = contadores['rechazadas_ip'] + contadores['rechazadas_identificador']
+        total = rechazadas + contadores['permitidas']
+        contadores['rechazadas'] = rechazadas
+        contadores['porcentaje_rechazadas'] = round(100 * rechazadas / total, 1) if total else 0.0
+    return datos
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from vistas.management.medicion import esperar_puerto, percentil
+from vistas.models import Practica
+
+SERVIDORES = {
+    # WSGI: gunicorn con workers síncronos (lo que corre hoy en el Dockerfile)
+    'wsgi': ['gunicorn', 'nuestroproyecto.wsgi:application'],
+    # ASGI: gunicorn gestionando workers de uvicorn (perfil SERVIDOR=asgi)
+    'asgi': ['gunicorn', 'nuestroproyecto.asgi:application', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+USUARIO_BENCH = 'bench_asgi'
+
+
+async def _leer_respuesta(lector):
+    cabecera = await lector.readuntil(b'\r\n\r\n')
+    lineas = cabecera.decode('latin-1').split('\r\n')
+    estado = int(lineas[0].split()[1])
+    cabeceras = {}
+    for linea in lineas[1:]:
+        if ':' in linea:
+            nombre, valor = linea.split(':', 1)
+            cabeceras[nombre.strip().lower()] = valor.strip()
+    if 'content-length' in cabeceras:
+        await lector.readexactly(int(cabeceras['content-length']))
+    elif cabeceras.get('transfer-encoding') == 'chunked':
+        while True:
+            tamano = int((await lector.readline()).strip(), 16)
+            await lector.readexactly(tamano + 2)
+            if tamano == 0:
+                break
+    else:
+        await lector.read()
+        return estado, True
+    return estado, cabeceras.get('connection', '').lower() == 'close'
+
+
+async def _cliente(puerto, peticion, fin, pausa, resultados):
+    """Un cliente keep-alive: reutiliza la conexión mientras el servidor lo permita."""
+    lector = escritor = None
+    while time.monotonic() < fin:
+        try:
+            if escritor is None:
+                lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+                resultados['conexiones'] += 1
+            inicio = time.perf_counter()
+            escritor.write(peticion)
+            await escritor.drain()
+            estado, cerrar = await asyncio.wait_for(_leer_respuesta(lector), timeout=30)
+            resultados['latencias'].append((time.perf_counter() - inicio) * 1000)
+            if estado >= 400:
+                resultados['errores'] += 1
+            if cerrar:
+                escritor.close()
+                lector = escritor = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            resultados['errores'] += 1
+            if escritor is not None:
+                escritor.close()
+            lector = escritor = None
+        if pausa:
+            await asyncio.sleep(pausa)
+    if escritor is not None:
+        escritor.close()
+
+
+async def _carga(puerto, peticion, clientes, duracion, pausa):
+    resultados = {'latencias': [], 'errores': 0, 'conexiones': 0}
+    fin = time.monotonic() + duracion
+    await asyncio.gather(*(_cliente(puerto, peticion, fin, pausa, resultados) for _ in range(clientes)))
+    return resultados
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara gunicorn WSGI (workers síncronos) contra ASGI (uvicorn) con muchos clientes "
+        "keep-alive concurrentes sobre una página de catálogo"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=500, help="Conexiones keep-alive simultáneas")
+        parser.add_argument('--duracion', type=float, default=15, help="Segundos de carga por servidor")
+        parser.add_argument('--ruta', default='/sobre-nosotros/')
+        parser.add_argument('--workers', type=int, default=3, help="Procesos de gunicorn")
+        parser.add_argument('--puerto', type=int, default=8765)
+        parser.add_argument('--pausa', type=float, default=0.05,
+                            help="Segundos que cada cliente espera entre peticiones (clientes lentos)")
+        parser.add_argument('--servidores', default='wsgi,asgi')
+        parser.add_argument('--con-sesion', action='store_true',
+                            help="Crea un usuario temporal y envía su cookie (para /home/, /tours/, ...)")
+
+    def handle(self, *args, **options):
+        servidores = [s.strip() for s in options['servidores'].split(',') if s.strip()]
+        desconocidos = set(servidores) - set(SERVIDORES)
+        if desconocidos:
+            raise CommandError(f"Servidores desconocidos: {', '.join(sorted(desconocidos))}")
+
+        cookie = ''
+        if options['con_sesion']:
+            usuario, _ = Practica.objects.get_or_create(username=USUARIO_BENCH, defaults={'password': '!'})
+            sesion = import_module(settings.SESSION_ENGINE).SessionStore()
+            sesion['user_id'] = usuario.id
+            sesion['username'] = usuario.username
+            sesion.save()
+            cookie = f"Cookie: {settings.SESSION_COOKIE_NAME}={sesion.session_key}\r\n"
+
+        peticion = (
+            f"GET {options['ruta']} HTTP/1.1\r\nHost: localhost\r\n{cookie}"
+            f"Connection: keep-alive\r\n\r\n"
+        ).encode()
+
+        try:
+            for nombre in servidores:
+                self._medir(nombre, peticion, options)
+        finally:
+            if options['con_sesion']:
+                Practica.objects.filter(username=USUARIO_BENCH).delete()
+
+    def _medir(self, nombre, peticion, options):
+        comando = SERVIDORES[nombre] + [
+            '--bind', f"127.0.0.1:{options['puerto']}", '--workers', str(options['workers']),
+            '--log-level', 'warning',
+        ]
+        proceso = subprocess.Popen(comando, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=sys.stderr)
+        try:
+            esperar_puerto(options['puerto'])
+            inicio = time.monotonic()
+            resultados = asyncio.run(
+                _carga(options['puerto'], peticion, options['clientes'], options['duracion'], options['pausa'])
+            )
+            total = time.monotonic() - inicio
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=30)
+
+        latencias = resultados['latencias']
+        if not latencias:
+            self.stdout.write(f"{nombre}: sin respuestas ({resultados['errores']} errores)")
+            return
+        self.stdout.write(
+            f"{nombre}: clientes={options['clientes']} peticiones={len(latencias)} "
+            f"req/s={len(latencias) / total:.1f} p50={statistics.median(latencias):.1f}ms "
+            f"p99={percentil(latencias, 99):.1f}ms errores={resultados['errores']} "
+            f"conexiones_abiertas={resultados['conexiones']}"
+        )
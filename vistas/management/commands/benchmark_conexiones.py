@@ -0,0 +1,120 @@
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+
+from vistas.management.medicion import esperar_puerto, percentil
+from vistas.models import Practica
+
+USUARIO_BENCH = 'bench_conexiones'
+CALENTAMIENTO = 5
+
+# Variables de entorno con las que se lanza gunicorn en cada modo (ver DATABASES en settings.py)
+MODOS = {
+    'por_peticion': {'DB_POOL': '0', 'DB_CONN_MAX_AGE': '0'},
+    'persistente': {'DB_POOL': '0', 'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': '1'},
+    'pool': {'DB_POOL': '1'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia por petición de un worker de gunicorn con conexiones a la BD abiertas "
+        "en cada petición, persistentes y con pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=500)
+        parser.add_argument('--concurrencia', type=int, default=1, help="Clientes simultáneos")
+        parser.add_argument('--workers', type=int, default=1, help="Procesos de gunicorn")
+        parser.add_argument('--ruta', default='/tours/')
+        parser.add_argument('--puerto', type=int, default=8766)
+        parser.add_argument('--modos', default=','.join(MODOS))
+
+    def handle(self, *args, **options):
+        modos = [m.strip() for m in options['modos'].split(',') if m.strip()]
+        desconocidos = set(modos) - set(MODOS)
+        if desconocidos:
+            raise CommandError(f"Modos desconocidos: {', '.join(sorted(desconocidos))}")
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f"La base configurada es {connection.vendor}: los modos no aplican y las cifras "
+                f"no representan a PostgreSQL."
+            ))
+
+        # Administrador temporal: puede ver cualquier página y el JSON de estado de la BD
+        usuario, _ = Practica.objects.get_or_create(
+            username=USUARIO_BENCH, defaults={'password': '!', 'is_admin': True}
+        )
+        sesion = import_module(settings.SESSION_ENGINE).SessionStore()
+        sesion['user_id'] = usuario.id
+        sesion['username'] = usuario.username
+        sesion.save()
+        cabeceras = {'Host': 'localhost', 'Cookie': f"{settings.SESSION_COOKIE_NAME}={sesion.session_key}"}
+
+        try:
+            for nombre in modos:
+                self._medir(nombre, cabeceras, options)
+        finally:
+            sesion.delete()
+            Practica.objects.filter(username=USUARIO_BENCH).delete()
+
+    def _medir(self, nombre, cabeceras, options):
+        puerto = options['puerto']
+        comando = [
+            'gunicorn', 'nuestroproyecto.wsgi:application', '--bind', f'127.0.0.1:{puerto}',
+            '--workers', str(options['workers']), '--log-level', 'warning',
+        ]
+        proceso = subprocess.Popen(
+            comando, env={**os.environ, **MODOS[nombre]}, stdout=subprocess.DEVNULL, stderr=sys.stderr
+        )
+
+        def pedir(ruta):
+            # Una conexión HTTP nueva por petición: lo que se mide es el costo de la BD en el worker
+            cliente = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+            try:
+                inicio = time.perf_counter()
+                cliente.request('GET', ruta, headers=cabeceras)
+                respuesta = cliente.getresponse()
+                cuerpo = respuesta.read()
+                return (time.perf_counter() - inicio) * 1000, respuesta.status, cuerpo
+            finally:
+                cliente.close()
+
+        try:
+            esperar_puerto(puerto)
+            with ThreadPoolExecutor(max_workers=options['concurrencia']) as pool:
+                list(pool.map(pedir, [options['ruta']] * CALENTAMIENTO))
+                inicio = time.perf_counter()
+                resultados = list(pool.map(pedir, [options['ruta']] * options['peticiones']))
+                total = time.perf_counter() - inicio
+            _, estado, cuerpo = pedir(reverse('estado_bd'))
+            estadisticas = json.loads(cuerpo) if estado == 200 else None
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=30)
+
+        latencias = [ms for ms, _, _ in resultados]
+        errores = sum(1 for _, estado, _ in resultados if estado >= 400)
+        linea = (
+            f"{nombre}: peticiones={len(resultados)} errores={errores} "
+            f"p50={statistics.median(latencias):.2f}ms p99={percentil(latencias, 99):.2f}ms "
+            f"media={statistics.fmean(latencias):.2f}ms req/s={len(resultados) / total:.1f}"
+        )
+        if estadisticas:
+            # Con --workers 1 son las cifras de todo el servidor
+            bd = estadisticas['bases']['default']
+            linea += f" peticiones_worker={estadisticas['peticiones']} aperturas_bd={bd['aperturas']}"
+            if 'pool' in bd:
+                linea += f" pool_size={bd['pool'].get('pool_size')}"
+        self.stdout.write(linea)
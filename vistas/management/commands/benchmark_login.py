@@ -0,0 +1,72 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from vistas import contrasenas
+from vistas.management.medicion import percentil
+from vistas.models import Practica
+
+PREFIJO = 'bench_login_'
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el login (POST a la vista real, en este proceso) con N clientes concurrentes: "
+        "latencia p50/p99 y logins por segundo del worker"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', type=int, default=8, help="Clientes simultáneos")
+        parser.add_argument('--logins', type=int, default=200, help="Total de logins a realizar")
+        parser.add_argument('--usuarios', type=int, default=20, help="Usuarios de prueba a crear")
+        parser.add_argument('--iteraciones', type=int, help="Sobrescribe PASSWORD_HASH_ITERATIONS")
+
+    def handle(self, *args, **options):
+        if options['iteraciones']:
+            settings.PASSWORD_HASH_ITERATIONS = options['iteraciones']
+
+        password = 'clave-benchmark'
+        hash_password = contrasenas.cifrar(password)
+        usuarios = [
+            Practica.objects.create(username=f'{PREFIJO}{i}', password=hash_password, email=f'{PREFIJO}{i}@example.com')
+            for i in range(options['usuarios'])
+        ]
+        url = reverse('login')
+
+        def login(i):
+            cliente = Client(HTTP_HOST='localhost')
+            inicio = time.perf_counter()
+            respuesta = cliente.post(
+                url, {'username': usuarios[i % len(usuarios)].username, 'password': password}, secure=True
+            )
+            duracion = time.perf_counter() - inicio
+            close_old_connections()
+            return duracion, respuesta.status_code == 302
+
+        try:
+            inicio = time.perf_counter()
+            # Todos los logins salen de la misma IP: el límite de intentos los cortaría en 429
+            with override_settings(LIMITES_ACCESO_ACTIVOS=False), \
+                    ThreadPoolExecutor(max_workers=options['concurrencia']) as pool:
+                resultados = list(pool.map(login, range(options['logins'])))
+            total = time.perf_counter() - inicio
+        finally:
+            Practica.objects.filter(username__startswith=PREFIJO).delete()
+
+        latencias = [d * 1000 for d, _ in resultados]
+        exitos = sum(1 for _, ok in resultados if ok)
+        self.stdout.write(
+            f"iteraciones={settings.PASSWORD_HASH_ITERATIONS} "
+            f"cupos={settings.PASSWORD_VERIFY_MAX_PENDIENTES} concurrencia={options['concurrencia']}"
+        )
+        self.stdout.write(
+            f"logins={len(resultados)} exitosos={exitos} "
+            f"p50={statistics.median(latencias):.1f}ms p99={percentil(latencias, 99):.1f}ms "
+            f"throughput={len(resultados) / total:.1f} logins/s por worker"
+        )
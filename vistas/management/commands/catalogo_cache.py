@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from vistas.catalogo import estadisticas_cache, invalidar_catalogo, reiniciar_estadisticas
+
+
+class Command(BaseCommand):
+    help = "Muestra los aciertos/fallos de la caché del catálogo de tours (y opcionalmente la invalida)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invalidar', action='store_true', help="Incrementa la versión del catálogo")
+        parser.add_argument('--reiniciar', action='store_true', help="Pone los contadores en cero")
+
+    def handle(self, *args, **options):
+        if options['invalidar']:
+            invalidar_catalogo()
+            self.stdout.write("Catálogo invalidado.")
+        if options['reiniciar']:
+            reiniciar_estadisticas()
+            self.stdout.write("Contadores reiniciados.")
+
+        stats = estadisticas_cache()
+        if not stats['disponible']:
+            self.stdout.write(self.style.WARNING("La caché no está disponible."))
+            return
+        self.stdout.write(
+            f"version={stats['version']} hits={stats['hits']} misses={stats['misses']} ratio={stats['ratio']}"
+        )
@@ -0,0 +1,61 @@
+import logging
+import signal
+import threading
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from vistas.correos import enviar_pendientes
+
+logger = logging.getLogger('vistas.correos')
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de la bandeja de salida: envía los correos pendientes por lotes sobre una sola "
+        "conexión SMTP, con reintentos y espera exponencial. Sin --una-vez queda en bucle hasta SIGTERM"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, help="Correos reclamados por vuelta (por defecto CORREO_LOTE)")
+        parser.add_argument('--intervalo', type=float, default=5, help="Segundos de espera con la bandeja vacía")
+        parser.add_argument('--una-vez', action='store_true', help="Vaciar lo que esté vencido y terminar")
+
+    def handle(self, *args, **options):
+        if options['lote'] is not None and options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que cero")
+        detener = threading.Event()
+        if not options['una_vez']:
+            # Termina el lote en curso antes de salir (docker stop, systemd)
+            for senal in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(senal, lambda *_: detener.set())
+
+        totales = {'enviados': 0, 'reintentos': 0, 'fallidos': 0}
+        conexion = get_connection()
+        try:
+            while not detener.is_set():
+                close_old_connections()
+                try:
+                    resultado = enviar_pendientes(conexion, options['lote'])
+                except Exception:
+                    if options['una_vez']:
+                        raise
+                    logger.exception("no se pudo enviar el lote; se reintenta en %ss", options['intervalo'])
+                    conexion.close()
+                    detener.wait(options['intervalo'])
+                    continue
+                for clave, valor in resultado.items():
+                    totales[clave] += valor
+                if any(resultado.values()):
+                    continue  # puede quedar más vencido: otro lote por la misma conexión
+                if options['una_vez']:
+                    break
+                # Bandeja vacía: no se deja la conexión ociosa (el servidor la cortaría)
+                conexion.close()
+                detener.wait(options['intervalo'])
+        finally:
+            conexion.close()
+        self.stdout.write(
+            f"enviados={totales['enviados']} reintentos={totales['reintentos']} fallidos={totales['fallidos']}"
+        )
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from vistas.exportacion import FORMATOS, TAMANO_LOTE, generar
+from vistas.models import Reserva
+
+
+class Command(BaseCommand):
+    help = "Exporta todas las reservas (con tour y datos de contacto) en CSV o JSON, en streaming"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv')
+        parser.add_argument('--salida', help="Archivo de destino (por defecto, salida estándar)")
+        parser.add_argument('--estado', choices=[e for e, _ in Reserva.ESTADOS])
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por lote leídas de la base de datos")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que cero")
+
+        reservas = Reserva.objects.all()
+        if options['estado']:
+            reservas = reservas.filter(estado=options['estado'])
+
+        destino = open(options['salida'], 'w', encoding='utf-8', newline='') if options['salida'] else sys.stdout
+        try:
+            for fragmento in generar(options['formato'], reservas, options['lote']):
+                destino.write(fragmento)
+        finally:
+            if destino is not sys.stdout:
+                destino.close()
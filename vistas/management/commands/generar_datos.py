@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from vistas import sinteticos
+from vistas.models import Practica, Tour
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos reproducibles (usuarios, tours, salidas y reservas) para pruebas "
+        f"de carga. Los usuarios entran con la contraseña '{sinteticos.PASSWORD}'"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=1000)
+        parser.add_argument('--tours', type=int, default=200)
+        parser.add_argument('--reservas', type=int, default=20000)
+        parser.add_argument('--semilla', type=int, default=42, help="Misma semilla, mismos datos")
+        parser.add_argument('--lote', type=int, default=1000, help="Filas por bulk_create")
+        parser.add_argument('--reemplazar', action='store_true', help="Borra antes los datos sintéticos existentes")
+        parser.add_argument('--borrar', action='store_true', help="Solo borra los datos sintéticos")
+
+    def handle(self, *args, **options):
+        if min(options['usuarios'], options['tours'], options['reservas']) < 0 or options['lote'] < 1:
+            raise CommandError("Las cantidades no pueden ser negativas y --lote debe ser mayor que cero")
+
+        existentes = (
+            Practica.objects.filter(username__startswith=sinteticos.PREFIJO_USUARIO).exists()
+            or Tour.objects.filter(nombre__contains=sinteticos.MARCA_TOUR).exists()
+        )
+        if options['borrar'] or (existentes and options['reemplazar']):
+            inicio = time.perf_counter()
+            borrados = sinteticos.borrar()
+            self.stdout.write(f"{borrados} filas sintéticas borradas en {time.perf_counter() - inicio:.1f}s")
+            if options['borrar']:
+                return
+        elif existentes:
+            raise CommandError("Ya hay datos sintéticos: use --reemplazar o --borrar")
+
+        inicio = time.perf_counter()
+        totales = sinteticos.generar(
+            options['usuarios'], options['tours'], options['reservas'],
+            semilla=options['semilla'], lote=options['lote'],
+        )
+        self.stdout.write(
+            f"usuarios={totales['usuarios']} tours={totales['tours']} salidas={totales['salidas']} "
+            f"reservas={totales['reservas']} semilla={options['semilla']} en {time.perf_counter() - inicio:.1f}s"
+        )
@@ -0,0 +1,175 @@
+import csv
+import io
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from vistas.catalogo import invalidar_catalogo
+from vistas.condicional import registrar_cambio
+from vistas.forms import ImportarTourForm
+from vistas.models import Tour
+from vistas.router import PRIMARIA
+from vistas.tarjetas import invalidar_tarjetas
+
+CLAVE = ('nombre', 'categoria')
+CAMPOS = ImportarTourForm.Meta.fields
+# Lo que se sobrescribe cuando el tour ya existe (todo menos la clave y el id)
+ACTUALIZABLES = [
+    'descripcion', 'imagen_url', 'duracion', 'precio', 'capacidad_por_salida',
+    'busqueda', 'precio_centavos', 'duracion_dias', 'imagen_estado', 'imagen_variantes',
+    'fecha_actualizacion',
+]
+MAX_ERRORES_MOSTRADOS = 50
+
+
+def leer_filas(archivo, formato):
+    """Genera (número de línea, dict) sin cargar el archivo completo en memoria."""
+    if formato == 'csv':
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            yield lector.line_num, fila
+        return
+    for numero, linea in enumerate(archivo, start=1):
+        if not linea.strip():
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError as error:
+            yield numero, error
+            continue
+        yield numero, fila if isinstance(fila, dict) else ValueError("se esperaba un objeto JSON")
+
+
+def _con_valores_por_defecto(fila):
+    """Las columnas ausentes toman el valor por defecto del modelo (categoría, precio, cupos)."""
+    datos = {campo: valor for campo, valor in fila.items() if campo in CAMPOS and valor is not None}
+    for campo in CAMPOS:
+        if campo not in datos:
+            modelo = Tour._meta.get_field(campo)
+            if modelo.has_default():
+                datos[campo] = modelo.get_default()
+    return datos
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa tours desde CSV o JSON Lines (en streaming, por lotes). Cada fila se valida con "
+        "las reglas de TourForm y se hace upsert por (nombre, categoría): volver a ejecutarlo con "
+        "el mismo archivo no escribe nada"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo, o '-' para leer de la entrada estándar")
+        parser.add_argument('--formato', choices=['csv', 'jsonl'],
+                            help="Por defecto se deduce de la extensión (.csv, .jsonl/.ndjson)")
+        parser.add_argument('--lote', type=int, default=1000, help="Filas por lote (una transacción cada uno)")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que cero")
+        formato = options['formato'] or {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(
+            Path(options['archivo']).suffix.lower())
+        if formato is None:
+            raise CommandError("No se pudo deducir el formato: use --formato csv|jsonl")
+
+        if options['archivo'] == '-':
+            archivo = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            try:
+                archivo = open(options['archivo'], encoding='utf-8-sig', newline='')
+            except OSError as error:
+                raise CommandError(f"No se pudo abrir {options['archivo']}: {error}")
+
+        self.totales = dict.fromkeys(('leidas', 'creadas', 'actualizadas', 'sin_cambios', 'invalidas'), 0)
+        self.pendientes_imagen = 0
+        self.form = ImportarTourForm()
+        self.inicio = time.perf_counter()
+        with archivo:
+            filas = leer_filas(archivo, formato)
+            for numero_lote in itertools.count(1):
+                lote = list(itertools.islice(filas, options['lote']))
+                if not lote:
+                    break
+                self._importar_lote(lote)
+                if numero_lote % 10 == 0:
+                    self.stdout.write(f"  {self.totales['leidas']} filas ({self._ritmo():.0f} filas/s)")
+
+        t = self.totales
+        self.stdout.write(
+            f"leidas={t['leidas']} creadas={t['creadas']} actualizadas={t['actualizadas']} "
+            f"sin_cambios={t['sin_cambios']} invalidas={t['invalidas']} "
+            f"en {time.perf_counter() - self.inicio:.1f}s ({self._ritmo():.0f} filas/s)"
+        )
+        if self.pendientes_imagen:
+            self.stdout.write(f"{self.pendientes_imagen} tours con imagen nueva: ejecute 'manage.py procesar_imagenes'.")
+
+    def _ritmo(self):
+        return self.totales['leidas'] / max(time.perf_counter() - self.inicio, 1e-9)
+
+    def _error(self, numero, mensaje):
+        self.totales['invalidas'] += 1
+        if self.totales['invalidas'] <= MAX_ERRORES_MOSTRADOS:
+            self.stderr.write(f"línea {numero}: {mensaje}")
+        elif self.totales['invalidas'] == MAX_ERRORES_MOSTRADOS + 1:
+            self.stderr.write("(no se muestran más errores)")
+
+    def _validar(self, lote):
+        """Tours (sin guardar) de las filas válidas del lote, uno por clave (gana la última fila)."""
+        tours = {}
+        for numero, fila in lote:
+            self.totales['leidas'] += 1
+            if isinstance(fila, Exception):
+                self._error(numero, fila)
+                continue
+            try:
+                tour = self.form.validar_fila(_con_valores_por_defecto(fila))
+            except ValidationError as error:
+                self._error(numero, '; '.join(
+                    f"{campo}: {' '.join(mensajes)}" for campo, mensajes in error.message_dict.items()
+                ))
+                continue
+            tours[(tour.nombre, tour.categoria)] = tour
+        return tours
+
+    def _importar_lote(self, lote):
+        tours = self._validar(lote)
+        if not tours:
+            return
+        existentes = {
+            (tour.nombre, tour.categoria): tour
+            for tour in Tour.objects.using(PRIMARIA).filter(nombre__in={nombre for nombre, _ in tours})
+        }
+
+        escribir, modificados = [], []
+        for clave, tour in tours.items():
+            actual = existentes.get(clave)
+            if actual is None:
+                self.totales['creadas'] += 1
+            elif all(getattr(actual, campo) == getattr(tour, campo) for campo in CAMPOS):
+                self.totales['sin_cambios'] += 1
+                continue
+            else:
+                self.totales['actualizadas'] += 1
+                modificados.append(actual.pk)
+                # Con la misma URL se conservan las variantes ya generadas
+                tour.imagen_estado, tour.imagen_variantes = actual.imagen_estado, actual.imagen_variantes
+            tour.calcular_derivados()
+            self.pendientes_imagen += tour.imagen_estado == 'pendiente'
+            escribir.append(tour)
+
+        if not escribir:
+            return
+        with transaction.atomic(using=PRIMARIA):
+            Tour.objects.using(PRIMARIA).bulk_create(
+                escribir, update_conflicts=True, unique_fields=list(CLAVE), update_fields=ACTUALIZABLES,
+            )
+        # bulk_create no dispara señales: se invalida la caché a mano
+        invalidar_catalogo()
+        invalidar_tarjetas(modificados)
+        registrar_cambio(Tour)
@@ -0,0 +1,48 @@
+import logging
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from vistas.sesiones import limpiar_expiradas
+
+logger = logging.getLogger('vistas.sesiones')
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las sesiones vencidas de django_session por lotes cortos, sin bloquear la tabla. "
+        "Con --cada N se repite cada N segundos hasta SIGTERM (servicio programado)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help="Sesiones por DELETE")
+        parser.add_argument('--pausa', type=float, default=0.05, help="Segundos de espera entre lotes")
+        parser.add_argument('--cada', type=float, help="Repetir cada estos segundos")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que cero")
+        if options['cada'] is not None and options['cada'] <= 0:
+            raise CommandError("--cada debe ser positivo")
+        detener = threading.Event()
+        if options['cada']:
+            for senal in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(senal, lambda *_: detener.set())
+
+        while not detener.is_set():
+            close_old_connections()
+            inicio = time.perf_counter()
+            try:
+                borradas = limpiar_expiradas(options['lote'], options['pausa'])
+            except Exception:
+                if not options['cada']:
+                    raise
+                logger.exception("falló la limpieza de sesiones")
+            else:
+                self.stdout.write(f"eliminadas={borradas} en {time.perf_counter() - inicio:.1f}s")
+            if not options['cada']:
+                break
+            detener.wait(options['cada'])
@@ -0,0 +1,119 @@
+import json
+import statistics
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from vistas.router import PRIMARIA
+
+OPERACIONES = ('crear', 'leer', 'modificar')
+
+
+class _Contador:
+    """execute_wrapper que cuenta las consultas sin guardarlas (no altera los tiempos)."""
+
+    def __init__(self):
+        self.consultas = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.consultas += 1
+        return execute(sql, params, many, context)
+
+
+def _resumir(tiempos, consultas):
+    microsegundos = [t * 1e6 for t in tiempos]
+    return {
+        'p50_us': round(statistics.median(microsegundos), 1),
+        'p95_us': round(statistics.quantiles(microsegundos, n=20)[-1], 1),
+        'consultas_por_peticion': round(consultas / len(tiempos), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo de la sesión por petición con cada perfil de SESION_PERFIL (db, cache, cookies): "
+        "crear (login), leer (página autenticada) y modificar, con tiempos p50/p95 y consultas a la BD. "
+        "Usa la base de datos y la caché configuradas y borra lo que crea"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=1000)
+        parser.add_argument('--perfiles', default=','.join(settings.SESION_MOTORES),
+                            help="Perfiles separados por comas")
+        parser.add_argument('--salida', help="Archivo JSON con los resultados")
+
+    def handle(self, *args, **options):
+        if options['iteraciones'] < 2:
+            raise CommandError("--iteraciones debe ser al menos 2")
+        perfiles = [perfil.strip() for perfil in options['perfiles'].split(',') if perfil.strip()]
+        desconocidos = set(perfiles) - set(settings.SESION_MOTORES)
+        if desconocidos:
+            raise CommandError(f"Perfiles desconocidos: {', '.join(sorted(desconocidos))}")
+
+        resultado = {
+            'iteraciones': options['iteraciones'],
+            'base_de_datos': settings.DATABASES[PRIMARIA]['ENGINE'],
+            'cache': settings.CACHES['default']['BACKEND'],
+            'perfiles': {perfil: self._medir(perfil, options['iteraciones']) for perfil in perfiles},
+        }
+        for perfil, datos in resultado['perfiles'].items():
+            columnas = '  '.join(
+                f"{op}: p50={datos[op]['p50_us']}µs p95={datos[op]['p95_us']}µs bd={datos[op]['consultas_por_peticion']}"
+                for op in OPERACIONES
+            )
+            self.stdout.write(f"{perfil:<8} {columnas}  cookie={datos['cookie_bytes']}B")
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+    def _medir(self, perfil, iteraciones):
+        SessionStore = import_module(settings.SESION_MOTORES[perfil]).SessionStore
+        contador = _Contador()
+        tiempos = {op: [] for op in OPERACIONES}
+        consultas = dict.fromkeys(OPERACIONES, 0)
+        claves = []
+
+        def medir(op, funcion):
+            antes = contador.consultas
+            inicio = time.perf_counter()
+            valor = funcion()
+            tiempos[op].append(time.perf_counter() - inicio)
+            consultas[op] += contador.consultas - antes
+            return valor
+
+        # Lo mismo que hacen SessionMiddleware y las vistas: cargar al primer acceso,
+        # guardar si cambió y leer session_key para la cookie de la respuesta
+        def crear(i):
+            sesion = SessionStore()
+            sesion['user_id'] = i
+            sesion['username'] = f'usuario{i}'
+            sesion['is_admin'] = False
+            sesion.save()
+            return sesion.session_key
+
+        def leer(clave):
+            return SessionStore(clave).get('user_id')
+
+        def modificar(clave):
+            sesion = SessionStore(clave)
+            sesion['is_admin'] = True
+            sesion.save()
+            return sesion.session_key
+
+        with connections[PRIMARIA].execute_wrapper(contador):
+            try:
+                for i in range(iteraciones):
+                    clave = medir('crear', lambda: crear(i))
+                    claves.append(clave)
+                    medir('leer', lambda: leer(clave))
+                    claves[-1] = medir('modificar', lambda: modificar(clave))
+            finally:
+                for clave in claves:
+                    SessionStore(clave).delete()
+
+        datos = {op: _resumir(tiempos[op], consultas[op]) for op in OPERACIONES}
+        datos['cookie_bytes'] = len(claves[-1]) if claves else 0
+        return datos
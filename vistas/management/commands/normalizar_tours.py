@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from vistas.catalogo import invalidar_catalogo
+from vistas.conversiones import rellenar_tours
+from vistas.models import Tour
+
+
+class Command(BaseCommand):
+    help = "Recalcula por lotes el precio numérico (centavos) y la duración en días de todos los tours"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help="Tours por lote")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que cero")
+        total = rellenar_tours(Tour, options['lote'])
+        # bulk_update no dispara señales: se invalida la caché a mano
+        invalidar_catalogo()
+        sin_precio = Tour.objects.filter(precio_centavos__isnull=True).count()
+        sin_duracion = Tour.objects.filter(duracion_dias__isnull=True).count()
+        self.stdout.write(
+            f"{total} tours procesados ({sin_precio} sin precio reconocible, {sin_duracion} sin duración reconocible)."
+        )
@@ -0,0 +1,46 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from vistas.imagenes import procesar
+from vistas.models import Tour
+from vistas.router import PRIMARIA
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera las variantes locales (WebP/JPEG + placeholder) de las imágenes de tours "
+        "pendientes o sin procesar (p. ej. los creados antes del pipeline)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reintentar', action='store_true', help="Incluye los tours con estado 'error'")
+        parser.add_argument('--todos', action='store_true', help="Revisa también los tours ya procesados")
+        parser.add_argument('--workers', type=int, default=settings.TOUR_IMAGEN_WORKERS)
+
+    def handle(self, *args, **options):
+        tours = Tour.objects.using(PRIMARIA).exclude(imagen_url__isnull=True).exclude(imagen_url='')
+        if not options['todos']:
+            estados = Q(imagen_estado__in=['', 'pendiente'])
+            if options['reintentar']:
+                estados |= Q(imagen_estado='error')
+            tours = tours.filter(estados)
+        trabajos = list(tours.values_list('pk', 'imagen_url'))
+
+        def trabajo(par):
+            try:
+                return procesar(*par)
+            finally:
+                connections.close_all()
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            estados = list(pool.map(trabajo, trabajos))
+        self.stdout.write(
+            f"tours={len(trabajos)} listas={estados.count('lista')} errores={estados.count('error')} "
+            f"en {time.perf_counter() - inicio:.1f}s"
+        )
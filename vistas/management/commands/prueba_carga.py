@@ -0,0 +1,210 @@
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from vistas import sinteticos
+from vistas.management.medicion import esperar_puerto, resumir
+from vistas.models import Practica, Tour
+
+PASOS = ('login_form', 'login', 'home', 'buscar_tours', 'reservas_form', 'reservar')
+RE_CSRF = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class _FlujoFallido(Exception):
+    """Un paso no respondió lo esperado: el usuario virtual empieza un flujo nuevo."""
+
+
+class Navegador:
+    """Un cliente HTTP con sus cookies (sesión y CSRF), como un navegador."""
+
+    def __init__(self, host, puerto):
+        self.conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+        self.cookies = {}
+
+    def pedir(self, metodo, ruta, datos=None):
+        cabeceras = {'Host': 'localhost'}
+        if self.cookies:
+            cabeceras['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        cuerpo = None
+        if datos is not None:
+            cuerpo = urlencode(datos)
+            cabeceras['Content-Type'] = 'application/x-www-form-urlencoded'
+        try:
+            self.conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+            respuesta = self.conexion.getresponse()
+            contenido = respuesta.read()
+        except (OSError, http.client.HTTPException):
+            self.conexion.close()  # la próxima petición abre otra conexión
+            raise
+        for cabecera in respuesta.headers.get_all('Set-Cookie') or []:
+            for nombre, morsel in SimpleCookie(cabecera).items():
+                self.cookies[nombre] = morsel.value
+        return respuesta.status, contenido.decode('utf-8', 'replace')
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga del flujo de reserva (login → inicio → búsqueda de tours → reserva) contra "
+        "un servidor local con usuarios concurrentes. Guarda throughput, latencias p50/p95/p99 y "
+        "tasa de errores por paso en un JSON. Requiere los datos de 'generar_datos'"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', type=int, default=10, help="Usuarios virtuales simultáneos")
+        parser.add_argument('--duracion', type=float, default=30, help="Segundos de medición")
+        parser.add_argument('--calentamiento', type=float, default=3, help="Segundos iniciales que no se miden")
+        parser.add_argument('--url', help="Servidor local ya levantado (p. ej. http://127.0.0.1:8000) con "
+                                          "LIMITES_ACCESO=0; si no se indica se lanza gunicorn")
+        parser.add_argument('--workers', type=int, default=2, help="Procesos de gunicorn (sin --url)")
+        parser.add_argument('--puerto', type=int, default=8767)
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--salida', default='prueba_carga.json', help="Archivo JSON con los resultados")
+
+    def handle(self, *args, **options):
+        if options['concurrencia'] < 1 or options['duracion'] <= 0:
+            raise CommandError("--concurrencia y --duracion deben ser positivos")
+        usuarios = list(
+            Practica.objects.filter(username__startswith=sinteticos.PREFIJO_USUARIO, is_admin=False)
+            .values_list('username', flat=True)[:5000]
+        )
+        tours = list(Tour.objects.filter(nombre__contains=sinteticos.MARCA_TOUR).values_list('pk', flat=True))
+        if not usuarios or not tours:
+            raise CommandError("No hay datos sintéticos: ejecute antes 'manage.py generar_datos'")
+
+        proceso = None
+        if options['url']:
+            partes = urlsplit(options['url'])
+            if partes.hostname not in ('127.0.0.1', 'localhost', '::1'):
+                raise CommandError("La prueba de carga solo se ejecuta contra un servidor local")
+            host, puerto = partes.hostname, partes.port or 80
+        else:
+            host, puerto = '127.0.0.1', options['puerto']
+            proceso = subprocess.Popen(
+                ['gunicorn', 'nuestroproyecto.wsgi:application', '--bind', f'{host}:{puerto}',
+                 '--workers', str(options['workers']), '--log-level', 'warning'],
+                # Todos los usuarios virtuales salen de la misma IP: sin límite de intentos
+                env={**os.environ, 'LIMITES_ACCESO': '0'}, stdout=subprocess.DEVNULL, stderr=sys.stderr,
+            )
+        try:
+            if proceso:
+                esperar_puerto(puerto)
+            resultado = self._ejecutar(host, puerto, usuarios, tours, options)
+        finally:
+            if proceso:
+                proceso.terminate()
+                proceso.wait(timeout=30)
+
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        total = resultado['total']
+        for paso, datos in resultado['pasos'].items():
+            if datos['peticiones']:
+                self.stdout.write(
+                    f"{paso:<15} n={datos['peticiones']:<6} err={datos['tasa_error']:.2%} "
+                    f"p50={datos['p50_ms']}ms p95={datos['p95_ms']}ms p99={datos['p99_ms']}ms"
+                )
+        self.stdout.write(
+            f"total: {total['por_segundo']} req/s, {resultado['flujos']['por_segundo']} flujos/s, "
+            f"errores {total['tasa_error']:.2%}. Resultados en {options['salida']}"
+        )
+
+    def _ejecutar(self, host, puerto, usuarios, tours, options):
+        rutas = {nombre: reverse(nombre) for nombre in ('login', 'home', 'tours', 'reservas')}
+        hoy = timezone.localdate()
+        muestras = defaultdict(list)
+        flujos = {'completos': 0, 'fallidos': 0}
+        candado = threading.Lock()
+        inicio = time.monotonic()
+        inicio_medicion = inicio + options['calentamiento']
+        fin = inicio_medicion + options['duracion']
+
+        def usuario_virtual(numero):
+            rng = random.Random(options['semilla'] * 1000 + numero)
+            navegador = Navegador(host, puerto)
+            propias = defaultdict(list)
+            completos = fallidos = 0
+
+            def paso(nombre, metodo, ruta, datos=None, esperado=200):
+                comienzo = time.monotonic()
+                try:
+                    estado, html = navegador.pedir(metodo, ruta, datos)
+                except (OSError, http.client.HTTPException):
+                    estado, html = None, ''
+                final = time.monotonic()
+                if comienzo >= inicio_medicion and final <= fin:
+                    propias[nombre].append(((final - comienzo) * 1000, estado == esperado))
+                if estado != esperado:
+                    raise _FlujoFallido(nombre)
+                return html
+
+            try:
+                while time.monotonic() < fin:
+                    navegador.cookies.clear()
+                    try:
+                        html = paso('login_form', 'GET', rutas['login'])
+                        token = RE_CSRF.search(html).group(1)
+                        paso('login', 'POST', rutas['login'], {
+                            'csrfmiddlewaretoken': token, 'username': rng.choice(usuarios),
+                            'password': sinteticos.PASSWORD,
+                        }, esperado=302)
+                        paso('home', 'GET', rutas['home'])
+                        termino = rng.choice(sinteticos.DESTINOS + sinteticos.EXPERIENCIAS).split()[-1]
+                        paso('buscar_tours', 'GET', f"{rutas['tours']}?{urlencode({'q': termino})}")
+                        html = paso('reservas_form', 'GET', rutas['reservas'])
+                        token = RE_CSRF.search(html).group(1)
+                        fecha = hoy + timedelta(days=rng.randint(1, sinteticos.DIAS_RESERVA))
+                        paso('reservar', 'POST', rutas['reservas'], {
+                            'csrfmiddlewaretoken': token, 'tour': rng.choice(tours),
+                            'nombre': 'Cliente de carga', 'email': 'carga@example.com',
+                            'telefono': '3000000000', 'fecha': fecha.isoformat(),
+                            'personas': rng.choice([1, 2, 2, 3, 4]),
+                        }, esperado=302)
+                        if inicio_medicion <= time.monotonic() <= fin:
+                            completos += 1
+                    except (_FlujoFallido, AttributeError):
+                        fallidos += 1
+            finally:
+                navegador.cerrar()
+                with candado:
+                    for nombre, lista in propias.items():
+                        muestras[nombre].extend(lista)
+                    flujos['completos'] += completos
+                    flujos['fallidos'] += fallidos
+
+        with ThreadPoolExecutor(max_workers=options['concurrencia']) as pool:
+            list(pool.map(usuario_virtual, range(options['concurrencia'])))
+
+        duracion = options['duracion']
+        todas = [muestra for paso in PASOS for muestra in muestras[paso]]
+        return {
+            'fecha': timezone.now().isoformat(),
+            'configuracion': {
+                'concurrencia': options['concurrencia'], 'duracion_s': duracion,
+                'calentamiento_s': options['calentamiento'], 'semilla': options['semilla'],
+                'servidor': options['url'] or f"gunicorn --workers {options['workers']}",
+                'base_de_datos': settings.DATABASES['default']['ENGINE'],
+                'usuarios_sinteticos': len(usuarios), 'tours_sinteticos': len(tours),
+            },
+            'total': resumir(todas, duracion),
+            'flujos': {**flujos, 'por_segundo': round(flujos['completos'] / duracion, 2)},
+            'pasos': {paso: resumir(muestras[paso], duracion) for paso in PASOS},
+        }
@@ -0,0 +1,27 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from vistas.estadisticas import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el resumen de reservas por día y tour (EstadisticaReservas) a partir de las "
+        "reservas, completo o para un rango de días. Para cargas masivas o si el resumen se desvía"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat, help="Primer día (AAAA-MM-DD)")
+        parser.add_argument('--hasta', type=date.fromisoformat, help="Último día (AAAA-MM-DD), inclusive")
+        parser.add_argument('--lote', type=int, default=1000, help="Filas por inserción")
+
+    def handle(self, *args, **options):
+        if options['desde'] and options['hasta'] and options['desde'] > options['hasta']:
+            raise CommandError("--desde no puede ser posterior a --hasta")
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que cero")
+        inicio = time.perf_counter()
+        filas = reconstruir(options['desde'], options['hasta'], lote=options['lote'])
+        self.stdout.write(f"filas={filas} en {time.perf_counter() - inicio:.1f}s")
@@ -0,0 +1,96 @@
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from vistas.models import Practica
+
+USUARIO_BENCH = 'bench_html'
+
+# (nombre de la URL, requiere sesión)
+PAGINAS = [
+    ('login', False),
+    ('login_admin', False),
+    ('registro', False),
+    ('home', True),
+    ('explorar_toures', True),
+    ('tours', True),
+    ('sobre_nosotros', True),
+    ('reservas', True),
+    ('perfil', True),
+    ('configuracion', True),
+    ('dashboard', True),
+    ('user_register', True),
+    ('reservas_admin', True),
+    ('crear_tour', True),
+]
+
+RE_ESTATICOS = re.compile(r'(?:href|src)="%s([^"?#]+)"' % re.escape(settings.STATIC_URL))
+RE_EN_LINEA = re.compile(r'<(style|script)(?![^>]*\bsrc=)[^>]*>(.*?)</\1>', re.S | re.I)
+
+
+def _tamano_estatico(ruta):
+    encontrado = finders.find(ruta)
+    if encontrado is None and staticfiles_storage.exists(ruta):
+        encontrado = staticfiles_storage.path(ruta)
+    return os.path.getsize(encontrado) if encontrado else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Reporta el tamaño del HTML de cada página (bytes y gzip), el CSS/JS en línea que "
+        "queda y el CSS/JS enlazado, que el navegador guarda en caché entre peticiones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--maximo', type=int,
+                            help="Falla si el HTML sin comprimir de alguna página supera estos bytes")
+
+    def handle(self, *args, **options):
+        usuario, _ = Practica.objects.get_or_create(
+            username=USUARIO_BENCH, defaults={'password': '!', 'is_admin': True}
+        )
+        anonimo = Client(HTTP_HOST='localhost')
+        con_sesion = Client(HTTP_HOST='localhost')
+        sesion = con_sesion.session
+        sesion['user_id'] = usuario.id
+        sesion['username'] = usuario.username
+        sesion.save()
+
+        filas = []
+        try:
+            for nombre, requiere_sesion in PAGINAS:
+                cliente = con_sesion if requiere_sesion else anonimo
+                respuesta = cliente.get(reverse(nombre), secure=True)
+                if respuesta.status_code != 200:
+                    self.stdout.write(self.style.WARNING(f"{nombre}: HTTP {respuesta.status_code}, se omite"))
+                    continue
+                html = respuesta.content
+                texto = html.decode('utf-8', 'replace')
+                en_linea = sum(len(m.group(2).encode()) for m in RE_EN_LINEA.finditer(texto))
+                enlazados = [_tamano_estatico(ruta) for ruta in set(RE_ESTATICOS.findall(texto))]
+                filas.append((nombre, len(html), len(gzip.compress(html)), en_linea,
+                              sum(t for t in enlazados if t)))
+        finally:
+            sesion.delete()
+            Practica.objects.filter(username=USUARIO_BENCH).delete()
+
+        self.stdout.write(f"{'página':<18}{'html':>10}{'gzip':>10}{'en línea':>10}{'enlazado':>10}")
+        for nombre, bytes_html, bytes_gzip, en_linea, enlazado in filas:
+            self.stdout.write(f"{nombre:<18}{bytes_html:>10}{bytes_gzip:>10}{en_linea:>10}{enlazado:>10}")
+        self.stdout.write(
+            f"{'total':<18}{sum(f[1] for f in filas):>10}{sum(f[2] for f in filas):>10}"
+            f"{sum(f[3] for f in filas):>10}{sum(f[4] for f in filas):>10}"
+        )
+        self.stdout.write("'enlazado': bytes de CSS/JS propios que ya no viajan en cada respuesta HTML.")
+
+        if options['maximo']:
+            excedidas = [f[0] for f in filas if f[1] > options['maximo']]
+            if excedidas:
+                raise CommandError(f"Páginas por encima de {options['maximo']} bytes: {', '.join(excedidas)}")
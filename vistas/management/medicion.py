@@ -0,0 +1,46 @@
+import socket
+import statistics
+import time
+
+from django.core.management.base import CommandError
+
+# --- Utilidades compartidas por los comandos de medición ---
+# prueba_carga, benchmark_login, benchmark_asgi y benchmark_conexiones calculan
+# los percentiles igual y esperan al servidor que lanzan de la misma forma.
+
+
+def percentil(valores, p):
+    """Percentil 'p' (0-100) por el método del rango más cercano, sin interpolar."""
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def esperar_puerto(puerto, limite=30):
+    """Espera hasta 'limite' segundos a que algo escuche en 127.0.0.1:'puerto'."""
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        try:
+            with socket.create_connection(('127.0.0.1', puerto), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"El servidor no abrió el puerto {puerto}")
+
+
+def resumir(muestras, duracion):
+    """Estadísticas de una lista de (latencia en ms, correcto): la parte de cada paso del JSON."""
+    latencias = [ms for ms, _ in muestras]
+    errores = sum(1 for _, correcto in muestras if not correcto)
+    if not latencias:
+        return {'peticiones': 0, 'errores': 0, 'tasa_error': 0.0, 'por_segundo': 0.0}
+    return {
+        'peticiones': len(muestras),
+        'errores': errores,
+        'tasa_error': round(errores / len(muestras), 4),
+        'por_segundo': round(len(muestras) / duracion, 2),
+        'p50_ms': round(statistics.median(latencias), 2),
+        'p95_ms': round(percentil(latencias, 95), 2),
+        'p99_ms': round(percentil(latencias, 99), 2),
+        'max_ms': round(max(latencias), 2),
+    }
@@ -0,0 +1,161 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import perfilado, router
+from .autenticacion import UsuarioActual
+
+
+class UsuarioActualMiddleware:
+    """
+    Agrega 'request.usuario' (UsuarioActual) a cada petición.
+    No hace consultas: el Practica se carga solo si una vista lo necesita.
+    Funciona tanto en WSGI como en ASGI (sin pasar por un hilo en las vistas async).
+    Debe ir después de SessionMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.usuario = UsuarioActual(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.usuario = UsuarioActual(request)
+        return await self.get_response(request)
+
+
+class ReplicaMiddleware:
+    """
+    Lecturas con "read-your-writes" sobre la réplica (ver router.py).
+    - Si el navegador trae la cookie 'usar_primaria', la petición lee de la primaria.
+    - Si la petición escribe en la primaria, se deja la cookie por
+      DB_REPLICA_STICKY_SECONDS para que las siguientes también lo hagan.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = router.iniciar_peticion(router.COOKIE_PRIMARIA in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            escribio = router.terminar_peticion(tokens)
+        return self._marcar(response, escribio)
+
+    async def __acall__(self, request):
+        tokens = router.iniciar_peticion(router.COOKIE_PRIMARIA in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            escribio = router.terminar_peticion(tokens)
+        return self._marcar(response, escribio)
+
+    def _marcar(self, response, escribio):
+        if escribio and router.hay_replica():
+            response.set_cookie(
+                router.COOKIE_PRIMARIA, '1',
+                max_age=settings.DB_REPLICA_STICKY_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class PerfiladoMiddleware:
+    """
+    Perfilado por petición (ver perfilado.py): cabecera Server-Timing con consultas,
+    tiempo de base de datos, plantillas, vista y total, y registro de las peticiones
+    más lentas que PERFILADO_LENTA_MS con su SQL.
+    Solo con PERFILADO_PETICIONES; si no, Django lo descarta al arrancar (costo cero).
+    Va arriba de la lista, después de WhiteNoise (los estáticos no se miden).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERFILADO_PETICIONES:
+            raise MiddlewareNotUsed
+        perfilado.activar()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion, token = perfilado.iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            perfilado.terminar(token)
+        return self._marcar(request, response, medicion)
+
+    async def __acall__(self, request):
+        medicion, token = perfilado.iniciar()
+        try:
+            response = await self.get_response(request)
+        finally:
+            perfilado.terminar(token)
+        return self._marcar(request, response, medicion)
+
+    def _marcar(self, request, response, medicion):
+        total_ms = medicion.total_ms()
+        response['Server-Timing'] = perfilado.server_timing(medicion, total_ms)
+        if total_ms >= settings.PERFILADO_LENTA_MS:
+            perfilado.registrar_lenta(medicion, total_ms, request, response)
+        return response
+
+
+class PerfiladoVistaMiddleware:
+    """
+    Complemento de PerfiladoMiddleware: mide la vista (resolución de la URL, la vista
+    y el render de su respuesta), sin el resto de middlewares. Va al final de la lista.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERFILADO_PETICIONES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            self._medir(inicio)
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            self._medir(inicio)
+
+    def _medir(self, inicio):
+        medicion = perfilado.actual()
+        if medicion is not None:
+            medicion.vista_ms = (time.perf_counter() - inicio) * 1000
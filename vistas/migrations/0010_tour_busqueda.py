@@ -0,0 +1,74 @@
+from django.db import migrations, models
+
+from vistas.busqueda import documento_busqueda
+
+
+def rellenar_busqueda(apps, schema_editor):
+    Tour = apps.get_model('vistas', 'Tour')
+    tours = Tour.objects.using(schema_editor.connection.alias)  # no la réplica del router
+    for tour in tours.only('id', 'nombre', 'descripcion').iterator(chunk_size=1000):
+        tours.filter(pk=tour.pk).update(busqueda=documento_busqueda(tour.nombre, tour.descripcion))
+
+
+# Solo PostgreSQL: extensiones, columna tsvector mantenida por trigger e índices GIN.
+SQL_POSTGRES = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE vistas_tour ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION vistas_tour_busqueda_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.busqueda := lower(unaccent(coalesce(NEW.nombre, '') || ' ' || coalesce(NEW.descripcion, '')));
+    NEW.search_vector :=
+        setweight(to_tsvector('spanish', lower(unaccent(coalesce(NEW.nombre, '')))), 'A') ||
+        setweight(to_tsvector('spanish', lower(unaccent(coalesce(NEW.descripcion, '')))), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS vistas_tour_busqueda ON vistas_tour;
+CREATE TRIGGER vistas_tour_busqueda
+    BEFORE INSERT OR UPDATE OF nombre, descripcion, busqueda ON vistas_tour
+    FOR EACH ROW EXECUTE FUNCTION vistas_tour_busqueda_trigger();
+
+UPDATE vistas_tour SET busqueda = busqueda;
+
+CREATE INDEX IF NOT EXISTS vistas_tour_search_vector_gin ON vistas_tour USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS vistas_tour_busqueda_trgm ON vistas_tour USING gin (busqueda gin_trgm_ops);
+"""
+
+SQL_POSTGRES_REVERSA = """
+DROP INDEX IF EXISTS vistas_tour_busqueda_trgm;
+DROP INDEX IF EXISTS vistas_tour_search_vector_gin;
+DROP TRIGGER IF EXISTS vistas_tour_busqueda ON vistas_tour;
+DROP FUNCTION IF EXISTS vistas_tour_busqueda_trigger();
+ALTER TABLE vistas_tour DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+def crear_busqueda_postgres(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SQL_POSTGRES)
+
+
+def eliminar_busqueda_postgres(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SQL_POSTGRES_REVERSA)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0009_reserva'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(rellenar_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_busqueda_postgres, eliminar_busqueda_postgres),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0010_tour_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['-fecha_creacion', '-id'], name='reserva_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', '-fecha_creacion', '-id'], name='reserva_estado_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['tour', '-fecha_creacion', '-id'], name='reserva_tour_creacion_idx'),
+        ),
+    ]
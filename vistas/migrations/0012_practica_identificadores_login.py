@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:57
+
+from django.db import migrations, models
+
+from vistas.autenticacion import rellenar_identificadores as rellenar_identificadores_login
+
+
+def rellenar_identificadores(apps, schema_editor):
+    rellenar_identificadores_login(apps.get_model('vistas', 'Practica'), alias=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0011_reserva_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='practica',
+            name='email_login',
+            field=models.CharField(editable=False, max_length=254, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='practica',
+            name='username_login',
+            field=models.CharField(editable=False, max_length=150, null=True, unique=True),
+        ),
+        migrations.RunPython(rellenar_identificadores, migrations.RunPython.noop),
+    ]
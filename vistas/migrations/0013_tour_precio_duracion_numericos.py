@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:59
+
+from django.db import migrations, models
+
+from vistas.conversiones import rellenar_tours
+
+
+def rellenar_numericos(apps, schema_editor):
+    rellenar_tours(apps.get_model('vistas', 'Tour'), alias=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0012_practica_identificadores_login'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='duracion_dias',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='precio_centavos',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(rellenar_numericos, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['precio_centavos'], name='tour_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['duracion_dias'], name='tour_duracion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['categoria', 'precio_centavos'], name='tour_categoria_precio_idx'),
+        ),
+    ]
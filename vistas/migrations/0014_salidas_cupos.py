@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def crear_salidas_existentes(apps, schema_editor):
+    """
+    Agrupa las reservas existentes (no canceladas) por tour y fecha en Salidas.
+    Si una fecha ya estaba sobrevendida, su capacidad se sube a lo reservado.
+    """
+    alias = schema_editor.connection.alias
+    Reserva = apps.get_model('vistas', 'Reserva')
+    Salida = apps.get_model('vistas', 'Salida')
+    grupos = (
+        Reserva.objects.using(alias).exclude(estado='cancelada')
+        .values('tour_id', 'tour__capacidad_por_salida', 'fecha_inicio')
+        .annotate(personas=Sum('numero_personas'))
+    )
+    for grupo in grupos:
+        salida = Salida.objects.using(alias).create(
+            tour_id=grupo['tour_id'],
+            fecha=grupo['fecha_inicio'],
+            capacidad=max(grupo['tour__capacidad_por_salida'], grupo['personas']),
+            reservados=grupo['personas'],
+        )
+        Reserva.objects.using(alias).filter(tour_id=grupo['tour_id'], fecha_inicio=grupo['fecha_inicio']).update(salida=salida)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0013_tour_precio_duracion_numericos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='capacidad_por_salida',
+            field=models.PositiveIntegerField(default=20),
+        ),
+        migrations.CreateModel(
+            name='Salida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('capacidad', models.PositiveIntegerField()),
+                ('reservados', models.PositiveIntegerField(default=0)),
+                ('tour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='salidas', to='vistas.tour')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='reserva',
+            name='salida',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservas', to='vistas.salida'),
+        ),
+        migrations.AddConstraint(
+            model_name='salida',
+            constraint=models.UniqueConstraint(fields=('tour', 'fecha'), name='salida_tour_fecha_unica'),
+        ),
+        migrations.AddConstraint(
+            model_name='salida',
+            constraint=models.CheckConstraint(condition=models.Q(('reservados__lte', models.F('capacidad'))), name='salida_sin_sobreventa'),
+        ),
+        migrations.RunPython(crear_salidas_existentes, migrations.RunPython.noop),
+    ]
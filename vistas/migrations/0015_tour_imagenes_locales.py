@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0014_salidas_cupos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='imagen_estado',
+            field=models.CharField(blank=True, choices=[('pendiente', 'Pendiente'), ('lista', 'Lista'), ('error', 'Error')], default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='imagen_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
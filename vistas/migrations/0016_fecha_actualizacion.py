@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0015_tour_imagenes_locales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:41
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def renombrar_duplicados(apps, schema_editor):
+    """
+    Antes de la restricción única (nombre, categoría): si ya hay tours repetidos,
+    el más antiguo conserva el nombre y los demás pasan a 'Nombre (#id)'.
+    No se borra nada (los duplicados pueden tener reservas).
+    """
+    tours = apps.get_model('vistas', 'Tour').objects.using(schema_editor.connection.alias)
+    repetidos = (
+        tours.values('nombre', 'categoria')
+        .annotate(total=Count('id')).filter(total__gt=1).order_by()
+    )
+    for grupo in repetidos:
+        ids = list(
+            tours.filter(nombre=grupo['nombre'], categoria=grupo['categoria'])
+            .order_by('id').values_list('id', flat=True)
+        )
+        for tour_id in ids[1:]:
+            nombre = f"{grupo['nombre'][:190]} (#{tour_id})"
+            tours.filter(pk=tour_id).update(nombre=nombre)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0016_fecha_actualizacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(renombrar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tour',
+            constraint=models.UniqueConstraint(fields=('nombre', 'categoria'), name='tour_nombre_categoria_unico'),
+        ),
+    ]
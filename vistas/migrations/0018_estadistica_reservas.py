@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def calcular_estadisticas(apps, schema_editor):
+    """Resumen inicial a partir de las reservas existentes (como 'manage.py reconstruir_estadisticas')."""
+    Reserva = apps.get_model('vistas', 'Reserva')
+    EstadisticaReservas = apps.get_model('vistas', 'EstadisticaReservas')
+    agregados = (
+        Reserva.objects.using(schema_editor.connection.alias).order_by().annotate(dia=TruncDate('fecha_creacion')).values('dia', 'tour_id')
+        .annotate(
+            pendientes=Count('pk', filter=Q(estado='pendiente')),
+            confirmadas=Count('pk', filter=Q(estado='confirmada')),
+            canceladas=Count('pk', filter=Q(estado='cancelada')),
+            personas=Coalesce(Sum('numero_personas', filter=~Q(estado='cancelada')), 0),
+            personas_confirmadas=Coalesce(Sum('numero_personas', filter=Q(estado='confirmada')), 0),
+        )
+    )
+    EstadisticaReservas.objects.using(schema_editor.connection.alias).bulk_create(
+        (EstadisticaReservas(**fila) for fila in agregados.iterator(chunk_size=1000)), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0017_tour_nombre_categoria_unico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaReservas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('pendientes', models.IntegerField(default=0)),
+                ('confirmadas', models.IntegerField(default=0)),
+                ('canceladas', models.IntegerField(default=0)),
+                ('personas', models.IntegerField(default=0)),
+                ('personas_confirmadas', models.IntegerField(default=0)),
+                ('tour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas', to='vistas.tour')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dia', 'tour'), name='estadistica_dia_tour_unica')],
+            },
+        ),
+        migrations.RunPython(calcular_estadisticas, migrations.RunPython.noop),
+    ]
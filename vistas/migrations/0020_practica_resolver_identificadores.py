@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from vistas.autenticacion import rellenar_identificadores as rellenar_identificadores_login
+
+
+def resolver_choques(apps, schema_editor):
+    # Bases que aplicaron la versión anterior de 0012 tienen usuarios con el identificador
+    # en NULL (el login los buscaba además por username exacto): se les da uno libre.
+    rellenar_identificadores_login(apps.get_model('vistas', 'Practica'), alias=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0019_correos_pendientes'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolver_choques, migrations.RunPython.noop),
+    ]
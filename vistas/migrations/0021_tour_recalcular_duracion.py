@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from vistas.conversiones import rellenar_tours
+
+
+def recalcular(apps, schema_editor):
+    # parsear_duracion ahora suma cada número con su unidad ("1 mes y 2 semanas")
+    # y no confunde palabras como "mesa" con meses
+    rellenar_tours(apps.get_model('vistas', 'Tour'), alias=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vistas', '0020_practica_resolver_identificadores'),
+    ]
+
+    operations = [
+        migrations.RunPython(recalcular, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,14 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
+
+from .busqueda import documento_busqueda
+from .conversiones import parsear_duracion, parsear_precio
+
+def normalizar_identificador(valor):
+    """Forma canónica de un username/email para el login (sin espacios, sin mayúsculas)."""
+    return (valor or '').strip().casefold()
+
 
 class Practica(models.Model):
     """
@@ -8,7 +18,7 @@ class Practica(models.Model):
     Campos legado/migración se mantienen como null=True para evitar conflictos.
     """
     username = models.CharField(max_length=150, unique=True)
-    password = models.CharField(max_length=128) # Nota: En prod usar hashlib o AbstractUser
+    password = models.CharField(max_length=128) # Hash PBKDF2 (ver contrasenas.py); filas viejas en texto plano se migran al iniciar sesión
     imagen_url = models.URLField(max_length=500, blank=True, null=True)
     
     # Nuevos campos para registro completo (alineado con diseño)
@@ -17,6 +27,34 @@ class Practica(models.Model):
     email = models.EmailField(max_length=254, blank=True, null=True)
     is_admin = models.BooleanField(default=False) # Distingue admins de usuarios
 
+    # Copias normalizadas (casefold) con índice único: el login busca aquí con
+    # una sola consulta por índice. Se mantienen en save(); clean() rechaza los
+    # valores que chocarían con los de otro usuario.
+    username_login = models.CharField(max_length=150, unique=True, null=True, editable=False)
+    email_login = models.CharField(max_length=254, unique=True, null=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or ({'username', 'email'} & set(update_fields)):
+            self.username_login = normalizar_identificador(self.username) or None
+            self.email_login = normalizar_identificador(self.email) or None
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'username_login', 'email_login'}
+        super().save(*args, **kwargs)
+
+    def clean(self):
+        """Username y email no pueden repetirse ignorando mayúsculas (formularios y admin)."""
+        errores = {}
+        for campo, campo_login, mensaje in (
+            ('username', 'username_login', 'Ese nombre de usuario ya está en uso.'),
+            ('email', 'email_login', 'Ese correo ya está registrado.'),
+        ):
+            normalizado = normalizar_identificador(getattr(self, campo))
+            if normalizado and Practica.objects.filter(**{campo_login: normalizado}).exclude(pk=self.pk).exists():
+                errores[campo] = mensaje
+        if errores:
+            raise ValidationError(errores)
+
     def __str__(self):
         return self.username
 
@@ -36,17 +74,108 @@ class Tour(models.Model):
         choices=[('ciudad', 'Ciudad'), ('lugar', 'Lugar')],
         default='ciudad'
     )
+    # Nombre + descripción normalizados (sin tildes, minúsculas) para la búsqueda.
+    # En PostgreSQL la columna 'search_vector' (fuera del ORM) la mantiene un trigger.
+    busqueda = models.TextField(blank=True, default='', editable=False)
+    # Versiones numéricas de 'precio' y 'duracion' para ordenar/filtrar en la BD
+    precio_centavos = models.BigIntegerField(blank=True, null=True, editable=False) # "7.5M" -> 750000000
+    duracion_dias = models.PositiveSmallIntegerField(blank=True, null=True, editable=False) # "7 días" -> 7
+    # Cupos por fecha de salida; se copia a cada Salida cuando se crea
+    capacidad_por_salida = models.PositiveIntegerField(default=20)
+    # Variantes locales de imagen_url generadas fuera de la petición (ver imagenes.py)
+    imagen_estado = models.CharField(
+        max_length=10, blank=True, default='', editable=False,
+        choices=[('pendiente', 'Pendiente'), ('lista', 'Lista'), ('error', 'Error')],
+    )
+    imagen_variantes = models.JSONField(blank=True, default=dict, editable=False) # {'url', 'clave', 'anchos', ...}
+    # Última escritura (validadores ETag/Last-Modified, ver condicional.py)
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['precio_centavos'], name='tour_precio_idx'),
+            models.Index(fields=['duracion_dias'], name='tour_duracion_idx'),
+            models.Index(fields=['categoria', 'precio_centavos'], name='tour_categoria_precio_idx'),
+        ]
+        constraints = [
+            # Clave natural de import_tours (y de poblar_tours.py)
+            models.UniqueConstraint(fields=['nombre', 'categoria'], name='tour_nombre_categoria_unico'),
+        ]
+
+    def calcular_derivados(self):
+        """Campos calculados a partir de los editables (save() y cargas con bulk_create)."""
+        self.busqueda = documento_busqueda(self.nombre, self.descripcion)
+        self.precio_centavos = parsear_precio(self.precio)
+        self.duracion_dias = parsear_duracion(self.duracion)
+        if not self.imagen_url:
+            self.imagen_estado, self.imagen_variantes = '', {}
+        elif self.imagen_variantes.get('url') != self.imagen_url:
+            # URL nueva: la señal post_save encola el procesamiento
+            self.imagen_estado, self.imagen_variantes = 'pendiente', {}
+
+    def save(self, *args, **kwargs):
+        self.calcular_derivados()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derivados = {'fecha_actualizacion'}
+            if {'nombre', 'descripcion'} & set(update_fields):
+                derivados.add('busqueda')
+            if 'precio' in update_fields:
+                derivados.add('precio_centavos')
+            if 'duracion' in update_fields:
+                derivados.add('duracion_dias')
+            if 'imagen_url' in update_fields:
+                derivados |= {'imagen_estado', 'imagen_variantes'}
+            kwargs['update_fields'] = set(update_fields) | derivados
+        super().save(*args, **kwargs)
+
+    @property
+    def precio_pesos(self):
+        if self.precio_centavos is None:
+            return None
+        return self.precio_centavos // 100
 
     def __str__(self):
         return self.nombre
 
+class Salida(models.Model):
+    """
+    Una salida de un Tour en una fecha concreta, con su cupo.
+    'reservados' se actualiza de forma atómica (ver cupos.py) y la restricción
+    de la base de datos garantiza que nunca supere 'capacidad'.
+    """
+    tour = models.ForeignKey(Tour, on_delete=models.CASCADE, related_name='salidas')
+    fecha = models.DateField()
+    capacidad = models.PositiveIntegerField()
+    reservados = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tour', 'fecha'], name='salida_tour_fecha_unica'),
+            models.CheckConstraint(condition=models.Q(reservados__lte=models.F('capacidad')), name='salida_sin_sobreventa'),
+        ]
+
+    @property
+    def disponibles(self):
+        return self.capacidad - self.reservados
+
+    def __str__(self):
+        return f"{self.tour.nombre} - {self.fecha} ({self.reservados}/{self.capacidad})"
+
 class Reserva(models.Model):
     """
     Modelo para las Reservas de Tours.
     Almacena la información del usuario que hizo la reserva.
     Se vincula con el Tour y el Usuario (Practica).
     """
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('confirmada', 'Confirmada'),
+        ('cancelada', 'Cancelada'),
+    ]
+
     tour = models.ForeignKey(Tour, on_delete=models.CASCADE, related_name='reservas')
+    salida = models.ForeignKey(Salida, on_delete=models.SET_NULL, related_name='reservas', null=True, blank=True)
     usuario = models.ForeignKey(Practica, on_delete=models.CASCADE, related_name='reservas', null=True, blank=True)
     
     # Información del cliente
@@ -61,13 +190,10 @@ class Reserva(models.Model):
     
     # Metadata
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True)
     estado = models.CharField(
         max_length=20,
-        choices=[
-            ('pendiente', 'Pendiente'),
-            ('confirmada', 'Confirmada'),
-            ('cancelada', 'Cancelada'),
-        ],
+        choices=ESTADOS,
         default='pendiente'
     )
     
@@ -76,3 +202,65 @@ class Reserva(models.Model):
     
     class Meta:
         ordering = ['-fecha_creacion']
+        # Índices para la paginación por cursor (fecha_creacion, id) del panel
+        # de reservas, solos o combinados con los filtros por estado y tour.
+        indexes = [
+            models.Index(fields=['-fecha_creacion', '-id'], name='reserva_creacion_idx'),
+            models.Index(fields=['estado', '-fecha_creacion', '-id'], name='reserva_estado_creacion_idx'),
+            models.Index(fields=['tour', '-fecha_creacion', '-id'], name='reserva_tour_creacion_idx'),
+        ]
+
+class EstadisticaReservas(models.Model):
+    """
+    Resumen de reservas por día de creación y tour (ver estadisticas.py).
+    Se mantiene de forma incremental al crear, cambiar o eliminar una Reserva, así
+    el dashboard lee una fila por día y tour en vez de agregar toda la tabla.
+    'manage.py reconstruir_estadisticas' lo recalcula desde las reservas.
+    """
+    dia = models.DateField()
+    tour = models.ForeignKey(Tour, on_delete=models.CASCADE, related_name='estadisticas')
+    pendientes = models.IntegerField(default=0)
+    confirmadas = models.IntegerField(default=0)
+    canceladas = models.IntegerField(default=0)
+    personas = models.IntegerField(default=0) # de las reservas no canceladas
+    personas_confirmadas = models.IntegerField(default=0) # base de los ingresos
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'tour'], name='estadistica_dia_tour_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} - tour {self.tour_id}"
+
+class CorreoPendiente(models.Model):
+    """
+    Bandeja de salida de correos (ver correos.py).
+    Se escribe en la misma transacción que el cambio que lo origina (una reserva,
+    una recuperación de contraseña); 'manage.py enviar_correos' los envía después.
+    """
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    destinatarios = models.JSONField()
+    asunto = models.CharField(max_length=255)
+    cuerpo = models.TextField()
+    remitente = models.CharField(max_length=254)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    intentos = models.IntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True, default='')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # El worker busca los pendientes cuyo próximo intento ya llegó, en orden
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento', 'id'], name='correo_pendiente_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} → {', '.join(self.destinatarios)} ({self.estado})"
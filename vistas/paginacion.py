@@ -0,0 +1,51 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+# --- Paginación por cursor (keyset) ---
+# En lugar de OFFSET (que obliga a la base de datos a recorrer y descartar todas
+# las filas anteriores) se recuerda la última fila mostrada y la siguiente página
+# empieza justo después, usando el índice compuesto (campo, id). Así la página N
+# cuesta lo mismo que la página 1.
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(valor, pk):
+    crudo = f"{valor.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valor, pk = base64.urlsafe_b64decode(cursor + relleno).decode().split('|')
+        return datetime.fromisoformat(valor), int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CursorInvalido(cursor) from e
+
+
+def paginar_keyset(queryset, cursor=None, tamano=50, campo='fecha_creacion'):
+    """
+    Devuelve (filas, cursor_siguiente) ordenando por (campo DESC, id DESC).
+    'cursor_siguiente' es None cuando no hay más páginas.
+    """
+    queryset = queryset.order_by(f'-{campo}', '-id')
+    if cursor:
+        valor, pk = decodificar_cursor(cursor)
+        # 'campo <= valor' acota el rango del índice; el OR solo desempata filas
+        # con el mismo valor, así no se filtra el índice desde el principio.
+        queryset = queryset.filter(
+            Q(**{f'{campo}__lte': valor}) & (Q(**{f'{campo}__lt': valor}) | Q(id__lt=pk))
+        )
+
+    filas = list(queryset[:tamano + 1])
+    siguiente = None
+    if len(filas) > tamano:
+        filas = filas[:tamano]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(getattr(ultima, campo), ultima.pk)
+    return filas, siguiente
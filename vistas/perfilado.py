@@ -0,0 +1,160 @@
+import json
+import logging
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+# --- Perfilado por petición (opt-in con PERFILADO_PETICIONES=1) ---
+# PerfiladoMiddleware abre una Medicion por petición en una ContextVar (llega
+# también a los hilos de sync_to_async) y al final:
+#   - agrega la cabecera Server-Timing: db (tiempo y número de consultas),
+#     tpl (render de plantillas), vista y total;
+#   - si la petición tardó más de PERFILADO_LENTA_MS, escribe en este logger un
+#     JSON con las consultas más lentas y las repetidas (señal de N+1).
+# Las consultas se miden con un execute_wrapper instalado en cada conexión y
+# las plantillas envolviendo Template.render; ambos se instalan solo al activar
+# el perfilado y, fuera de una petición medida, pasan de largo.
+# Se guarda el SQL sin parámetros para no registrar datos personales.
+
+MAX_CONSULTAS_GUARDADAS = 500
+MAX_CONSULTAS_EN_LOG = 5
+MIN_REPETICIONES_EN_LOG = 3
+
+_actual = ContextVar('perfilado_medicion', default=None)
+_activado = False
+
+
+class Medicion:
+    """Lo que se acumula durante una petición (tiempos en milisegundos)."""
+    __slots__ = ('inicio', 'consultas', 'total_consultas', 'db_ms', 'plantillas_ms', 'en_plantilla', 'vista_ms')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = []  # (alias, sql, ms), hasta MAX_CONSULTAS_GUARDADAS
+        self.total_consultas = 0
+        self.db_ms = 0.0
+        self.plantillas_ms = 0.0
+        self.en_plantilla = False
+        self.vista_ms = None
+
+    def total_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+
+def _medir_consulta(execute, sql, params, many, context):
+    medicion = _actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        ms = (time.perf_counter() - inicio) * 1000
+        medicion.total_consultas += 1
+        medicion.db_ms += ms
+        if len(medicion.consultas) < MAX_CONSULTAS_GUARDADAS:
+            medicion.consultas.append((context['connection'].alias, sql, ms))
+
+
+_render_original = Template.render
+
+
+def _render_medido(self, context):
+    medicion = _actual.get()
+    # Solo cuenta la plantilla exterior: los {% include %} ya están dentro de su tiempo
+    if medicion is None or medicion.en_plantilla:
+        return _render_original(self, context)
+    medicion.en_plantilla = True
+    inicio = time.perf_counter()
+    try:
+        return _render_original(self, context)
+    finally:
+        medicion.plantillas_ms += (time.perf_counter() - inicio) * 1000
+        medicion.en_plantilla = False
+
+
+def _instalar(connection):
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir_consulta)
+
+
+def _al_conectar(sender, connection, **kwargs):
+    _instalar(connection)
+
+
+def activar():
+    """Instala los medidores (una sola vez por proceso)."""
+    global _activado
+    if _activado:
+        return
+    _activado = True
+    Template.render = _render_medido
+    connection_created.connect(_al_conectar, dispatch_uid='perfilado')
+    # Las conexiones ya abiertas en este hilo no vuelven a emitir connection_created
+    for connection in connections.all(initialized_only=True):
+        _instalar(connection)
+
+
+def iniciar():
+    """Empieza a medir la petición actual; devuelve (medicion, token para terminar())."""
+    medicion = Medicion()
+    return medicion, _actual.set(medicion)
+
+
+def terminar(token):
+    _actual.reset(token)
+
+
+def actual():
+    """Medicion de la petición en curso, o None si no se está perfilando."""
+    return _actual.get()
+
+
+def server_timing(medicion, total_ms):
+    """Valor de la cabecera Server-Timing."""
+    partes = [
+        f'db;dur={medicion.db_ms:.1f};desc="{medicion.total_consultas} consultas"',
+        f'tpl;dur={medicion.plantillas_ms:.1f};desc="plantillas"',
+    ]
+    if medicion.vista_ms is not None:
+        partes.append(f'vista;dur={medicion.vista_ms:.1f};desc="vista"')
+    partes.append(f'total;dur={total_ms:.1f};desc="total"')
+    return ', '.join(partes)
+
+
+def resumen(medicion, total_ms, request, response):
+    """Datos del registro de petición lenta (serializables a JSON)."""
+    repetidas = defaultdict(lambda: [0, 0.0])
+    for _, sql, ms in medicion.consultas:
+        repetidas[sql][0] += 1
+        repetidas[sql][1] += ms
+    lentas = sorted(medicion.consultas, key=lambda consulta: consulta[2], reverse=True)[:MAX_CONSULTAS_EN_LOG]
+    return {
+        'metodo': request.method,
+        'ruta': request.path,
+        'estado': response.status_code,
+        'total_ms': round(total_ms, 1),
+        'vista_ms': None if medicion.vista_ms is None else round(medicion.vista_ms, 1),
+        'db_ms': round(medicion.db_ms, 1),
+        'consultas': medicion.total_consultas,
+        'plantillas_ms': round(medicion.plantillas_ms, 1),
+        'consultas_lentas': [
+            {'alias': alias, 'ms': round(ms, 2), 'sql': sql} for alias, sql, ms in lentas
+        ],
+        'consultas_repetidas': [
+            {'veces': veces, 'ms': round(ms, 2), 'sql': sql}
+            for sql, (veces, ms) in sorted(repetidas.items(), key=lambda item: item[1][0], reverse=True)
+            if veces >= MIN_REPETICIONES_EN_LOG
+        ][:MAX_CONSULTAS_EN_LOG],
+    }
+
+
+def registrar_lenta(medicion, total_ms, request, response):
+    datos = resumen(medicion, total_ms, request, response)
+    logger.warning("peticion_lenta %s", json.dumps(datos, ensure_ascii=False), extra={'perfilado': datos})
@@ -0,0 +1,70 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# --- Réplica de lectura ---
+# Las lecturas de los modelos de settings.DATABASE_REPLICA_MODELOS (catálogo y
+# listados) van al alias 'replica'; todas las escrituras van a 'default'.
+# Quien acaba de escribir (reservar, registrarse, editar un tour) queda "fijado"
+# a la primaria durante DB_REPLICA_STICKY_SECONDS para leer lo que escribió
+# aunque la réplica vaya atrasada: el middleware ReplicaMiddleware deja una
+# cookie y, mientras exista, todas las lecturas de ese navegador van a la primaria.
+
+PRIMARIA = 'default'
+REPLICA = 'replica'
+COOKIE_PRIMARIA = 'usar_primaria'
+
+# Estado de la petición actual (ContextVar: funciona igual en hilos y en vistas async)
+_fijado = ContextVar('replica_fijado', default=False)
+_escribio = ContextVar('replica_escribio', default=False)
+
+
+def hay_replica():
+    return REPLICA in settings.DATABASES
+
+
+def alias_lectura():
+    """Alias desde el que debe leer la petición actual."""
+    if hay_replica() and not _fijado.get():
+        return REPLICA
+    return PRIMARIA
+
+
+def iniciar_peticion(fijado):
+    """Reinicia el estado al comienzo de una petición. Devuelve los tokens para restaurarlo."""
+    return _fijado.set(fijado), _escribio.set(False)
+
+
+def terminar_peticion(tokens):
+    """Devuelve True si la petición escribió en la primaria y restaura el estado anterior."""
+    escribio = _escribio.get()
+    _fijado.reset(tokens[0])
+    _escribio.reset(tokens[1])
+    return escribio
+
+
+class RouterReplica:
+    """Router de base de datos: lecturas del catálogo a la réplica, escrituras a la primaria."""
+
+    def _replicado(self, model):
+        return model._meta.label_lower in getattr(settings, 'DATABASE_REPLICA_MODELOS', ())
+
+    def db_for_read(self, model, **hints):
+        if self._replicado(model):
+            return alias_lectura()
+        return PRIMARIA
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == 'vistas':
+            # A partir de aquí esta petición (y las siguientes, vía cookie) lee de la primaria
+            _fijado.set(True)
+            _escribio.set(True)
+        return PRIMARIA
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaria y réplica tienen los mismos datos: se pueden relacionar objetos de ambas
+        return {obj1._state.db, obj2._state.db} <= {PRIMARIA, REPLICA}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación, nunca por migraciones
+        return db == PRIMARIA
@@ -0,0 +1,31 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+from .router import PRIMARIA
+
+# --- Mantenimiento de django_session ---
+# Con SESION_PERFIL=db o cache cada inicio de sesión deja una fila que nadie
+# borra al vencer. limpiar_expiradas() las elimina por lotes: lee hasta 'lote'
+# claves vencidas por el índice de expire_date y las borra con un DELETE corto
+# (autocommit, sin transacción que abarque la tabla entera como el DELETE único
+# de 'clearsessions'), con una pausa opcional entre lotes para no competir con
+# el tráfico. Lo programa 'manage.py limpiar_sesiones --cada N'.
+
+
+def limpiar_expiradas(lote=1000, pausa=0, ahora=None):
+    """Borra las sesiones vencidas antes de 'ahora' en lotes de 'lote'. Devuelve cuántas borró."""
+    ahora = ahora or timezone.now()
+    vencidas = Session.objects.using(PRIMARIA).filter(expire_date__lt=ahora)
+    total = 0
+    while True:
+        claves = list(vencidas.order_by('expire_date').values_list('session_key', flat=True)[:lote])
+        if not claves:
+            return total
+        # expire_date otra vez en el WHERE: una sesión renovada entretanto no se borra
+        total += vencidas.filter(session_key__in=claves).delete()[0]
+        if len(claves) < lote:
+            return total
+        if pausa:
+            time.sleep(pausa)
@@ -0,0 +1,112 @@
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .autenticacion import invalidar_rol
+from .catalogo import invalidar_catalogo
+from .condicional import registrar_cambio
+from . import estadisticas
+from .conexiones import conexion_abierta, peticion_atendida
+from .imagenes import encolar as encolar_imagen
+from .tarjetas import invalidar_tarjeta
+from .cupos import liberar
+from .models import Practica, Reserva, Tour
+from .router import PRIMARIA
+
+
+@receiver(post_save, sender=Tour)
+@receiver(post_delete, sender=Tour)
+def tour_modificado(sender, instance, using, **kwargs):
+    """
+    Cualquier escritura de un Tour (vistas, admin, scripts) invalida el catálogo y sus
+    tarjetas en caché al confirmarse: invalidar antes dejaría que otra petición guardara
+    los datos viejos bajo la versión nueva.
+    """
+    tour_id = instance.pk
+    transaction.on_commit(invalidar_catalogo, using=using)
+    transaction.on_commit(lambda: invalidar_tarjeta(tour_id), using=using)
+
+
+@receiver(post_save, sender=Tour)
+@receiver(post_delete, sender=Tour)
+@receiver(post_save, sender=Reserva)
+@receiver(post_delete, sender=Reserva)
+def pagina_modificada(sender, using, **kwargs):
+    """Las páginas con GET condicional que muestran el modelo cambian su ETag al confirmarse la escritura."""
+    transaction.on_commit(lambda: registrar_cambio(sender), using=using)
+
+
+@receiver(post_save, sender=Tour)
+def tour_imagen(sender, instance, **kwargs):
+    """Una imagen_url nueva se procesa en el pool de imágenes cuando se confirma la transacción."""
+    if instance.imagen_estado == 'pendiente':
+        encolar_imagen(instance.pk, instance.imagen_url)
+
+
+@receiver(post_save, sender=Practica)
+@receiver(post_delete, sender=Practica)
+def practica_modificado(sender, instance, **kwargs):
+    """Un cambio en el usuario (p. ej. is_admin) obliga a releer su rol en la próxima petición."""
+    invalidar_rol(instance.pk)
+
+
+@receiver(post_delete, sender=Reserva)
+def reserva_eliminada(sender, instance, **kwargs):
+    """Una reserva eliminada (que no estaba cancelada) devuelve sus cupos a la salida."""
+    if instance.estado != 'cancelada':
+        liberar(instance.salida_id, instance.numero_personas)
+
+
+# --- Estadísticas de reservas (ver estadisticas.py) ---
+# Cada Reserva recuerda en '_huella' lo que aportó al resumen según la base de
+# datos; al guardarla o eliminarla se resta eso y se suma lo nuevo.
+
+@receiver(post_init, sender=Reserva)
+def reserva_cargada(sender, instance, **kwargs):
+    datos = instance.__dict__
+    if instance.pk is not None and all(campo in datos for campo in estadisticas.CAMPOS_HUELLA):
+        instance._huella = estadisticas.huella(instance)
+    else:
+        instance._huella = None  # nueva, o cargada con only()/defer(): se lee en pre_save
+
+
+@receiver(pre_save, sender=Reserva)
+def reserva_por_guardar(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding or instance._huella is not None:
+        return
+    instance._huella = (
+        Reserva.objects.using(PRIMARIA).filter(pk=instance.pk)
+        .values_list(*estadisticas.CAMPOS_HUELLA).first()
+    )
+
+
+@receiver(post_save, sender=Reserva)
+def reserva_guardada(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Suma la reserva nueva al resumen, o resta su aporte anterior y suma el actual."""
+    if raw:
+        return
+    anterior = None if created else instance._huella
+    nueva = estadisticas.huella(instance)
+    if anterior is not None and update_fields is not None:
+        # Lo que no se guardó sigue como estaba en la base de datos
+        guardados = {Reserva._meta.get_field(campo).attname for campo in update_fields}
+        nueva = tuple(
+            valor if campo in guardados else previo
+            for campo, valor, previo in zip(estadisticas.CAMPOS_HUELLA, nueva, anterior)
+        )
+    if anterior != nueva:
+        estadisticas.registrar([(anterior, nueva)])
+    instance._huella = nueva
+
+
+@receiver(post_delete, sender=Reserva)
+def reserva_eliminada_estadisticas(sender, instance, **kwargs):
+    if instance._huella is not None:
+        estadisticas.registrar([(instance._huella, None)])
+
+
+# Contadores de conexiones por worker (ver conexiones.estadisticas_conexiones)
+connection_created.connect(conexion_abierta, dispatch_uid='vistas_conexion_abierta')
+request_finished.connect(peticion_atendida, dispatch_uid='vistas_peticion_atendida')
@@ -0,0 +1,186 @@
+import itertools
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import contrasenas, estadisticas
+from .catalogo import invalidar_catalogo
+from .models import Practica, Reserva, Salida, Tour
+from .router import PRIMARIA
+
+# --- Datos sintéticos para pruebas de carga ---
+# generar() crea usuarios, tours y reservas con distribuciones parecidas a las
+# de producción. Con la misma semilla el resultado es el mismo (salvo los ids):
+#   - tours: 60 % ciudades; precios log-normales alrededor de 3M; duraciones de
+#     1 a 14 días sesgadas hacia viajes cortos; cupos de 10 a 40 por salida;
+#   - reservas: pocos tours concentran la demanda (pesos tipo Zipf), más
+#     salidas en fin de semana, grupos de 1 a 8 personas (sobre todo 2) y
+#     creadas a lo largo del último año; ninguna salida supera su capacidad
+#     (las canceladas no ocupan cupo, como con cupos.liberar).
+# Los usuarios se reconocen por el prefijo PREFIJO_USUARIO y los tours por
+# MARCA_TOUR, así que borrar() no toca datos reales.
+
+PREFIJO_USUARIO = 'sint_'
+MARCA_TOUR = ' · sintético '
+PASSWORD = 'clave-sintetica'
+
+NOMBRES = ['María', 'José', 'Luisa', 'Andrés', 'Camila', 'Juan', 'Valentina', 'Carlos', 'Daniela', 'Santiago',
+           'Laura', 'Felipe', 'Sofía', 'Mateo', 'Isabella', 'Diego', 'Mariana', 'Sebastián', 'Paula', 'Alejandro']
+APELLIDOS = ['Rodríguez', 'Gómez', 'González', 'Martínez', 'García', 'López', 'Hernández', 'Sánchez', 'Ramírez',
+             'Pérez', 'Díaz', 'Torres', 'Moreno', 'Rojas', 'Vargas', 'Castro', 'Ortiz', 'Ruiz', 'Jiménez', 'Mendoza']
+DESTINOS = ['Cartagena', 'Santa Marta', 'Medellín', 'Bogotá', 'Cali', 'San Andrés', 'Guatapé', 'Villa de Leyva',
+            'Salento', 'Barichara', 'Leticia', 'Tayrona', 'La Guajira', 'Mompox', 'Popayán', 'Capurganá',
+            'Nuquí', 'Caño Cristales', 'Desierto de la Tatacoa', 'Ciudad Perdida']
+EXPERIENCIAS = ['Recorrido histórico', 'Ruta gastronómica', 'Aventura en la naturaleza', 'Playas y sol',
+                'Avistamiento de aves', 'Senderismo', 'Cultura y museos', 'Ruta del café', 'Buceo',
+                'Fotografía', 'Escapada romántica', 'Viaje en familia']
+GRUPOS = [(1, 30), (2, 40), (3, 10), (4, 12), (5, 4), (6, 2), (8, 2)]
+ESTADOS = [('confirmada', 60), ('pendiente', 25), ('cancelada', 15)]
+DIAS_RESERVA = 180  # salidas entre mañana y este número de días
+DIAS_HISTORIA = 365  # fecha_creacion dentro del último año
+
+
+def _elegir(rng, opciones):
+    valores, pesos = zip(*opciones)
+    return rng.choices(valores, weights=pesos)[0]
+
+
+def _precio(rng):
+    millones = min(max(rng.lognormvariate(1.1, 0.5), 0.5), 30)
+    return f"{round(millones, 1)}M"
+
+
+def _usuarios(rng, cantidad, hash_password):
+    for i in range(cantidad):
+        nombre, apellido = rng.choice(NOMBRES), rng.choice(APELLIDOS)
+        username = f"{PREFIJO_USUARIO}{i:06d}"
+        yield Practica(
+            username=username, password=hash_password, nombre=nombre, apellido=apellido,
+            email=f"{username}@example.com", is_admin=rng.random() < 0.01,
+            username_login=username, email_login=f"{username}@example.com",
+        )
+
+
+def _tours(rng, cantidad):
+    for i in range(cantidad):
+        destino, experiencia = rng.choice(DESTINOS), rng.choice(EXPERIENCIAS)
+        dias = min(max(round(rng.triangular(1, 14, 3)), 1), 14)
+        tour = Tour(
+            nombre=f"{experiencia} en {destino}{MARCA_TOUR}{i}",
+            descripcion=f"{experiencia} por {destino} durante {dias} días con guía local.",
+            duracion=f"{dias} {'día' if dias == 1 else 'días'}",
+            precio=_precio(rng),
+            categoria='ciudad' if rng.random() < 0.6 else 'lugar',
+            capacidad_por_salida=rng.choice([10, 15, 20, 20, 30, 40]),
+        )
+        tour.calcular_derivados()
+        yield tour
+
+
+def _fecha_salida(rng, hoy):
+    # Los sábados y domingos salen el doble de tours
+    while True:
+        fecha = hoy + timedelta(days=rng.randint(1, DIAS_RESERVA))
+        if fecha.weekday() >= 5 or rng.random() < 0.5:
+            return fecha
+
+
+def _en_lotes(objetos, lote):
+    pendientes = []
+    for objeto in objetos:
+        pendientes.append(objeto)
+        if len(pendientes) == lote:
+            yield pendientes
+            pendientes = []
+    if pendientes:
+        yield pendientes
+
+
+def generar(usuarios, tours, reservas, semilla=42, lote=1000, hoy=None):
+    """
+    Crea los datos sintéticos (en lotes con bulk_create) y devuelve cuántos de
+    cada tipo quedaron: {'usuarios', 'tours', 'salidas', 'reservas'}. Puede haber
+    menos reservas que las pedidas si las salidas se llenan.
+    """
+    rng = random.Random(semilla)
+    hoy = hoy or timezone.localdate()
+    ahora = timezone.now()
+    base = Practica.objects.using(PRIMARIA)
+
+    hash_password = contrasenas.cifrar(PASSWORD)
+    for grupo in _en_lotes(_usuarios(rng, usuarios, hash_password), lote):
+        base.bulk_create(grupo)
+    ids_usuarios = list(
+        base.filter(username__startswith=PREFIJO_USUARIO).order_by('username').values_list('pk', flat=True)
+    )
+
+    for grupo in _en_lotes(_tours(rng, tours), lote):
+        Tour.objects.using(PRIMARIA).bulk_create(grupo)
+    catalogo = list(
+        Tour.objects.using(PRIMARIA).filter(nombre__contains=MARCA_TOUR).order_by('pk')
+        .values_list('pk', 'capacidad_por_salida')
+    )
+    if not catalogo or not ids_usuarios:
+        invalidar_catalogo()
+        return {'usuarios': len(ids_usuarios), 'tours': len(catalogo), 'salidas': 0, 'reservas': 0}
+
+    # Demanda tipo Zipf: el tour en la posición k recibe un peso 1/k^1.1
+    acumulados = list(itertools.accumulate(1 / (k + 1) ** 1.1 for k in range(len(catalogo))))
+    ocupacion = {}  # (tour_id, fecha) -> cupos ocupados
+    planeadas = []
+    for _ in range(reservas):
+        tour_id, capacidad = rng.choices(catalogo, cum_weights=acumulados)[0]
+        fecha = _fecha_salida(rng, hoy)
+        personas = _elegir(rng, GRUPOS)
+        estado = _elegir(rng, ESTADOS)
+        ocupados = ocupacion.get((tour_id, fecha), 0)
+        if estado != 'cancelada':
+            if ocupados + personas > capacidad:
+                continue  # salida llena: el cliente no pudo reservar
+            ocupados += personas
+        ocupacion[(tour_id, fecha)] = ocupados
+        creada = ahora - timedelta(seconds=rng.randint(0, DIAS_HISTORIA * 86400))
+        planeadas.append((tour_id, fecha, personas, estado, rng.choice(ids_usuarios), creada))
+
+    capacidades = dict(catalogo)
+    with transaction.atomic(using=PRIMARIA):
+        salidas = {}
+        for grupo in _en_lotes(ocupacion.items(), lote):
+            creadas = Salida.objects.using(PRIMARIA).bulk_create([
+                Salida(tour_id=tour_id, fecha=fecha, capacidad=capacidades[tour_id], reservados=ocupados)
+                for (tour_id, fecha), ocupados in grupo
+            ])
+            salidas.update({(s.tour_id, s.fecha): s.pk for s in creadas})
+
+        for grupo in _en_lotes(planeadas, lote):
+            objetos = []
+            for tour_id, fecha, personas, estado, usuario_id, creada in grupo:
+                objetos.append(Reserva(
+                    tour_id=tour_id, salida_id=salidas[(tour_id, fecha)], usuario_id=usuario_id,
+                    nombre_cliente=f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}",
+                    email_cliente=f"cliente{rng.randint(1, 10**6)}@example.com",
+                    telefono_cliente=f"3{rng.randint(0, 2)}{rng.randint(0, 99999999):08d}",
+                    fecha_inicio=fecha, numero_personas=personas, estado=estado,
+                ))
+            objetos = Reserva.objects.using(PRIMARIA).bulk_create(objetos)
+            # auto_now_add pisa fecha_creacion al insertar: se reparte en el último año después
+            for reserva, (*_, creada) in zip(objetos, grupo):
+                reserva.fecha_creacion = creada
+            Reserva.objects.using(PRIMARIA).bulk_update(objetos, ['fecha_creacion'])
+
+    # bulk_create no dispara señales: se invalida el catálogo y se recalculan las estadísticas a mano
+    invalidar_catalogo()
+    estadisticas.reconstruir(lote=lote)
+    return {'usuarios': len(ids_usuarios), 'tours': len(catalogo), 'salidas': len(ocupacion),
+            'reservas': len(planeadas)}
+
+
+def borrar():
+    """Elimina los datos sintéticos (las reservas y salidas caen en cascada)."""
+    with transaction.atomic(using=PRIMARIA):
+        tours, _ = Tour.objects.using(PRIMARIA).filter(nombre__contains=MARCA_TOUR).delete()
+        usuarios, _ = Practica.objects.using(PRIMARIA).filter(username__startswith=PREFIJO_USUARIO).delete()
+    invalidar_catalogo()
+    return tours + usuarios
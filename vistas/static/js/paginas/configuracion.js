@@ -0,0 +1,3 @@
+function saveSettings() {
+    alert('Preferencias guardadas correctamente (Simulado)');
+}
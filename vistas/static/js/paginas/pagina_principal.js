@@ -0,0 +1,63 @@
+// Smooth scroll para navegación
+document.querySelectorAll('a[href^="#"]').forEach(enlace => {
+    enlace.addEventListener('click', function (evento) {
+        evento.preventDefault();
+        const idDestino = this.getAttribute('href');
+        const elementoDestino = document.querySelector(idDestino);
+
+        if (elementoDestino) {
+            elementoDestino.scrollIntoView({
+                behavior: 'smooth',
+                block: 'start'
+            });
+        }
+    });
+});
+
+// Función para abrir modal con información del tour
+function abrirModal(nombre, imagen, precio, duracion, descripcion, tipo) {
+    document.getElementById('modalTitulo').textContent = nombre;
+    document.getElementById('modalImagen').src = imagen;
+    document.getElementById('modalPrecio').textContent = precio;
+    document.getElementById('modalDuracion').textContent = duracion || '7 días de viaje';
+    document.getElementById('modalDescripcion').textContent = descripcion || 'Disfruta de una experiencia inolvidable explorando este maravilloso destino. Incluye hospedaje, tours guiados y actividades exclusivas.';
+    document.getElementById('modalTipo').textContent = tipo;
+    document.getElementById('modalTour').classList.add('active');
+    document.body.style.overflow = 'hidden'; // Prevenir scroll cuando modal está abierto
+}
+
+// Función para cerrar modal
+function cerrarModal() {
+    document.getElementById('modalTour').classList.remove('active');
+    document.body.style.overflow = 'auto'; // Restaurar scroll
+}
+
+// Cerrar modal al hacer clic fuera del contenido
+document.getElementById('modalTour').addEventListener('click', function (e) {
+    if (e.target === this) {
+        cerrarModal();
+    }
+});
+
+// Cerrar modal con tecla Escape
+document.addEventListener('keydown', function (e) {
+    if (e.key === 'Escape') {
+        cerrarModal();
+    }
+});
+
+// Agregar event listeners a todas las tarjetas de tour
+document.addEventListener('DOMContentLoaded', function () {
+    const tarjetas = document.querySelectorAll('.tarjeta-tour[data-nombre]');
+    tarjetas.forEach(tarjeta => {
+        tarjeta.addEventListener('click', function () {
+            const nombre = this.getAttribute('data-nombre');
+            const imagen = this.getAttribute('data-imagen');
+            const precio = this.getAttribute('data-precio');
+            const duracion = this.getAttribute('data-duracion');
+            const descripcion = this.getAttribute('data-descripcion');
+            const tipo = this.getAttribute('data-tipo');
+            abrirModal(nombre, imagen, precio, duracion, descripcion, tipo);
+        });
+    });
+});
@@ -0,0 +1,20 @@
+// Mostrar detalles del tour seleccionado
+document.getElementById('tour').addEventListener('change', function () {
+    const selected = this.options[this.selectedIndex];
+    const infoDiv = document.getElementById('infoTour');
+    const detallesP = document.getElementById('detallesTour');
+
+    if (this.value) {
+        const precio = selected.getAttribute('data-precio') || 'No especificado';
+        const duracion = selected.getAttribute('data-duracion') || 'Consultar';
+
+        detallesP.innerHTML = `
+            <strong>Tour:</strong> ${selected.text}<br>
+            <strong>Duración:</strong> ${duracion}<br>
+            <strong>Precio:</strong> ${precio}
+        `;
+        infoDiv.classList.add('activo');
+    } else {
+        infoDiv.classList.remove('activo');
+    }
+});
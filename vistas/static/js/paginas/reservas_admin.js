@@ -0,0 +1,20 @@
+// Acciones en bloque del panel de reservas
+const acciones = document.getElementById('accionesReservas');
+
+if (acciones) {
+    // Marcar / desmarcar todas las reservas de la página
+    document.getElementById('seleccionarTodas').addEventListener('change', function () {
+        acciones.querySelectorAll('input[name="reservas"]').forEach(casilla => {
+            casilla.checked = this.checked;
+        });
+    });
+
+    // Aplicar a todas las reservas del filtro puede tocar muchas más que las visibles
+    acciones.addEventListener('submit', function (evento) {
+        if (this.alcance.value !== 'filtro') return;
+        const accion = evento.submitter ? evento.submitter.value : 'cambiar';
+        if (!confirm(`¿${accion.charAt(0).toUpperCase()}${accion.slice(1)} todas las reservas del filtro actual (no solo esta página)?`)) {
+            evento.preventDefault();
+        }
+    });
+}
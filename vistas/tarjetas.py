@@ -0,0 +1,93 @@
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+logger = logging.getLogger(__name__)
+
+# --- Fragmentos en caché de las tarjetas de tours ---
+# Cada tarjeta renderizada (imagen o imagen por defecto, atributos data-* del
+# modal, precio, duración) se guarda en la caché bajo
+#   tarjeta:<plantilla>:<variante>:<id del tour>:<versión del tour>
+# La versión de cada tour es un valor aleatorio que la señal de Tour cambia al
+# guardarlo o eliminarlo: editar un tour solo invalida sus propias tarjetas.
+# Una página lee todas las versiones y todos los fragmentos en dos get_many(),
+# así que el costo por tarjeta es el de unir cadenas y no crece con consultas.
+
+
+def _timeout():
+    return getattr(settings, 'TARJETAS_CACHE_TIMEOUT', 86400)
+
+
+def _clave_version(tour_id):
+    return f'tarjeta:{tour_id}:version'
+
+
+def invalidar_tarjeta(tour_id):
+    """Nueva versión para las tarjetas de un tour (señales de Tour)."""
+    try:
+        cache.set(_clave_version(tour_id), uuid.uuid4().hex, timeout=None)
+    except Exception:
+        logger.warning("No se pudo invalidar la tarjeta del tour %s", tour_id, exc_info=True)
+
+
+def invalidar_tarjetas(tour_ids):
+    """Para escrituras masivas que no disparan señales (update(), bulk_create, ...)."""
+    try:
+        cache.delete_many([_clave_version(tour_id) for tour_id in tour_ids])
+    except Exception:
+        logger.warning("No se pudieron invalidar las tarjetas de tours", exc_info=True)
+
+
+def _versiones(tour_ids):
+    claves = {tour_id: _clave_version(tour_id) for tour_id in tour_ids}
+    guardadas = cache.get_many(claves.values())
+    versiones, nuevas = {}, {}
+    for tour_id, clave in claves.items():
+        version = guardadas.get(clave)
+        if version is None:
+            version = nuevas[clave] = uuid.uuid4().hex
+        versiones[tour_id] = version
+    if nuevas:
+        cache.set_many(nuevas, timeout=None)
+    return versiones
+
+
+def renderizar_tarjetas(tours, plantilla, **extra):
+    """
+    HTML de las tarjetas de 'tours' con la plantilla parcial indicada.
+    La plantilla recibe 'tour' y los valores de 'extra' (que forman parte de la
+    clave, junto con la plantilla). Si la caché falla se renderiza todo.
+    """
+    tours = list(tours)
+    template = get_template(plantilla)
+
+    def renderizar(tour):
+        return template.render({'tour': tour, **extra})
+
+    variante = ':'.join(f'{k}={v}' for k, v in sorted(extra.items()))
+    try:
+        versiones = _versiones([tour.pk for tour in tours])
+        claves = [f'tarjeta:{plantilla}:{variante}:{tour.pk}:{versiones[tour.pk]}' for tour in tours]
+        fragmentos = cache.get_many(claves)
+    except Exception:
+        logger.warning("Caché de tarjetas no disponible, se renderizan todas", exc_info=True)
+        return mark_safe(''.join(renderizar(tour) for tour in tours))
+
+    nuevos = {}
+    partes = []
+    for tour, clave in zip(tours, claves):
+        html = fragmentos.get(clave)
+        if html is None:
+            html = nuevos[clave] = renderizar(tour)
+        partes.append(html)
+
+    if nuevos:
+        try:
+            cache.set_many(nuevos, _timeout())
+        except Exception:
+            logger.warning("No se pudieron guardar las tarjetas en caché", exc_info=True)
+    return mark_safe(''.join(partes))
@@ -0,0 +1,15 @@
+from django import template
+
+from vistas.avatares import url_avatar
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar(nombre, imagen='', fondo=None, color='fff', tamano=128):
+    """
+    URL de la foto del usuario ('imagen') o, si no tiene, de su avatar con
+    iniciales generado en el servidor. Sin 'fondo' el color sale del nombre.
+    Uso: {% load avatares %} ... <img src="{% avatar u.username imagen=u.imagen_url %}">
+    """
+    return imagen or url_avatar(nombre, fondo, color, tamano)
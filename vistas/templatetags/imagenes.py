@@ -0,0 +1,31 @@
+from django import template
+
+from vistas.imagenes import FORMATOS, srcset, url_variante
+
+register = template.Library()
+
+
+@register.inclusion_tag('imagenes/tour.html')
+def imagen_tour(tour, clase='', defecto='', tamanos='(max-width: 600px) 100vw, 400px'):
+    """
+    <img> de un tour: con srcset WebP/JPEG locales, carga diferida y placeholder
+    desenfocado si las variantes ya están listas; si no, la URL original (o 'defecto').
+    Uso: {% load imagenes %} ... {% imagen_tour tour "imagen-tour" imagen_defecto %}
+    """
+    contexto = {'tour': tour, 'clase': clase, 'tamanos': tamanos, 'src': tour.imagen_url or defecto}
+    variantes = tour.imagen_variantes
+    if tour.imagen_estado == 'lista' and variantes.get('anchos'):
+        contexto.update(
+            fuentes=[(tipo, srcset(variantes, extension)) for extension, _, tipo in FORMATOS],
+            src=url_variante(variantes, 'jpg', 640),
+            placeholder=variantes['placeholder'],
+        )
+    return contexto
+
+
+@register.simple_tag
+def url_imagen_tour(tour, defecto=''):
+    """URL de la mayor variante local (para el modal), o la original si aún no está lista."""
+    if tour.imagen_estado == 'lista' and tour.imagen_variantes.get('anchos'):
+        return url_variante(tour.imagen_variantes, 'jpg')
+    return tour.imagen_url or defecto
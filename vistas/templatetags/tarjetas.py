@@ -0,0 +1,14 @@
+from django import template
+
+from vistas.tarjetas import renderizar_tarjetas
+
+register = template.Library()
+
+
+@register.simple_tag
+def tarjetas(tours, plantilla, **extra):
+    """
+    Renderiza las tarjetas de una lista de tours usando fragmentos en caché.
+    Uso: {% load tarjetas %} ... {% tarjetas tours_lugares "tarjetas/principal.html" tipo="Lugar" %}
+    """
+    return renderizar_tarjetas(tours, plantilla, **extra)
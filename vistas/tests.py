@@ -1,3 +1,1715 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import runpy
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from importlib import import_module
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.core import mail
+from django.core.files.storage import default_storage
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+
+from django.db import connection, connections
+from django.db.models import F, Sum
+from django.shortcuts import render as django_render
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (avatares, catalogo, conexiones, contrasenas, correos, estadisticas, imagenes, limites, router, sesiones,
+               sinteticos, transiciones, views)
+from .autenticacion import buscar_por_identificador, invalidar_rol, rellenar_identificadores
+from .busqueda import buscar_tours, normalizar
+from .conversiones import parsear_duracion, parsear_precio
+from .cupos import SinCupo, obtener_salida, reservar
+from .forms import EditarUsuarioForm, FiltroReservasForm
+from .imagenes import procesar as procesar_imagen
+from .management.medicion import resumir
+from .models import CorreoPendiente, EstadisticaReservas, Practica, Reserva, Salida, Tour
+from .paginacion import CursorInvalido, codificar_cursor, decodificar_cursor, paginar_keyset
+from .tarjetas import renderizar_tarjetas
+
+
+class CatalogoCacheTests(TestCase):
+    """Caché versionada del catálogo: aciertos, invalidación por versión y contadores."""
+
+    def setUp(self):
+        cache.clear()
+        self.guatape = Tour.objects.create(nombre='Guatapé', descripcion='Piedra', duracion='1 día', categoria='lugar')
+        Tour.objects.create(nombre='Cartagena', descripcion='Murallas', duracion='3 días', categoria='ciudad')
+
+    def test_segunda_llamada_sale_de_la_cache(self):
+        with self.assertNumQueries(1):
+            primera = catalogo.obtener_tours('lugar')
+        with self.assertNumQueries(0):
+            segunda = catalogo.obtener_tours('lugar')
+        self.assertEqual([t.nombre for t in segunda], [t.nombre for t in primera])
+        self.assertEqual([t.nombre for t in primera], ['Guatapé'])
+        with self.assertNumQueries(1):  # cada categoría tiene su propia clave
+            self.assertEqual(len(catalogo.obtener_tours()), 2)
+
+    def test_invalidar_cambia_la_version(self):
+        catalogo.obtener_tours()
+        version = catalogo.version_catalogo()
+        catalogo.invalidar_catalogo()
+        self.assertEqual(catalogo.version_catalogo(), version + 1)
+        with self.assertNumQueries(1):
+            catalogo.obtener_tours()
+
+    def test_guardar_un_tour_invalida(self):
+        catalogo.obtener_tours('lugar')
+        self.guatape.nombre = 'Peñol'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.guatape.save()
+        with self.assertNumQueries(1):
+            self.assertEqual([t.nombre for t in catalogo.obtener_tours('lugar')], ['Peñol'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.guatape.delete()
+        self.assertEqual(catalogo.obtener_tours('lugar'), [])
+
+    def test_invalida_al_confirmar(self):
+        catalogo.obtener_tours('lugar')
+        self.guatape.nombre = 'Peñol'
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.guatape.save()
+            # Mientras no se confirma, las lecturas siguen sirviendo la versión anterior
+            with self.assertNumQueries(0):
+                catalogo.obtener_tours('lugar')
+        for callback in callbacks:
+            callback()
+        with self.assertNumQueries(1):
+            catalogo.obtener_tours('lugar')
+
+    def test_contadores(self):
+        catalogo.obtener_tours('ciudad')
+        catalogo.obtener_tours('ciudad')
+        catalogo.obtener_tours('ciudad')
+        estadisticas = catalogo.estadisticas_cache()
+        self.assertEqual((estadisticas['hits'], estadisticas['misses'], estadisticas['ratio']), (2, 1, 0.6667))
+        self.assertTrue(estadisticas['disponible'])
+        catalogo.reiniciar_estadisticas()
+        self.assertEqual(catalogo.estadisticas_cache()['hits'], 0)
+
+    def test_version_async_comparte_claves(self):
+        async_to_sync(catalogo.aobtener_tours)('lugar')
+        with self.assertNumQueries(0):
+            self.assertEqual([t.nombre for t in catalogo.obtener_tours('lugar')], ['Guatapé'])
+        self.assertEqual(catalogo.estadisticas_cache()['hits'], 1)
+
+    def test_categoria_desconocida(self):
+        with self.assertRaises(ValueError):
+            catalogo.obtener_tours('playa')
+
+
+class BusquedaToursTests(TestCase):
+    """Búsqueda de tours (respaldo SQLite; en PostgreSQL se usa tsvector + trigramas)."""
+
+    def setUp(self):
+        self.bogota = Tour.objects.create(
+            nombre='Bogotá', descripcion='Capital con museos y 3 días de recorrido', duracion='3 días', categoria='ciudad'
+        )
+        self.playa = Tour.objects.create(
+            nombre='Santa Marta', descripcion='Playas cerca de Bogotá y la Sierra', duracion='6 días', categoria='lugar'
+        )
+
+    def test_normalizar_quita_tildes(self):
+        self.assertEqual(normalizar('  Días  en BOGOTÁ '), 'dias en bogota')
+
+    def test_documento_se_mantiene_al_guardar(self):
+        self.playa.nombre = 'Tayrona'
+        self.playa.save(update_fields=['nombre'])
+        self.playa.refresh_from_db()
+        self.assertTrue(self.playa.busqueda.startswith('tayrona'))
+
+    def test_busqueda_sin_tildes(self):
+        resultados = list(buscar_tours('dias', Tour.objects.all()))
+        self.assertEqual(resultados, [self.bogota])
+
+    def test_relevancia_prioriza_nombre(self):
+        resultados = list(buscar_tours('Bogota', Tour.objects.all()))
+        self.assertEqual(resultados, [self.bogota, self.playa])
+
+    def test_consulta_vacia_no_filtra(self):
+        self.assertEqual(buscar_tours('  ', Tour.objects.all()).count(), 2)
+
+
+class PaginacionReservasTests(TestCase):
+    """Paginación por cursor (fecha_creacion, id) del panel de reservas."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        admin = Practica.objects.create(username='admin', password='x', is_admin=True)
+        sesion = self.client.session
+        sesion['user_id'] = admin.id
+        sesion.save()
+        self.guatape = Tour.objects.create(nombre='Guatapé', descripcion='Piedra', duracion='1 día', categoria='lugar')
+        self.cartagena = Tour.objects.create(nombre='Cartagena', descripcion='Murallas', duracion='3 días',
+                                             categoria='ciudad')
+        # 7 reservas: las 4 del medio comparten fecha_creacion (empates que desempata el id)
+        base = timezone.make_aware(datetime(2030, 3, 10, 12, 0))
+        fechas = [base + timedelta(hours=2), base, base, base, base, base - timedelta(days=2), base - timedelta(days=5)]
+        self.reservas = []
+        for i, fecha in enumerate(fechas):
+            reserva = Reserva.objects.create(
+                tour=self.guatape if i % 2 else self.cartagena, fecha_inicio=date(2030, 4, 1),
+                nombre_cliente=f'Cliente {i}', email_cliente=f'c{i}@example.com', telefono_cliente='300',
+                estado='confirmada' if i < 4 else 'pendiente',
+            )
+            Reserva.objects.filter(pk=reserva.pk).update(fecha_creacion=fecha)
+            self.reservas.append(reserva.pk)
+
+    def _esperadas(self, reservas):
+        return list(reservas.order_by('-fecha_creacion', '-id').values_list('id', flat=True))
+
+    def test_cursor_ida_y_vuelta(self):
+        momento = timezone.make_aware(datetime(2030, 3, 10, 12, 0, 0, 123456))
+        cursor = codificar_cursor(momento, 42)
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decodificar_cursor(cursor), (momento, 42))
+
+    def test_recorre_todas_las_paginas_con_empates(self):
+        vistos, cursor, paginas = [], None, 0
+        while True:
+            filas, cursor = paginar_keyset(Reserva.objects.all(), cursor, tamano=3)
+            vistos += [fila.pk for fila in filas]
+            paginas += 1
+            if cursor is None:
+                break
+        self.assertEqual(paginas, 3)
+        self.assertEqual(vistos, self._esperadas(Reserva.objects.all()))  # sin repetidos ni huecos
+
+    def test_cursor_invalido(self):
+        for cursor in ('no-es-un-cursor', 'w6k', codificar_cursor(timezone.now(), 1)[:-3]):
+            with self.subTest(cursor=cursor), self.assertRaises(CursorInvalido):
+                paginar_keyset(Reserva.objects.all(), cursor)
+        # La vista vuelve a la primera página conservando los filtros
+        respuesta = self.client.get(reverse('reservas_admin'), {'estado': 'pendiente', 'cursor': 'basura'},
+                                    secure=True)
+        self.assertRedirects(respuesta, f"{reverse('reservas_admin')}?estado=pendiente", fetch_redirect_response=False)
+
+    def test_filtros(self):
+        casos = [
+            ({'estado': 'pendiente'}, Reserva.objects.filter(estado='pendiente')),
+            ({'tour': self.guatape.pk}, Reserva.objects.filter(tour=self.guatape)),
+            ({'desde': '2030-03-10'}, Reserva.objects.filter(fecha_creacion__date__gte=date(2030, 3, 10))),
+            ({'hasta': '2030-03-08'}, Reserva.objects.filter(fecha_creacion__date__lte=date(2030, 3, 8))),
+            ({'estado': 'confirmada', 'tour': self.cartagena.pk},
+             Reserva.objects.filter(estado='confirmada', tour=self.cartagena)),
+        ]
+        for datos, esperadas in casos:
+            with self.subTest(datos=datos):
+                filtros = FiltroReservasForm(datos)
+                self.assertTrue(filtros.is_valid(), filtros.errors)
+                self.assertEqual(self._esperadas(filtros.filtrar(Reserva.objects.all())), self._esperadas(esperadas))
+
+    def test_vista_pagina_con_filtros(self):
+        with mock.patch.object(views, 'RESERVAS_POR_PAGINA', 2):
+            respuesta = self.client.get(reverse('reservas_admin'), {'estado': 'confirmada'}, secure=True)
+            primera = [r.pk for r in respuesta.context['reservas']]
+            siguiente = respuesta.context['url_siguiente']
+            self.assertIn('estado=confirmada', siguiente)
+            respuesta = self.client.get(reverse('reservas_admin') + siguiente, secure=True)
+        segunda = [r.pk for r in respuesta.context['reservas']]
+        self.assertEqual(primera + segunda, self._esperadas(Reserva.objects.filter(estado='confirmada')))
+        self.assertIsNone(respuesta.context['url_siguiente'])
+
+    def test_select_de_tours_solo_lee_id_y_nombre(self):
+        with CaptureQueriesContext(connection) as consultas:
+            filtros = FiltroReservasForm()
+        self.assertEqual(len(consultas), 1)
+        self.assertNotIn('descripcion', consultas[0]['sql'])
+        self.assertEqual(filtros.fields['tour'].choices[1:], [(self.cartagena.pk, 'Cartagena'),
+                                                              (self.guatape.pk, 'Guatapé')])
+
+
+class ConversionesTests(SimpleTestCase):
+    """Textos libres de precio y duración de los tours convertidos a números."""
+
+    PRECIOS = [
+        ('7.5M', 750_000_000),
+        ('7,5M', 750_000_000),
+        ('100k', 10_000_000),
+        ('100 mil', 10_000_000),
+        ('2 millones', 200_000_000),
+        ('4,500', 450_000),
+        ('1.200.000', 120_000_000),
+        ('$1.200.000 COP', 120_000_000),
+        ('350000', 35_000_000),
+        ('12.50', 1250),
+        # Mal formados o sin número
+        ('', None),
+        (None, None),
+        ('gratis', None),
+        ('M', None),
+        ('$', None),
+        ('1.2.3', None),
+        ('7.5.5M', None),
+        ('99999999999999999999999M', None),  # no cabe en BigIntegerField
+    ]
+    DURACIONES = [
+        ('7 días de viaje', 7),
+        ('3 días', 3),
+        ('2 semanas', 14),
+        ('1 mes', 30),
+        ('3 meses', 90),
+        ('1 mes y 2 semanas', 44),
+        ('2 semanas y 3 días', 17),
+        ('4 días en la Mesa de los Santos', 4),  # "mesa" no es una unidad
+        ('10', 10),
+        # Mal formados o sin número
+        ('', None),
+        (None, None),
+        ('medio día', None),
+        ('dos días', None),
+        ('99999 días', None),  # no cabe en PositiveSmallIntegerField
+    ]
+
+    def test_parsear_precio(self):
+        for texto, esperado in self.PRECIOS:
+            with self.subTest(texto=texto):
+                self.assertEqual(parsear_precio(texto), esperado)
+
+    def test_parsear_duracion(self):
+        for texto, esperado in self.DURACIONES:
+            with self.subTest(texto=texto):
+                self.assertEqual(parsear_duracion(texto), esperado)
+
+
+class LoginPorIndiceTests(TestCase):
+    """El login por username/email debe ser una búsqueda por índice incluso con 1M de usuarios."""
+
+    TOTAL_USUARIOS = 1_000_000
+
+    @classmethod
+    def setUpTestData(cls):
+        tabla = Practica._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f"""
+                    INSERT INTO {tabla} (username, password, is_admin, email, username_login, email_login)
+                    SELECT 'Usuario' || n, 'x', false, 'Usuario' || n || '@Ejemplo.com',
+                           'usuario' || n, 'usuario' || n || '@ejemplo.com'
+                    FROM generate_series(1, %s) AS n
+                """, [cls.TOTAL_USUARIOS])
+            else:
+                cursor.execute(f"""
+                    WITH RECURSIVE serie(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM serie WHERE n < %s)
+                    INSERT INTO {tabla} (username, password, is_admin, email, username_login, email_login)
+                    SELECT 'Usuario' || n, 'x', 0, 'Usuario' || n || '@Ejemplo.com',
+                           'usuario' || n, 'usuario' || n || '@ejemplo.com'
+                    FROM serie
+                """, [cls.TOTAL_USUARIOS])
+            cursor.execute(f"ANALYZE {tabla}")
+
+    def assertUsaIndice(self, queryset):
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan)
+            self.assertIn('Index', plan)
+        else:
+            self.assertNotIn(f'SCAN {Practica._meta.db_table}', plan)
+            self.assertIn('USING', plan)
+            self.assertIn('INDEX', plan)
+
+    def test_plan_usa_indice(self):
+        self.assertUsaIndice(Practica.objects.filter(username_login='usuario123456'))
+        self.assertUsaIndice(Practica.objects.filter(email_login='usuario123456@ejemplo.com'))
+
+    def test_busqueda_sin_distinguir_mayusculas(self):
+        por_email = buscar_por_identificador('  USUARIO777@ejemplo.COM ')
+        por_username = buscar_por_identificador('usuario777')
+        self.assertEqual(por_email.pk, por_username.pk)
+        with self.assertRaises(Practica.DoesNotExist):
+            buscar_por_identificador('nadie@ejemplo.com')
+
+    def test_save_mantiene_identificadores(self):
+        usuario = Practica.objects.create(username='  Ana ', password='x', email='Ana@Correo.CO')
+        self.assertEqual((usuario.username_login, usuario.email_login), ('ana', 'ana@correo.co'))
+
+
+class IdentificadoresLoginTests(TestCase):
+    """Identificadores de login sin choques: la migración los resuelve y clean() los rechaza."""
+
+    def test_la_migracion_resuelve_los_choques(self):
+        ana = Practica.objects.create(username='ana', password='x', email='ana@correo.co')
+        otra = Practica.objects.create(username='temporal', password='x')
+        # Dos usuarios que solo se distinguen por mayúsculas (antes del índice normalizado)
+        Practica.objects.filter(pk=otra.pk).update(username='ANA', email='ANA@correo.co',
+                                                   username_login=None, email_login=None)
+        self.assertEqual(rellenar_identificadores(Practica), 1)
+        ana.refresh_from_db()
+        otra.refresh_from_db()
+        self.assertEqual((ana.username, ana.username_login, ana.email_login), ('ana', 'ana', 'ana@correo.co'))
+        self.assertEqual((otra.username, otra.username_login, otra.email, otra.email_login),
+                         (f'ANA-{otra.pk}', f'ana-{otra.pk}', None, None))
+        self.assertEqual(rellenar_identificadores(Practica), 0)
+        # Un login fallido cuesta como mucho una consulta por índice probado
+        with self.assertNumQueries(1), self.assertRaises(Practica.DoesNotExist):
+            buscar_por_identificador('nadie')
+        with self.assertNumQueries(2), self.assertRaises(Practica.DoesNotExist):
+            buscar_por_identificador('nadie@ejemplo.com')
+
+    def test_clean_rechaza_identificadores_repetidos(self):
+        ana = Practica.objects.create(username='ana', password='x', email='ana@correo.co')
+        with self.assertRaises(ValidationError) as error:
+            Practica(username=' ANA ', password='x', email='Ana@Correo.co').full_clean()
+        self.assertEqual(set(error.exception.message_dict), {'username', 'email'})
+        ana.full_clean()  # sus propios valores no chocan
+        form = EditarUsuarioForm({'username': 'Ana'}, instance=Practica.objects.create(username='luis', password='x'))
+        self.assertEqual(form.errors['username'], ['Ese nombre de usuario ya está en uso.'])
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class ContrasenasTests(TestCase):
+    """Login con contraseñas cifradas y con filas antiguas en texto plano."""
+
+    def test_texto_plano_inicia_sesion_y_se_cifra(self):
+        usuario = Practica.objects.create(username='legado', password='clave-vieja')
+        self.assertTrue(contrasenas.es_texto_plano(usuario.password))
+
+        respuesta = self.client.post(reverse('login'), {'username': 'legado', 'password': 'clave-vieja'})
+        self.assertRedirects(respuesta, reverse('home'), fetch_redirect_response=False)
+        usuario.refresh_from_db()
+        self.assertFalse(contrasenas.es_texto_plano(usuario.password))
+        self.assertTrue(usuario.password.startswith('pbkdf2_sha256$1000$'))
+        # Con el hash nuevo el login sigue funcionando y la contraseña mala no entra
+        self.assertTrue(contrasenas.verificar(usuario, 'clave-vieja'))
+        self.assertFalse(contrasenas.verificar(usuario, 'otra'))
+
+    def test_texto_plano_incorrecto_no_se_cifra(self):
+        usuario = Practica.objects.create(username='legado', password='clave-vieja')
+        respuesta = self.client.post(reverse('login'), {'username': 'legado', 'password': 'otra'})
+        self.assertEqual(respuesta.status_code, 200)
+        usuario.refresh_from_db()
+        self.assertEqual(usuario.password, 'clave-vieja')
+
+    def test_sin_cupo_responde_ocupado(self):
+        with mock.patch.object(contrasenas, '_cupos', threading.BoundedSemaphore(1)) as cupos, \
+                override_settings(PASSWORD_VERIFY_TIMEOUT=0.01):
+            cupos.acquire()
+            with self.assertRaises(contrasenas.ServicioOcupado):
+                contrasenas.cifrar('x')
+            cupos.release()
+            self.assertTrue(contrasenas.cifrar('x').startswith('pbkdf2_sha256$'))
+
+
+class ExportacionReservasTests(TestCase):
+    """Exportación de reservas en streaming (vista y comando), con las fórmulas neutralizadas en el CSV."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        admin = Practica.objects.create(username='admin', password='x', is_admin=True)
+        sesion = self.client.session
+        sesion['user_id'] = admin.id
+        sesion.save()
+        tour = Tour.objects.create(nombre='Guatapé', descripcion='Piedra', duracion='1 día', categoria='lugar')
+        datos = dict(tour=tour, fecha_inicio=date(2030, 1, 1), telefono_cliente='300')
+        self.ana = Reserva.objects.create(nombre_cliente='Ana Pérez', email_cliente='ana@example.com',
+                                          estado='confirmada', **datos)
+        self.malicioso = Reserva.objects.create(nombre_cliente='=HYPERLINK("http://x.example","clic")',
+                                                email_cliente='@x.example', observaciones='-1+1', **datos)
+
+    def _exportar(self, **parametros):
+        respuesta = self.client.get(reverse('exportar_reservas'), parametros, secure=True)
+        self.assertTrue(respuesta.streaming)
+        return respuesta, b''.join(respuesta.streaming_content).decode('utf-8')
+
+    def test_csv_cabeceras_y_filtros(self):
+        respuesta, contenido = self._exportar(formato='csv')
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(respuesta['Content-Disposition'], 'attachment; filename="reservas.csv"')
+        self.assertTrue(contenido.startswith('\ufeffID,Fecha Reserva,Estado,Tour'))
+        filas = list(csv.reader(io.StringIO(contenido.lstrip('\ufeff'))))
+        self.assertEqual([fila[0] for fila in filas[1:]], [str(self.ana.pk), str(self.malicioso.pk)])
+        self.assertEqual(filas[1][7:9], ['Ana Pérez', 'ana@example.com'])
+
+        _, contenido = self._exportar(formato='csv', estado='confirmada')
+        self.assertEqual(len(list(csv.reader(io.StringIO(contenido)))), 2)
+
+    def test_csv_neutraliza_formulas(self):
+        _, contenido = self._exportar(formato='csv')
+        fila = list(csv.reader(io.StringIO(contenido)))[2]
+        self.assertEqual(fila[7], '\'=HYPERLINK("http://x.example","clic")')
+        self.assertEqual((fila[8], fila[11]), ("'@x.example", "'-1+1"))
+
+    def test_json(self):
+        respuesta, contenido = self._exportar(formato='json')
+        self.assertEqual(respuesta['Content-Type'], 'application/json')
+        datos = json.loads(contenido)
+        self.assertEqual([d['id'] for d in datos], [self.ana.pk, self.malicioso.pk])
+        self.assertEqual(datos[0]['tour_nombre'], 'Guatapé')
+        self.assertEqual(datos[1]['nombre_cliente'], '=HYPERLINK("http://x.example","clic")')  # JSON no se toca
+
+    def test_comando(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        destino = f'{directorio}/reservas.json'
+        call_command('exportar_reservas', '--formato', 'json', '--estado', 'confirmada', '--lote', '1',
+                     '--salida', destino)
+        with open(destino, encoding='utf-8') as archivo:
+            self.assertEqual([d['id'] for d in json.load(archivo)], [self.ana.pk])
+
+
+class RolEnSesionTests(TestCase):
+    """El rol guardado en la sesión solo se usa si la caché de versiones es compartida."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = Practica.objects.create(username='jefa', password='x', is_admin=True)
+        sesion = self.client.session
+        sesion['user_id'] = self.admin.id
+        sesion['username'] = self.admin.username
+        sesion.save()
+
+    def _es_admin(self):
+        return self.client.get(reverse('estado_bd'), secure=True).status_code == 200
+
+    def _degradar_sin_senal(self):
+        # Como un cambio hecho en otro proceso: la caché de este no se entera
+        Practica.objects.filter(pk=self.admin.pk).update(is_admin=False)
+
+    @override_settings(CACHE_COMPARTIDA=False)
+    def test_sin_cache_compartida_el_rol_sale_de_la_bd(self):
+        self.assertTrue(self._es_admin())
+        self._degradar_sin_senal()
+        self.assertFalse(self._es_admin())
+
+    @override_settings(CACHE_COMPARTIDA=True)
+    def test_con_cache_compartida_la_sesion_vale_hasta_invalidar(self):
+        self.assertTrue(self._es_admin())
+        self._degradar_sin_senal()
+        with self.assertNumQueries(1):  # solo la sesión: el rol no se consulta
+            self.assertTrue(self._es_admin())
+        invalidar_rol(self.admin.pk)
+        self.assertFalse(self._es_admin())
+
+
+class CuposConcurrentesTests(TransactionTestCase):
+    """Cientos de reservas simultáneas sobre una misma salida nunca superan la capacidad."""
+
+    CAPACIDAD = 40
+    RESERVAS = 300
+
+    def setUp(self):
+        self.tour = Tour.objects.create(
+            nombre='Ciudad Perdida', descripcion='Trekking', duracion='4 días', capacidad_por_salida=self.CAPACIDAD
+        )
+        self.fecha = date(2030, 1, 15)
+
+    def _reservar(self, i, personas):
+        return reservar(self.tour, self.fecha, personas, nombre_cliente=f'Cliente {i}',
+                        email_cliente=f'c{i}@example.com', telefono_cliente='300')
+
+    def _reservar_en_hilo(self, i, barrera):
+        barrera.wait()
+        personas = 1 + i % 3
+        try:
+            self._reservar(i, personas)
+            return personas
+        except SinCupo:
+            return 0
+        finally:
+            connection.close()
+
+    # SQLite bloquea la base entera ante escrituras simultáneas: ahí los hilos solo
+    # medirían los reintentos. El UPDATE condicional se prueba abajo paso a paso.
+    @skipUnless(connection.vendor == 'postgresql', 'concurrencia real solo con PostgreSQL')
+    def test_no_hay_sobreventa(self):
+        # Olas de 20 hilos propios que arrancan a la vez. Con un Barrier(20) sobre un
+        # ThreadPoolExecutor la prueba se colgaba si el pool arrancaba menos de 20 hilos.
+        apartados = [None] * self.RESERVAS
+
+        def reservar(i, barrera):
+            apartados[i] = self._reservar_en_hilo(i, barrera)
+
+        for ola in range(0, self.RESERVAS, 20):
+            barrera = threading.Barrier(20)
+            hilos = [threading.Thread(target=reservar, args=(i, barrera)) for i in range(ola, ola + 20)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        self.assertNotIn(None, apartados)  # ningún hilo terminó con error
+
+        salida = Salida.objects.get(tour=self.tour, fecha=self.fecha)
+        vendidos = Reserva.objects.filter(salida=salida).aggregate(total=Sum('numero_personas'))['total']
+        self.assertLessEqual(salida.reservados, self.CAPACIDAD)
+        self.assertEqual(salida.reservados, vendidos)
+        self.assertEqual(salida.reservados, sum(apartados))
+        # Con 300 solicitudes de 1-3 personas la salida debe quedar (casi) llena
+        self.assertGreater(salida.reservados, self.CAPACIDAD - 3)
+
+    def test_reservas_seguidas_hasta_agotar_los_cupos(self):
+        # 1, 2, 3, 1, 2, 3... personas: tras 36 entran 1 y 2, 3 ya no caben (queda 1) y 1 llena la salida
+        rechazos = []
+        for i in range(25):
+            try:
+                self._reservar(i, 1 + i % 3)
+            except SinCupo as sin_cupo:
+                rechazos.append((1 + i % 3, sin_cupo.disponibles))
+        salida = Salida.objects.get(tour=self.tour, fecha=self.fecha)
+        self.assertEqual(salida.reservados, self.CAPACIDAD)
+        self.assertEqual(Reserva.objects.filter(salida=salida).aggregate(total=Sum('numero_personas'))['total'],
+                         self.CAPACIDAD)
+        self.assertEqual(rechazos[:2], [(3, 1), (2, 0)])
+        self.assertTrue(all(disponibles == 0 for _, disponibles in rechazos[1:]))
+
+    def test_la_guarda_es_el_update_y_no_la_salida_leida(self):
+        # Otra reserva aparta cupos entre que se lee la salida y se ejecuta el UPDATE
+        leida = obtener_salida(self.tour, self.fecha)
+        Salida.objects.filter(pk=leida.pk).update(reservados=F('capacidad') - 1)
+        self.assertEqual(leida.disponibles, self.CAPACIDAD)
+        with mock.patch('vistas.cupos.obtener_salida', return_value=leida):
+            with self.assertRaises(SinCupo) as error:
+                self._reservar(0, 2)
+            self._reservar(1, 1)
+        self.assertEqual(error.exception.disponibles, 1)
+        self.assertEqual(Salida.objects.get(pk=leida.pk).reservados, self.CAPACIDAD)
+        self.assertEqual(Reserva.objects.count(), 1)
+
+    def test_eliminar_reserva_devuelve_cupos(self):
+        reserva = reservar(self.tour, self.fecha, 3, nombre_cliente='Ana', email_cliente='a@example.com',
+                           telefono_cliente='300')
+        reserva.delete()
+        self.assertEqual(Salida.objects.get(pk=reserva.salida_id).reservados, 0)
+
+
+class ConexionesTests(TestCase):
+    """Modo de conexión que eligen los settings y estadísticas del worker (estado_bd)."""
+
+    def setUp(self):
+        conexiones.reiniciar_contadores()
+        self.addCleanup(conexiones.reiniciar_contadores)
+
+    def _modo(self, **entorno):
+        # settings.py evaluado de nuevo con otro entorno (PostgreSQL: sin DB_ENGINE=sqlite)
+        with mock.patch.dict(os.environ, entorno):
+            os.environ.pop('DB_ENGINE', None)
+            ajustes = runpy.run_path(str(settings.BASE_DIR / 'nuestroproyecto' / 'settings.py'))['DATABASES']
+        principal = ajustes['default']
+        claves = {clave: principal[clave] for clave in ('OPTIONS', 'CONN_MAX_AGE') if clave in principal}
+        with mock.patch.dict(connection.settings_dict, claves):
+            return conexiones.modo(), principal
+
+    def test_modo_segun_los_settings(self):
+        modo, ajustes = self._modo(DB_POOL='1', DB_POOL_MAX_SIZE='8')
+        self.assertEqual((modo, ajustes['CONN_MAX_AGE']), ('pool', 0))
+        self.assertEqual(ajustes['OPTIONS']['pool'], {'min_size': 1, 'max_size': 8, 'timeout': 10.0})
+
+        modo, ajustes = self._modo(DB_POOL='0')
+        self.assertEqual((modo, ajustes['CONN_MAX_AGE'], ajustes['CONN_HEALTH_CHECKS']), ('persistente', 60, True))
+        self.assertEqual(self._modo(DB_POOL='0', DB_CONN_MAX_AGE='0')[0], 'por_peticion')
+        # Bajo ASGI una conexión persistente no se reutiliza entre peticiones
+        self.assertEqual(self._modo(DB_POOL='0', SERVIDOR='asgi')[0], 'por_peticion')
+        self.assertEqual(self._modo(DB_POOL='1', SERVIDOR='asgi')[0], 'pool')
+
+    def test_estadisticas_por_alias(self):
+        conexiones.conexion_abierta(sender=None, connection=connections['default'])
+        conexiones.conexion_abierta(sender=None, connection=connections['default'])
+        conexiones.peticion_atendida(sender=None)
+        pool = mock.Mock(get_stats=mock.Mock(return_value={'pool_size': 4, 'pool_available': 3}))
+        with mock.patch.object(connections['default'], 'pool', pool, create=True):
+            datos = conexiones.estadisticas_conexiones()
+        self.assertEqual(datos['pid'], os.getpid())
+        self.assertEqual(datos['peticiones'], 1)
+        self.assertEqual(set(datos['bases']), set(connections))
+        principal = datos['bases']['default']
+        self.assertEqual(set(principal), {'motor', 'modo', 'conn_max_age', 'health_checks', 'aperturas', 'pool'})
+        self.assertEqual((principal['motor'], principal['aperturas']), (connection.vendor, 2))
+        self.assertEqual(principal['pool'], {'pool_size': 4, 'pool_available': 3})
+        self.assertNotIn('pool', datos['bases']['replica'])
+
+    def test_vista_json_solo_para_administradores(self):
+        usuario = Practica.objects.create(username='ana', password='x')
+        sesion = self.client.session
+        sesion['user_id'] = usuario.id
+        sesion.save()
+        self.assertNotEqual(self.client.get(reverse('estado_bd'), secure=True).status_code, 200)
+
+        Practica.objects.filter(pk=usuario.pk).update(is_admin=True)
+        invalidar_rol(usuario.pk)
+        conexiones.reiniciar_contadores()
+        primera = self.client.get(reverse('estado_bd'), secure=True)
+        self.assertEqual(primera['Content-Type'], 'application/json')
+        self.assertEqual(primera.json()['peticiones'], 0)
+        # La petición se cuenta al terminar (request_finished)
+        segunda = self.client.get(reverse('estado_bd'), secure=True).json()
+        self.assertEqual(segunda['peticiones'], 1)
+        self.assertEqual(segunda['bases']['default']['modo'], conexiones.modo())
+
+
+class RouterReplicaTests(TestCase):
+    """Catálogo y listados se leen de la réplica; quien escribe queda fijado a la primaria."""
+
+    def setUp(self):
+        self.admin = Practica.objects.create(username='admin', password='x', is_admin=True)
+        sesion = self.client.session
+        sesion['user_id'] = self.admin.id
+        sesion['username'] = self.admin.username
+        sesion.save()
+        # Estado limpio, como al comienzo de una petición sin cookie
+        tokens = router.iniciar_peticion(False)
+        self.addCleanup(router.terminar_peticion, tokens)
+
+    def test_lecturas_y_escrituras(self):
+        self.assertEqual(Tour.objects.all().db, 'replica')
+        self.assertEqual(Reserva.objects.all().db, 'replica')
+        self.assertEqual(Practica.objects.all().db, 'default')
+        self.assertEqual(Salida.objects.all().db, 'default')
+
+    def test_escribir_fija_la_primaria(self):
+        Tour.objects.create(nombre='Leticia', descripcion='Amazonas', duracion='4 días')
+        self.assertEqual(Tour.objects.all().db, 'default')
+
+    def test_peticion_que_escribe_deja_cookie(self):
+        respuesta = self.client.post(reverse('crear_tour'), {
+            'nombre': 'Leticia', 'descripcion': 'Amazonas', 'duracion': '4 días',
+            'categoria': 'lugar', 'capacidad_por_salida': 20,
+        }, secure=True)
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertTrue(Tour.objects.using('default').filter(nombre='Leticia').exists())
+        self.assertIn(router.COOKIE_PRIMARIA, respuesta.cookies)
+        # El estado de la petición no se filtra fuera de ella
+        self.assertEqual(router.alias_lectura(), 'replica')
+
+    def test_cookie_fija_la_peticion_siguiente(self):
+        self.client.cookies[router.COOKIE_PRIMARIA] = '1'
+        respuesta = self.client.get(reverse('crear_tour'), secure=True)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn(router.COOKIE_PRIMARIA, respuesta.cookies)
+
+
+class TarjetasEnCacheTests(TestCase):
+    """Cada tarjeta de tour se renderiza una vez y solo se vuelve a renderizar si su tour cambia."""
+
+    def setUp(self):
+        cache.clear()
+        self.tours = [
+            Tour.objects.create(nombre=f'Tour {i}', descripcion='Recorrido', duracion='2 días', categoria='lugar')
+            for i in range(3)
+        ]
+
+    def _fragmentos_guardados(self, tours):
+        with mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            html = renderizar_tarjetas(tours, 'tarjetas/principal.html', tipo='Lugar')
+        claves = [clave for llamada in set_many.call_args_list for clave in llamada.args[0]
+                  if not clave.endswith(':version')]
+        return html, claves
+
+    def test_segunda_pagina_sale_de_la_cache(self):
+        primera, guardadas = self._fragmentos_guardados(self.tours)
+        self.assertEqual(len(guardadas), 3)
+        segunda, guardadas = self._fragmentos_guardados(self.tours)
+        self.assertEqual(guardadas, [])
+        self.assertEqual(primera, segunda)
+
+    def test_editar_un_tour_solo_invalida_su_tarjeta(self):
+        self._fragmentos_guardados(self.tours)
+        editado = self.tours[1]
+        editado.nombre = 'Tour editado'
+        with self.captureOnCommitCallbacks(execute=True):
+            editado.save()
+        html, guardadas = self._fragmentos_guardados(self.tours)
+        self.assertEqual(len(guardadas), 1)
+        self.assertIn(f':{editado.pk}:', guardadas[0])
+        self.assertIn('data-nombre="Tour editado"', html)
+
+    def test_imagen_y_textos_por_defecto(self):
+        html = renderizar_tarjetas(self.tours[:1], 'tarjetas/principal.html', tipo='Ciudad')
+        self.assertIn('data-tipo="Ciudad"', html)
+        self.assertIn('photo-1449824913935-59a10b8d2000', html)
+        self.assertIn('2 días', html)
+
+
+class EstaticosTests(SimpleTestCase):
+    """El CSS/JS de las páginas vive en archivos estáticos (cacheables), no en línea."""
+
+    def _plantillas(self):
+        carpeta = settings.TEMPLATES[0]['DIRS'][0]
+        return {ruta.name: ruta.read_text(encoding='utf-8') for ruta in carpeta.glob('*.html')}
+
+    def test_sin_estilos_ni_scripts_en_linea(self):
+        for nombre, contenido in self._plantillas().items():
+            self.assertNotIn('<style', contenido, nombre)
+            self.assertNotRegex(contenido, r'<script(?![^>]*\bsrc=)[^>]*>', nombre)
+
+    def test_archivos_estaticos_existen(self):
+        for nombre, contenido in self._plantillas().items():
+            for ruta in re.findall(r"{% static '([^']+)' %}", contenido):
+                self.assertIsNotNone(finders.find(ruta), f'{nombre}: {ruta}')
+
+    def test_almacen_segun_debug_y_bandera(self):
+        def almacen(**entorno):
+            with mock.patch.dict(os.environ, entorno):
+                ajustes = runpy.run_path(str(settings.BASE_DIR / 'nuestroproyecto' / 'settings.py'))
+            return ajustes['STORAGES']['staticfiles']['BACKEND'].rsplit('.', 1)[1]
+
+        # El motor de la base de datos no influye
+        for motor in ('sqlite', 'postgresql'):
+            with self.subTest(motor=motor):
+                self.assertEqual(almacen(DB_ENGINE=motor, DEBUG='False', ESTATICOS_CON_HASH='1'),
+                                 'CompressedManifestStaticFilesStorage')
+                self.assertEqual(almacen(DB_ENGINE=motor, DEBUG='False', ESTATICOS_CON_HASH='0'),
+                                 'StaticFilesStorage')
+                self.assertEqual(almacen(DB_ENGINE=motor, DEBUG='True', ESTATICOS_CON_HASH='1'),
+                                 'StaticFilesStorage')
+
+
+class _ServidorImagenes(BaseHTTPRequestHandler):
+    """Sustituto local de Unsplash: /foto.png es una imagen 800x600, lo demás es HTML."""
+
+    peticiones = []
+
+    def do_GET(self):
+        self.peticiones.append(self.path)
+        if self.path == '/redirige':
+            self.send_response(302)
+            self.send_header('Location', 'http://169.254.169.254/latest/meta-data/')
+            self.end_headers()
+            return
+        if self.path == '/foto.png':
+            salida = io.BytesIO()
+            Image.new('RGB', (800, 600), (40, 120, 200)).save(salida, 'PNG')
+            cuerpo, tipo = salida.getvalue(), 'image/png'
+        else:
+            cuerpo, tipo = b'<html>no es una imagen</html>', 'text/html'
+        self.send_response(200)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImagenesToursTests(TestCase):
+    """Variantes locales de imagen_url generadas con Pillow (contra un servidor HTTP local)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), _ServidorImagenes)
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.servidor.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        ajustes = override_settings(MEDIA_ROOT=media, TOUR_IMAGEN_PERMITIR_PRIVADAS=True)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        _ServidorImagenes.peticiones.clear()
+
+    def _tour(self, url, nombre='Guatapé'):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            tour = Tour.objects.create(nombre=nombre, descripcion='Piedra', duracion='1 día', imagen_url=url)
+        self.assertEqual(tour.imagen_estado, 'pendiente')
+        self.assertEqual(self._encolados(callbacks), 1)  # encolado al confirmar, no procesado en la petición
+        return tour
+
+    @staticmethod
+    def _encolados(callbacks):
+        # Los demás callbacks al confirmar son invalidaciones de caché
+        return sum(c.__qualname__.startswith('encolar.') for c in callbacks)
+
+    def test_genera_variantes_y_placeholder(self):
+        tour = self._tour(f'{self.base}/foto.png')
+        self.assertEqual(procesar_imagen(tour.pk, tour.imagen_url), 'lista')
+        tour.refresh_from_db()
+        variantes = tour.imagen_variantes
+        self.assertEqual(variantes['anchos'], [320, 640, 800])
+        self.assertTrue(variantes['placeholder'].startswith('data:image/jpeg;base64,'))
+        with default_storage.open(f"tours/{variantes['clave']}/320.webp") as archivo:
+            imagen = Image.open(archivo)
+            self.assertEqual((imagen.format, imagen.size), ('WEBP', (320, 240)))
+
+    def test_misma_url_se_descarga_una_vez(self):
+        primero = self._tour(f'{self.base}/foto.png')
+        segundo = self._tour(f'{self.base}/foto.png', nombre='El Peñol')
+        procesar_imagen(primero.pk, primero.imagen_url)
+        procesar_imagen(segundo.pk, segundo.imagen_url)
+        self.assertEqual(_ServidorImagenes.peticiones, ['/foto.png'])
+        segundo.refresh_from_db()
+        self.assertEqual(segundo.imagen_estado, 'lista')
+
+    def test_respuesta_que_no_es_imagen(self):
+        tour = self._tour(f'{self.base}/pagina.html')
+        with self.assertLogs('vistas.imagenes', 'WARNING'):
+            self.assertEqual(procesar_imagen(tour.pk, tour.imagen_url), 'error')
+        tour.refresh_from_db()
+        # Sin cambiar la URL no se vuelve a encolar
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            tour.save()
+        self.assertEqual((tour.imagen_estado, self._encolados(callbacks)), ('error', 0))
+
+    def test_plantilla_emite_srcset_y_carga_diferida(self):
+        tour = self._tour(f'{self.base}/foto.png')
+        plantilla = Template('{% load imagenes %}{% imagen_tour tour "imagen-tour" %}')
+        self.assertIn(f'src="{self.base}/foto.png"', plantilla.render(Context({'tour': tour})))
+        procesar_imagen(tour.pk, tour.imagen_url)
+        tour.refresh_from_db()
+        html = plantilla.render(Context({'tour': tour}))
+        self.assertIn('<source type="image/webp" srcset="/media/tours/', html)
+        self.assertIn('640w', html)
+        self.assertIn('loading="lazy"', html)
+
+    @override_settings(TOUR_IMAGEN_PERMITIR_PRIVADAS=False)
+    def test_rechaza_urls_internas(self):
+        for url in (f'{self.base}/foto.png', 'http://localhost/x.png', 'http://[::1]/x.png',
+                    'http://169.254.169.254/latest/meta-data/', 'http://10.0.0.5/x.png',
+                    'file:///etc/passwd', 'ftp://example.com/x.png', 'http:///x.png'):
+            with self.subTest(url=url), self.assertRaises(imagenes.ImagenInvalida):
+                imagenes.descargar(url)
+        self.assertEqual(_ServidorImagenes.peticiones, [])
+
+    @override_settings(TOUR_IMAGEN_PERMITIR_PRIVADAS=False)
+    def test_rechaza_redireccion_a_red_interna(self):
+        # El servidor de prueba cuenta como público; el destino de la redirección no
+        with mock.patch.object(imagenes, '_direccion_interna', lambda ip: ip.startswith('169.254.')), \
+                self.assertRaisesMessage(imagenes.ImagenInvalida, 'dirección interna'):
+            imagenes.descargar(f'{self.base}/redirige')
+        self.assertEqual(_ServidorImagenes.peticiones, ['/redirige'])
+
+    @override_settings(TOUR_IMAGEN_PERMITIR_PRIVADAS=False)
+    def test_rechaza_dns_que_cambia_al_conectar(self):
+        # DNS rebinding: el nombre resuelve a una IP pública al comprobarlo y a 127.0.0.1 al conectar
+        resolver = socket.getaddrinfo
+        respuestas = iter([[(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', ('93.184.216.34', 80))]])
+
+        def getaddrinfo(host, *args, **kwargs):
+            if host == 'imagenes.example':
+                return next(respuestas, None) or resolver('127.0.0.1', *args, **kwargs)
+            return resolver(host, *args, **kwargs)
+
+        puerto = self.base.rsplit(':', 1)[1]
+        with mock.patch.object(socket, 'getaddrinfo', getaddrinfo), \
+                self.assertRaisesMessage(imagenes.ImagenInvalida, 'dirección interna (127.0.0.1)'):
+            imagenes.descargar(f'http://imagenes.example:{puerto}/foto.png')
+        self.assertEqual(_ServidorImagenes.peticiones, [])
+
+
+class AvataresTests(TestCase):
+    """Avatares con iniciales generados localmente en lugar de ui-avatars.com."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        ajustes = override_settings(MEDIA_ROOT=media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        avatares._asegurar.cache_clear()
+        self.addCleanup(avatares._asegurar.cache_clear)
+
+    def test_iniciales_y_color_estable(self):
+        self.assertEqual(avatares.iniciales('maria  rodriguez lopez'), 'MR')
+        self.assertEqual(avatares.iniciales('admin'), 'A')
+        self.assertEqual(avatares.iniciales(''), '?')
+        self.assertEqual(avatares.color_para('karim'), avatares.color_para('karim'))
+
+    def test_direccion_por_contenido(self):
+        url = avatares.url_avatar('Ana Lopez', 'f093fb')
+        self.assertRegex(url, r'^/media/avatares/[0-9a-f]{20}\.png$')
+        # Mismas iniciales y colores -> mismo archivo; otro color -> otro archivo
+        self.assertEqual(avatares.url_avatar('Andrés Luna', '#F093FB'), url)
+        self.assertNotEqual(avatares.url_avatar('Ana Lopez', '333'), url)
+        with default_storage.open(url.removeprefix(settings.MEDIA_URL)) as archivo:
+            imagen = Image.open(archivo)
+            self.assertEqual((imagen.format, imagen.size), ('PNG', (128, 128)))
+            self.assertEqual(imagen.getpixel((2, 2)), (0xf0, 0x93, 0xfb))
+
+    def test_se_genera_una_sola_vez(self):
+        with mock.patch.object(avatares, 'generar_png', wraps=avatares.generar_png) as generar:
+            for _ in range(3):
+                avatares.url_avatar('karim', '333')
+            avatares._asegurar.cache_clear()
+            avatares.url_avatar('karim', '333')  # otro proceso: el archivo ya existe en disco
+        self.assertEqual(generar.call_count, 1)
+
+    def test_etiqueta_prefiere_la_foto_del_usuario(self):
+        plantilla = Template('{% load avatares %}{% avatar nombre imagen=foto fondo="333" %}')
+        foto = 'https://example.com/yo.jpg'
+        self.assertEqual(plantilla.render(Context({'nombre': 'karim', 'foto': foto})), foto)
+        self.assertTrue(plantilla.render(Context({'nombre': 'karim', 'foto': None})).startswith('/media/avatares/'))
+
+    def test_paginas_sin_servicio_externo(self):
+        usuario = Practica.objects.create(username='karim', password='!', is_admin=True)
+        sesion = self.client.session
+        sesion['user_id'] = usuario.id
+        sesion['username'] = usuario.username
+        sesion.save()
+        for nombre in ('dashboard', 'user_register', 'perfil', 'configuracion', 'tours', 'sobre_nosotros'):
+            respuesta = self.client.get(reverse(nombre), secure=True)
+            self.assertEqual(respuesta.status_code, 200, nombre)
+            self.assertNotContains(respuesta, 'ui-avatars.com')
+            self.assertContains(respuesta, '/media/avatares/')
+
+
+class GetCondicionalTests(TestCase):
+    """ETag/Last-Modified: 304 sin renderizar mientras no cambie nada de la página para ese usuario."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.admin = Practica.objects.create(username='admin', password='x', is_admin=True)
+        self.tour = Tour.objects.create(nombre='Guatapé', descripcion='Piedra', duracion='1 día', categoria='lugar')
+        self._entrar(self.admin)
+
+    def _entrar(self, usuario):
+        sesion = self.client.session
+        sesion['user_id'] = usuario.id
+        sesion['username'] = usuario.username
+        sesion.save()
+
+    def _revalidar(self, nombre, etag, **parametros):
+        return self.client.get(reverse(nombre), parametros, secure=True, HTTP_IF_NONE_MATCH=etag)
+
+    def test_paginas_responden_304_sin_renderizar(self):
+        for nombre, plantilla in [('home', 'pagina_principal.html'), ('tours', 'tours.html'),
+                                  ('explorar_toures', 'explorar_toures.html'),
+                                  ('reservas_admin', 'reservas_admin.html')]:
+            primera = self.client.get(reverse(nombre), secure=True)
+            self.assertEqual(primera.status_code, 200, nombre)
+            self.assertIn('Last-Modified', primera.headers)
+            self.assertIn('private', primera.headers['Cache-Control'])
+            segunda = self._revalidar(nombre, primera.headers['ETag'])
+            self.assertEqual(segunda.status_code, 304, nombre)
+            self.assertEqual(segunda.content, b'')
+            self.assertTemplateNotUsed(segunda, plantilla)
+
+    def test_cambios_en_tours_reservas_o_usuario(self):
+        etag = self.client.get(reverse('tours'), secure=True).headers['ETag']
+        self.tour.nombre = 'Guatapé y El Peñol'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.save(update_fields=['nombre'])
+        respuesta = self._revalidar('tours', etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'El Peñol')
+        etag = respuesta.headers['ETag']
+
+        # Otra búsqueda u otro usuario no reutilizan el mismo ETag
+        self.assertEqual(self._revalidar('tours', etag, q='piedra').status_code, 200)
+        self._entrar(Practica.objects.create(username='turista', password='x'))
+        self.assertEqual(self._revalidar('tours', etag).status_code, 200)
+
+        self._entrar(self.admin)
+        etag = self.client.get(reverse('reservas_admin'), secure=True).headers['ETag']
+        reserva = Reserva.objects.create(tour=self.tour, nombre_cliente='Ana', email_cliente='ana@example.com',
+                                         telefono_cliente='300', fecha_inicio=date(2030, 1, 1))
+        respuesta = self._revalidar('reservas_admin', etag)
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta.headers['ETag']
+        reserva.estado = 'confirmada'
+        reserva.save()
+        self.assertEqual(self._revalidar('reservas_admin', etag).status_code, 200)
+
+    def test_borrar_un_tour_cambia_el_etag(self):
+        otro = Tour.objects.create(nombre='Leticia', descripcion='Amazonas', duracion='4 días')
+        etag = self.client.get(reverse('explorar_toures'), secure=True).headers['ETag']
+        otro.delete()
+        self.assertEqual(self._revalidar('explorar_toures', etag).status_code, 200)
+
+    @override_settings(CACHE_COMPARTIDA=True)
+    def test_version_de_cambios_en_lugar_de_contar_filas(self):
+        otro = Tour.objects.create(nombre='Leticia', descripcion='Amazonas', duracion='4 días')
+        self.tour.save()  # el tour más reciente no es el que se va a borrar
+        reserva = Reserva.objects.create(tour=self.tour, nombre_cliente='Ana', email_cliente='ana@example.com',
+                                         telefono_cliente='300', fecha_inicio=date(2030, 1, 1))
+        with CaptureQueriesContext(connections[router.REPLICA]) as consultas:
+            etag = self.client.get(reverse('reservas_admin'), secure=True).headers['ETag']
+        self.assertFalse([c['sql'] for c in consultas if 'COUNT(' in c['sql']])
+        self.assertEqual(self._revalidar('reservas_admin', etag).status_code, 304)
+
+        # Un borrado no mueve el máximo de fecha_actualizacion: lo detecta la versión al confirmarse
+        with self.captureOnCommitCallbacks(execute=True):
+            otro.delete()
+        respuesta = self._revalidar('reservas_admin', etag)
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta.headers['ETag']
+
+        # Las transiciones en bloque (update() sin señales) también la renuevan
+        with self.captureOnCommitCallbacks(execute=True):
+            transiciones.cambiar_estado(Reserva.objects.filter(pk=reserva.pk), 'confirmar')
+        self.assertEqual(self._revalidar('reservas_admin', etag).status_code, 200)
+
+    def test_otra_cookie_csrf_es_otra_pagina(self):
+        etag = self.client.get(reverse('reservas_admin'), secure=True).headers['ETag']
+        self.assertEqual(self._revalidar('reservas_admin', etag).status_code, 304)
+        # Con otra cookie el token del formulario sería otro: no se reutiliza la página guardada
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        self.assertEqual(self._revalidar('reservas_admin', etag).status_code, 200)
+
+
+class VistasAsincronasTests(TestCase):
+    """Las vistas async del catálogo recorridas con AsyncClient (como bajo ASGI)."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        Tour.objects.create(nombre='Guatapé', descripcion='Piedra', duracion='1 día', categoria='lugar')
+        Tour.objects.create(nombre='Cartagena', descripcion='Murallas', duracion='3 días', categoria='ciudad')
+        usuario = Practica.objects.create(username='ana', password='!')
+        sesion = import_module(settings.SESSION_ENGINE).SessionStore()
+        sesion['user_id'] = usuario.id
+        sesion['username'] = usuario.username
+        sesion.save()
+        self.async_client.cookies[settings.SESSION_COOKIE_NAME] = sesion.session_key
+
+    async def test_paginas_del_catalogo(self):
+        for nombre in ('home', 'tours', 'explorar_toures'):
+            with self.subTest(nombre=nombre):
+                respuesta = await self.async_client.get(reverse(nombre), secure=True)
+                self.assertContains(respuesta, 'Guatapé')
+                self.assertContains(respuesta, 'Cartagena')
+                self.assertIn('ETag', respuesta)
+
+    async def test_busqueda_y_filtros_sin_cache(self):
+        respuesta = await self.async_client.get(reverse('tours'), {'q': 'murallas'}, secure=True)
+        self.assertContains(respuesta, 'Cartagena')
+        self.assertNotContains(respuesta, 'Guatapé')
+        respuesta = await self.async_client.get(reverse('explorar_toures'), {'dias_min': 2}, secure=True)
+        self.assertContains(respuesta, 'Cartagena')
+        self.assertNotContains(respuesta, 'Guatapé')
+
+    async def test_renderizan_fuera_del_bucle_de_eventos(self):
+        # Las etiquetas de las plantillas usan la caché y el almacenamiento síncronos
+        en_el_bucle = []
+
+        def render(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                en_el_bucle.append(True)
+            except RuntimeError:
+                en_el_bucle.append(False)
+            return django_render(*args, **kwargs)
+
+        with mock.patch.object(views, 'render', render):
+            for nombre in ('home', 'tours', 'explorar_toures', 'sobre_nosotros'):
+                respuesta = await self.async_client.get(reverse(nombre), secure=True)
+                self.assertEqual(respuesta.status_code, 200, nombre)
+        self.assertEqual(en_el_bucle, [False] * 4)
+
+    async def test_sin_sesion(self):
+        self.async_client.cookies.pop(settings.SESSION_COOKIE_NAME)
+        respuesta = await self.async_client.get(reverse('home'), secure=True)
+        self.assertEqual(respuesta.status_code, 302)
+        respuesta = await self.async_client.get(reverse('sobre_nosotros'), secure=True)
+        self.assertEqual(respuesta.status_code, 200)
+
+
+class PerfiladoTests(TestCase):
+    """Server-Timing y registro de peticiones lentas, solo con PERFILADO_PETICIONES."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.admin = Practica.objects.create(username='admin', password='x', is_admin=True)
+        for nombre in ('Guatapé', 'Leticia', 'Salento', 'Mompox'):
+            Tour.objects.create(nombre=nombre, descripcion='Tour', duracion='1 día')
+        sesion = self.client.session
+        sesion['user_id'] = self.admin.id
+        sesion['username'] = self.admin.username
+        sesion.save()
+
+    def test_desactivado_no_agrega_cabecera(self):
+        respuesta = self.client.get(reverse('dashboard'), secure=True)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn('Server-Timing', respuesta.headers)
+
+    @override_settings(PERFILADO_PETICIONES=True, PERFILADO_LENTA_MS=60_000)
+    def test_server_timing(self):
+        respuesta = self.client.get(reverse('dashboard'), {'buscar': 'guatape'}, secure=True)
+        self.assertEqual(respuesta.status_code, 200)
+        metricas = dict(
+            (parte.split(';')[0], parte) for parte in respuesta.headers['Server-Timing'].split(', ')
+        )
+        self.assertEqual(set(metricas), {'db', 'tpl', 'vista', 'total'})
+        consultas = int(re.search(r'desc="(\d+) consultas"', metricas['db']).group(1))
+        self.assertGreater(consultas, 0)
+
+    @override_settings(PERFILADO_PETICIONES=True, PERFILADO_LENTA_MS=0)
+    def test_peticion_lenta_registra_su_sql(self):
+        with self.assertLogs('vistas.perfilado', 'WARNING') as registro:
+            self.client.get(reverse('user_register'), secure=True)
+        datos = registro.records[0].perfilado
+        self.assertEqual((datos['metodo'], datos['ruta'], datos['estado']), ('GET', reverse('user_register'), 200))
+        self.assertGreater(datos['consultas'], 0)
+        self.assertTrue(any('vistas_practica' in c['sql'] for c in datos['consultas_lentas']))
+
+    def test_listado_de_usuarios_sin_count_aparte(self):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('user_register'), secure=True)
+        self.assertContains(respuesta, 'Total: 1')
+        self.assertFalse(any('COUNT(' in consulta['sql'] for consulta in consultas.captured_queries))
+
+    @override_settings(PERFILADO_PETICIONES=True, PERFILADO_LENTA_MS=60_000)
+    def test_bajo_el_umbral_no_registra(self):
+        with self.assertNoLogs('vistas.perfilado', 'WARNING'):
+            self.client.get(reverse('dashboard'), secure=True)
+
+
+class ImportarToursTests(TestCase):
+    """import_tours: streaming por lotes, validación de TourForm y upsert idempotente por (nombre, categoría)."""
+
+    def setUp(self):
+        cache.clear()
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta)
+        self.csv = f'{carpeta}/tours.csv'
+        self.jsonl = f'{carpeta}/tours.jsonl'
+
+    def _importar(self, ruta, *args):
+        salida, errores = io.StringIO(), io.StringIO()
+        call_command('import_tours', ruta, *args, stdout=salida, stderr=errores)
+        return salida.getvalue(), errores.getvalue()
+
+    def _escribir_csv(self, filas):
+        with open(self.csv, 'w', encoding='utf-8', newline='') as archivo:
+            archivo.write('nombre,descripcion,duracion,precio,categoria,imagen_url\n')
+            archivo.writelines(','.join(fila) + '\n' for fila in filas)
+
+    def test_crea_valida_y_se_puede_repetir(self):
+        self._escribir_csv([
+            ('Cartagena', 'Playas', '7 días', '7.5M', 'lugar', ''),
+            ('Bogotá', 'Capital', '3 días', '2M', 'ciudad', ''),
+            ('Bogotá', 'Capital fría', '3 días', '2M', 'ciudad', ''),  # misma clave en el lote: gana la última
+            ('', 'Sin nombre', '1 día', '1M', 'ciudad', ''),
+            ('Malo', 'x', '1 día', '1M', 'playa', 'no-es-url'),
+        ])
+        salida, errores = self._importar(self.csv, '--lote', '3')
+        self.assertIn('leidas=5 creadas=2 actualizadas=0 sin_cambios=0 invalidas=2', salida)
+        self.assertIn('filas/s', salida)
+        self.assertIn('línea 5: nombre:', errores)
+        self.assertIn('categoria:', errores)
+        bogota = Tour.objects.get(nombre='Bogotá')
+        self.assertEqual((bogota.descripcion, bogota.precio_centavos, bogota.duracion_dias), ('Capital fría', 200000000, 3))
+        self.assertEqual(bogota.capacidad_por_salida, 20)  # columna ausente: valor por defecto del modelo
+
+        # Repetir no escribe nada (ni cambia la fecha de actualización)
+        antes = bogota.fecha_actualizacion
+        salida, _ = self._importar(self.csv)
+        self.assertIn('creadas=0 actualizadas=0 sin_cambios=2', salida)
+        bogota.refresh_from_db()
+        self.assertEqual(bogota.fecha_actualizacion, antes)
+
+    def test_actualiza_conserva_imagenes_e_invalida_caches(self):
+        url = 'https://example.com/cartagena.jpg'
+        tour = Tour.objects.create(nombre='Cartagena', descripcion='Playas', duracion='7 días', categoria='lugar',
+                                   imagen_url=url)
+        variantes = {'url': url, 'clave': 'abc', 'anchos': [320], 'proporcion': 0.5, 'placeholder': ''}
+        Tour.objects.filter(pk=tour.pk).update(imagen_estado='lista', imagen_variantes=variantes)
+        renderizar_tarjetas([Tour.objects.get(pk=tour.pk)], 'tarjetas/principal.html', tipo='Lugar')
+        version = cache.get('catalogo:version')
+        tarjeta = cache.get(f'tarjeta:{tour.pk}:version')
+
+        with open(self.jsonl, 'w', encoding='utf-8') as archivo:
+            archivo.write('{"nombre": "Cartagena", "descripcion": "Playas y murallas", "duracion": "8 días", '
+                          f'"categoria": "lugar", "imagen_url": "{url}", "capacidad_por_salida": 30}}\n')
+            archivo.write('no es json\n')
+        salida, errores = self._importar(self.jsonl)
+        self.assertIn('creadas=0 actualizadas=1 sin_cambios=0 invalidas=1', salida)
+        self.assertIn('línea 2:', errores)
+        tour.refresh_from_db()
+        self.assertEqual((tour.descripcion, tour.duracion_dias, tour.capacidad_por_salida), ('Playas y murallas', 8, 30))
+        self.assertEqual((tour.imagen_estado, tour.imagen_variantes), ('lista', variantes))
+        self.assertIn('murallas', tour.busqueda)
+        self.assertNotEqual(cache.get('catalogo:version'), version)
+        self.assertNotEqual(cache.get(f'tarjeta:{tour.pk}:version'), tarjeta)
+
+
+class DatosSinteticosTests(TestCase):
+    """generar_datos: reproducible con la misma semilla y sin sobreventa; resumen de la prueba de carga."""
+
+    def _huella(self):
+        reservas = Reserva.objects.order_by('tour__nombre', 'fecha_inicio', 'numero_personas', 'estado', 'nombre_cliente')
+        return (
+            list(Practica.objects.order_by('username').values_list('username', 'nombre', 'is_admin')),
+            list(Tour.objects.order_by('nombre').values_list('nombre', 'precio', 'duracion', 'categoria')),
+            list(reservas.values_list('tour__nombre', 'fecha_inicio', 'numero_personas', 'estado', 'nombre_cliente')),
+        )
+
+    def test_misma_semilla_mismos_datos(self):
+        hoy = date(2030, 1, 1)
+        totales = sinteticos.generar(20, 8, 300, semilla=7, lote=50, hoy=hoy)
+        self.assertEqual((totales['usuarios'], totales['tours']), (20, 8))
+        self.assertEqual(Reserva.objects.count(), totales['reservas'])
+        primera = self._huella()
+        sinteticos.borrar()
+        self.assertFalse(Practica.objects.exists() or Tour.objects.exists() or Reserva.objects.exists())
+        sinteticos.generar(20, 8, 300, semilla=7, lote=50, hoy=hoy)
+        self.assertEqual(self._huella(), primera)
+
+    def test_cupos_consistentes(self):
+        sinteticos.generar(10, 3, 2000, semilla=1, hoy=date(2030, 1, 1))
+        for salida in Salida.objects.all():
+            ocupados = (salida.reservas.exclude(estado='cancelada')
+                        .aggregate(total=Sum('numero_personas'))['total'] or 0)
+            self.assertEqual(salida.reservados, ocupados)
+            self.assertLessEqual(salida.reservados, salida.capacidad)
+        # Las fechas de creación se reparten en el último año
+        self.assertGreater(Reserva.objects.dates('fecha_creacion', 'month').count(), 6)
+        # bulk_create no dispara señales: las estadísticas se recalculan al final
+        self.assertEqual(EstadisticaReservas.objects.aggregate(total=Sum('confirmadas'))['total'],
+                         Reserva.objects.filter(estado='confirmada').count())
+
+    def test_resumen_de_latencias(self):
+        muestras = [(float(ms), ms != 100) for ms in range(1, 101)]
+        resumen = resumir(muestras, duracion=10)
+        self.assertEqual((resumen['peticiones'], resumen['errores'], resumen['tasa_error']), (100, 1, 0.01))
+        self.assertEqual((resumen['p50_ms'], resumen['p95_ms'], resumen['p99_ms']), (50.5, 95.0, 99.0))
+        self.assertEqual(resumen['por_segundo'], 10.0)
+
+
+class EstadisticasReservasTests(TestCase):
+    """Resumen por día y tour: el incremental coincide con reconstruir() tras cada cambio."""
+
+    def setUp(self):
+        self.tour = Tour.objects.create(nombre='Guatapé', descripcion='Piedra', duracion='1 día', precio='100k')
+        self.otro = Tour.objects.create(nombre='Leticia', descripcion='Amazonas', duracion='4 días', precio='1M')
+
+    def _reservar(self, tour, personas, **datos):
+        return reservar(tour, date(2030, 1, 1), personas, nombre_cliente='Ana',
+                        email_cliente='ana@example.com', telefono_cliente='300', **datos)
+
+    def _resumen(self):
+        return {
+            (fila.dia, fila.tour_id): tuple(getattr(fila, campo) for campo in estadisticas.CAMPOS)
+            for fila in EstadisticaReservas.objects.all()
+            if any(getattr(fila, campo) for campo in estadisticas.CAMPOS)
+        }
+
+    def assertCoincideConReconstruir(self):
+        incremental = self._resumen()
+        estadisticas.reconstruir()
+        self.assertEqual(incremental, self._resumen())
+        return incremental
+
+    def test_crear_cambiar_y_eliminar(self):
+        hoy = timezone.localdate()
+        primera = self._reservar(self.tour, 2)
+        self._reservar(self.tour, 3, estado='confirmada')
+        self._reservar(self.otro, 1)
+        resumen = self.assertCoincideConReconstruir()
+        self.assertEqual(resumen[(hoy, self.tour.pk)], (1, 1, 0, 5, 3))
+
+        primera.estado = 'confirmada'
+        primera.save()
+        primera.estado = 'cancelada'
+        primera.numero_personas = 4
+        primera.save(update_fields=['estado'])  # numero_personas no se guarda: sigue en 2
+        resumen = self.assertCoincideConReconstruir()
+        self.assertEqual(resumen[(hoy, self.tour.pk)], (0, 1, 1, 3, 3))
+
+        # Cargada con only(): el aporte anterior se lee en pre_save
+        parcial = Reserva.objects.only('id', 'tour').get(pk=primera.pk)
+        parcial.estado = 'pendiente'
+        parcial.save(update_fields=['estado'])
+        Reserva.objects.filter(tour=self.otro).delete()
+        resumen = self.assertCoincideConReconstruir()
+        self.assertEqual(resumen[(hoy, self.tour.pk)], (1, 1, 0, 5, 3))
+        self.assertNotIn((hoy, self.otro.pk), resumen)
+
+        # Borrar el tour borra sus reservas y sus filas del resumen
+        self.tour.delete()
+        self.assertFalse(EstadisticaReservas.objects.exists())
+
+    def test_indicadores_del_dashboard(self):
+        self._reservar(self.tour, 2, estado='confirmada')
+        self._reservar(self.otro, 1, estado='confirmada')
+        self._reservar(self.otro, 3)
+        antigua = self._reservar(self.otro, 5, estado='confirmada')
+        Reserva.objects.filter(pk=antigua.pk).update(fecha_creacion=timezone.now() - timedelta(days=40))
+        estadisticas.reconstruir()
+
+        kpis = estadisticas.indicadores(dias=30)
+        self.assertEqual((kpis['reservas'], kpis['confirmadas'], kpis['pendientes'], kpis['personas']), (3, 2, 1, 6))
+        self.assertEqual(kpis['ingresos_pesos'], 2 * 100_000 + 1_000_000)
+        self.assertEqual([fila['tour__nombre'] for fila in kpis['top_tours']], ['Leticia', 'Guatapé'])
+
+        admin = Practica.objects.create(username='admin', password='x', is_admin=True)
+        sesion = self.client.session
+        sesion['user_id'] = admin.id
+        sesion['username'] = admin.username
+        sesion.save()
+        respuesta = self.client.get(reverse('dashboard'), secure=True)
+        self.assertContains(respuesta, 'Reservas de los últimos 30 días')
+        self.assertContains(respuesta, '$1\xa0200\xa0000')  # separador de miles de es-us
+
+    def test_comando_reconstruye_solo_el_rango(self):
+        self._reservar(self.tour, 2)
+        hoy = timezone.localdate()
+        ayer = hoy - timedelta(days=1)
+        EstadisticaReservas.objects.create(dia=ayer, tour=self.tour, pendientes=9)  # desviada
+        EstadisticaReservas.objects.filter(dia=hoy).update(pendientes=7)
+        salida = io.StringIO()
+        call_command('reconstruir_estadisticas', '--desde', hoy.isoformat(), stdout=salida)
+        self.assertIn('filas=1', salida.getvalue())
+        self.assertEqual(EstadisticaReservas.objects.get(dia=hoy).pendientes, 1)
+        self.assertEqual(EstadisticaReservas.objects.get(dia=ayer).pendientes, 9)
+        call_command('reconstruir_estadisticas', stdout=io.StringIO())
+        self.assertFalse(EstadisticaReservas.objects.filter(dia=ayer).exists())
+
+
+class TransicionesReservasTests(TestCase):
+    """Confirmar/cancelar en bloque: un UPDATE con guarda de estado, cupos y estadísticas al día."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.tour = Tour.objects.create(nombre='Guatapé', descripcion='Piedra', duracion='1 día', precio='100k',
+                                        capacidad_por_salida=100)
+        self.fecha = date(2030, 1, 1)
+
+    def _reservas(self, cantidad, personas=2, **datos):
+        return [
+            reservar(self.tour, self.fecha, personas, nombre_cliente=f'Cliente {i}',
+                     email_cliente='c@example.com', telefono_cliente='300', **datos)
+            for i in range(cantidad)
+        ]
+
+    def _reservados(self):
+        return Salida.objects.get(tour=self.tour, fecha=self.fecha).reservados
+
+    def _resumen_coincide(self):
+        campos = estadisticas.CAMPOS
+        incremental = list(EstadisticaReservas.objects.order_by('dia', 'tour').values_list(*campos))
+        estadisticas.reconstruir()
+        self.assertEqual(incremental, list(EstadisticaReservas.objects.order_by('dia', 'tour').values_list(*campos)))
+
+    def test_confirmar_y_cancelar_respetan_la_maquina_de_estados(self):
+        pendientes = self._reservas(3)
+        cancelada = Reserva.objects.create(tour=self.tour, nombre_cliente='Ana', email_cliente='ana@example.com',
+                                           telefono_cliente='300', fecha_inicio=self.fecha, estado='cancelada')
+        antes = Reserva.objects.get(pk=pendientes[0].pk).fecha_actualizacion
+        todas = Reserva.objects.all()
+
+        self.assertEqual(transiciones.cambiar_estado(todas.filter(pk__in=[pendientes[0].pk, cancelada.pk]),
+                                                     'confirmar'), 1)
+        self.assertEqual(Reserva.objects.get(pk=cancelada.pk).estado, 'cancelada')
+        self.assertGreater(Reserva.objects.get(pk=pendientes[0].pk).fecha_actualizacion, antes)
+        self.assertEqual(self._reservados(), 6)  # confirmar no mueve cupos
+        self._resumen_coincide()
+
+        self.assertEqual(transiciones.cambiar_estado(todas, 'cancelar'), 3)
+        self.assertEqual(self._reservados(), 0)
+        self.assertEqual(transiciones.cambiar_estado(todas, 'cancelar'), 0)  # cancelada es final
+        self.assertEqual(transiciones.cambiar_estado(todas, 'confirmar'), 0)
+        self._resumen_coincide()
+
+    def test_consultas_no_crecen_con_las_reservas(self):
+        def consultas(cantidad):
+            ids = [reserva.pk for reserva in self._reservas(cantidad, personas=1)]
+            with CaptureQueriesContext(connection) as capturadas:
+                self.assertEqual(transiciones.cambiar_estado(Reserva.objects.filter(pk__in=ids), 'cancelar'), cantidad)
+            return len(capturadas)
+        self.assertEqual(consultas(2), consultas(40))
+
+    def test_panel_por_seleccion_y_por_filtro(self):
+        admin = Practica.objects.create(username='admin', password='x', is_admin=True)
+        sesion = self.client.session
+        sesion['user_id'] = admin.id
+        sesion['username'] = admin.username
+        sesion.save()
+        primera, segunda, tercera = self._reservas(3)
+        url = reverse('reservas_admin')
+
+        respuesta = self.client.post(url, {'accion': 'confirmar', 'alcance': 'seleccion',
+                                           'reservas': [primera.pk, segunda.pk]}, secure=True, follow=True)
+        self.assertContains(respuesta, '2 reservas confirmadas.')
+        # La página con el mensaje no se cachea: la siguiente visita lo vuelve a renderizar sin él
+        self.assertNotIn('ETag', respuesta.headers)
+        self.assertNotContains(self.client.get(url, secure=True), 'reservas confirmadas')
+
+        respuesta = self.client.post(f'{url}?estado=pendiente', {'accion': 'cancelar', 'alcance': 'filtro'},
+                                     secure=True, follow=True)
+        self.assertContains(respuesta, '1 reservas canceladas.')
+        self.assertEqual(
+            list(Reserva.objects.order_by('pk').values_list('estado', flat=True)),
+            ['confirmada', 'confirmada', 'cancelada'],
+        )
+
+        respuesta = self.client.post(url, {'accion': 'cancelar', 'alcance': 'seleccion'}, secure=True, follow=True)
+        self.assertContains(respuesta, 'Seleccione al menos una reserva.')
+        respuesta = self.client.post(url, {'accion': 'cancelar', 'alcance': 'seleccion',
+                                           'reservas': [tercera.pk]}, secure=True, follow=True)
+        self.assertContains(respuesta, '1 reservas seleccionadas no admitían ese cambio de estado.')
+
+    def test_accion_del_admin_de_django(self):
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('root', 'root@example.com', 'x'))
+        reservas = self._reservas(2)
+        respuesta = self.client.post(reverse('admin:vistas_reserva_changelist'), {
+            'action': 'confirmar', '_selected_action': [r.pk for r in reservas],
+        }, secure=True, follow=True)
+        self.assertContains(respuesta, '2 reservas confirmadas.')
+        self.assertEqual(Reserva.objects.filter(estado='confirmada').count(), 2)
+
+
+class _ServidorSMTP(socketserver.StreamRequestHandler):
+    """Sustituto local de un servidor SMTP: guarda los mensajes; 'rechazo@' da 550 y 'ocupado@' 451."""
+
+    mensajes = []
+    conexiones = []
+
+    def _responder(self, linea):
+        self.wfile.write(f'{linea}\r\n'.encode())
+
+    def handle(self):
+        self.conexiones.append(self.client_address)
+        self._responder('220 local ESMTP')
+        destinatarios = []
+        while linea := self.rfile.readline():
+            comando = linea.decode().strip()
+            verbo = comando[:4].upper()
+            if verbo in ('EHLO', 'HELO'):
+                self._responder('250 local')
+            elif verbo == 'MAIL':
+                destinatarios = []
+                self._responder('250 OK')
+            elif verbo == 'RCPT':
+                if 'rechazo@' in comando:
+                    self._responder('550 buzón inexistente')
+                elif 'ocupado@' in comando:
+                    self._responder('451 intente más tarde')
+                else:
+                    destinatarios.append(comando.split(':', 1)[1].strip(' <>'))
+                    self._responder('250 OK')
+            elif verbo == 'DATA':
+                self._responder('354 adelante')
+                datos = b''.join(iter(self.rfile.readline, b'.\r\n'))
+                self.mensajes.append((destinatarios, datos.decode()))
+                self._responder('250 OK')
+            elif verbo == 'QUIT':
+                self._responder('221 adiós')
+                return
+            else:  # RSET, NOOP
+                self._responder('250 OK')
+
+
+class CorreosTests(TestCase):
+    """Bandeja de salida: se encola en la transacción del cambio y el worker envía por SMTP local."""
+
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _ServidorSMTP)
+        cls.servidor.daemon_threads = True
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        _ServidorSMTP.mensajes.clear()
+        _ServidorSMTP.conexiones.clear()
+        self.smtp = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.servidor.server_address[1], EMAIL_USE_TLS=False, EMAIL_HOST_USER='',
+        )
+        self.tour = Tour.objects.create(nombre='Guatapé', descripcion='Piedra', duracion='1 día', precio='100k',
+                                        capacidad_por_salida=3)
+
+    def test_la_reserva_encola_su_correo_sin_enviarlo(self):
+        usuario = Practica.objects.create(username='ana', password='x')
+        sesion = self.client.session
+        sesion['user_id'] = usuario.id
+        sesion['username'] = usuario.username
+        sesion.save()
+        datos = {'tour': self.tour.pk, 'nombre': 'Ana', 'email': 'ana@example.com', 'telefono': '300',
+                 'fecha': '2030-01-01', 'personas': 2}
+
+        self.assertEqual(self.client.post(reverse('reservas'), datos, secure=True).status_code, 302)
+        correo = CorreoPendiente.objects.get()
+        self.assertEqual((correo.destinatarios, correo.estado), (['ana@example.com'], 'pendiente'))
+        self.assertIn('Guatapé', correo.cuerpo)
+        self.assertEqual(mail.outbox, [])  # la petición no envía nada
+
+        # Sin cupo no queda ni la reserva ni su correo
+        self.client.post(reverse('reservas'), datos, secure=True)
+        self.assertEqual((Reserva.objects.count(), CorreoPendiente.objects.count()), (1, 1))
+
+    def test_worker_envia_por_lotes_en_una_conexion(self):
+        for i in range(5):
+            correos.encolar(f'Aviso {i}', 'Hola', [f'cliente{i}@example.com'])
+        salida = io.StringIO()
+        with self.smtp:
+            call_command('enviar_correos', '--una-vez', '--lote', '2', stdout=salida)
+        self.assertIn('enviados=5 reintentos=0 fallidos=0', salida.getvalue())
+        self.assertEqual(len(_ServidorSMTP.conexiones), 1)
+        self.assertEqual(sorted(d[0] for d, _ in _ServidorSMTP.mensajes),
+                         [f'cliente{i}@example.com' for i in range(5)])
+        self.assertFalse(CorreoPendiente.objects.exclude(estado='enviado').exists())
+        self.assertFalse(CorreoPendiente.objects.filter(fecha_envio=None).exists())
+
+    @override_settings(CORREO_MAX_INTENTOS=2, CORREO_REINTENTO_SEGUNDOS=60)
+    def test_reintentos_con_espera_y_rechazo_definitivo(self):
+        ocupado = correos.encolar('A', 'Hola', ['ocupado@example.com'])
+        rechazado = correos.encolar('B', 'Hola', ['rechazo@example.com'])
+        bueno = correos.encolar('C', 'Hola', ['bueno@example.com'])
+        with self.smtp, self.assertLogs('vistas.correos', 'WARNING') as registros:
+            antes = timezone.now()
+            self.assertEqual(correos.enviar_pendientes(), {'enviados': 1, 'reintentos': 1, 'fallidos': 1})
+            ocupado.refresh_from_db()
+            self.assertEqual((ocupado.estado, ocupado.intentos), ('pendiente', 1))
+            self.assertIn('451', ocupado.ultimo_error)
+            self.assertGreaterEqual(ocupado.proximo_intento, antes + timedelta(seconds=60))
+            self.assertEqual(CorreoPendiente.objects.get(pk=rechazado.pk).estado, 'fallido')  # 5xx: sin reintento
+            self.assertEqual(CorreoPendiente.objects.get(pk=bueno.pk).estado, 'enviado')
+            self.assertEqual(len(_ServidorSMTP.conexiones), 1)  # el rechazo no tira la conexión
+
+            # Todavía no le toca; al vencer la espera agota los intentos
+            self.assertEqual(correos.enviar_pendientes(), {'enviados': 0, 'reintentos': 0, 'fallidos': 0})
+            CorreoPendiente.objects.filter(pk=ocupado.pk).update(proximo_intento=timezone.now())
+            self.assertEqual(correos.enviar_pendientes()['fallidos'], 1)
+        self.assertEqual(CorreoPendiente.objects.get(pk=ocupado.pk).intentos, 2)
+        self.assertEqual(len(registros.records), 2)  # un aviso por correo fallido
+        self.assertEqual(correos.espera(3), 240)
+
+    def test_servidor_caido_no_gasta_intentos(self):
+        correo = correos.encolar('A', 'Hola', ['cliente@example.com'])
+        with socket.socket() as libre:
+            libre.bind(('127.0.0.1', 0))
+            puerto = libre.getsockname()[1]
+        with self.smtp, override_settings(EMAIL_PORT=puerto):
+            with self.assertRaises(OSError):
+                correos.enviar_pendientes()
+        correo.refresh_from_db()
+        self.assertEqual((correo.estado, correo.intentos), ('pendiente', 0))
+        self.assertGreater(correo.proximo_intento, timezone.now())  # reclamado: vuelve al vencer el reclamo
+
+
+class SesionesTests(TestCase):
+    """Perfiles de sesión y limpieza por lotes de django_session."""
+
+    def _sesion(self, clave, vence_en):
+        Session.objects.create(session_key=clave, session_data='{}', expire_date=timezone.now() + vence_en)
+
+    def test_limpia_solo_las_vencidas_por_lotes(self):
+        for i in range(5):
+            self._sesion(f'vencida{i}', timedelta(days=-1 - i))
+        for i in range(2):
+            self._sesion(f'vigente{i}', timedelta(days=1))
+        with CaptureQueriesContext(connection) as capturadas:
+            self.assertEqual(sesiones.limpiar_expiradas(lote=2), 5)
+        # Tres lotes (2, 2 y 1): en cada uno un SELECT acotado y un DELETE por clave
+        self.assertEqual(sum('DELETE' in q['sql'] for q in capturadas), 3)
+        self.assertEqual(sorted(Session.objects.values_list('session_key', flat=True)), ['vigente0', 'vigente1'])
+
+        self._sesion('vencida', timedelta(seconds=-1))
+        salida = io.StringIO()
+        call_command('limpiar_sesiones', '--pausa', '0', stdout=salida)
+        self.assertIn('eliminadas=1', salida.getvalue())
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies', PASSWORD_HASH_ITERATIONS=1000)
+    def test_perfil_cookies_no_usa_la_tabla(self):
+        Practica.objects.create(username='ana', password='clave')
+        respuesta = self.client.post(reverse('login'), {'username': 'ana', 'password': 'clave'}, secure=True)
+        self.assertRedirects(respuesta, reverse('home'), fetch_redirect_response=False)
+        with CaptureQueriesContext(connection) as capturadas:
+            self.assertEqual(self.client.get(reverse('home'), secure=True).status_code, 200)  # sin sesión: redirige
+        self.assertFalse(any('django_session' in q['sql'] for q in capturadas))
+        self.assertFalse(Session.objects.exists())
+
+    def test_medir_sesiones(self):
+        salida = io.StringIO()
+        call_command('medir_sesiones', '--iteraciones', '3', stdout=salida)
+        for perfil in settings.SESION_MOTORES:
+            self.assertIn(perfil, salida.getvalue())
+        self.assertFalse(Session.objects.exists())  # borra lo que crea
+
+
+@override_settings(LIMITES_ACCESO_ACTIVOS=True, LIMITES_ACCESO={
+    'login': {'ip': (3, 60), 'identificador': (2, 60)},
+    'registro': {'ip': (3, 60), 'identificador': (2, 60)},
+    'recuperar': {'ip': (3, 60), 'identificador': (2, 60)},
+})
+class LimitesAccesoTests(TestCase):
+    """Límite de intentos por IP y por identificador: 429 antes de la BD y métricas compartidas."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _login(self, usuario, ip='10.0.0.1'):
+        return self.client.post(reverse('login'), {'username': usuario, 'password': 'x'}, REMOTE_ADDR=ip, secure=True)
+
+    def test_rafaga_por_ip_recibe_429_sin_consultas(self):
+        for i in range(3):
+            self.assertEqual(self._login(f'nadie{i}').status_code, 200)  # formulario con error
+        with self.assertNumQueries(0), self.assertLogs('vistas.limites', 'WARNING'):
+            respuesta = self._login('nadie3')
+        self.assertEqual(respuesta.status_code, 429)
+        self.assertTrue(1 <= int(respuesta['Retry-After']) <= 60)
+        self.assertEqual(self._login('nadie3', ip='10.0.0.2').status_code, 200)  # otra IP no se ve afectada
+        self.assertEqual(self.client.get(reverse('login'), REMOTE_ADDR='10.0.0.1', secure=True).status_code, 200)
+
+        admin = Practica.objects.create(username='admin', password='x', is_admin=True)
+        sesion = self.client.session
+        sesion['user_id'] = admin.id
+        sesion.save()
+        datos = self.client.get(reverse('estado_limites'), secure=True).json()['login']
+        self.assertEqual((datos['permitidas'], datos['rechazadas_ip'], datos['rechazadas']), (4, 1, 1))
+        self.assertEqual(datos['porcentaje_rechazadas'], 20.0)
+
+    def test_identificador_limitado_aunque_cambie_la_ip(self):
+        self.assertEqual(self._login('Ana', ip='10.0.0.1').status_code, 200)
+        self.assertEqual(self._login(' ana ', ip='10.0.0.2').status_code, 200)
+        with self.assertLogs('vistas.limites', 'WARNING') as registros:
+            self.assertEqual(self._login('ANA', ip='10.0.0.3').status_code, 429)
+        self.assertEqual(registros.output, ['WARNING:vistas.limites:limite_superado login:identificador'])
+        self.assertEqual(self._login('luis', ip='10.0.0.3').status_code, 200)
+        self.assertEqual(limites.metricas()['login']['rechazadas_identificador'], 1)
+
+    def test_la_cubeta_se_recupera_con_el_tiempo(self):
+        inicio = 60 * 10**6  # comienzo de una ventana
+        self.enterContext(self.assertLogs('vistas.limites', 'WARNING'))
+        self.assertEqual([limites.comprobar('registro', '10.0.0.1', ahora=inicio + i) for i in range(3)], [0, 0, 0])
+        self.assertGreater(limites.comprobar('registro', '10.0.0.1', ahora=inicio + 3), 0)
+        # A mitad de la ventana siguiente aún pesa la mitad de los 4 intentos anteriores
+        self.assertEqual(limites.comprobar('registro', '10.0.0.1', ahora=inicio + 90), 0)
+        self.assertGreater(limites.comprobar('registro', '10.0.0.1', ahora=inicio + 91), 0)
+        self.assertEqual(limites.comprobar('registro', '10.0.0.1', ahora=inicio + 200), 0)
+
+    def test_sin_cache_deja_pasar(self):
+        with mock.patch.object(cache, 'incr', side_effect=ConnectionError), \
+                self.assertLogs('vistas.limites', 'WARNING'):
+            self.assertEqual(limites.comprobar('login', '10.0.0.1', 'ana'), 0)
@@ -0,0 +1,73 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import estadisticas
+from .condicional import registrar_cambio
+from .cupos import liberar
+from .models import Reserva
+from .router import PRIMARIA
+
+# --- Cambios de estado de reservas en bloque ---
+# Máquina de estados: pendiente -> confirmada, pendiente/confirmada -> cancelada.
+# Cancelada es final. Primero se bloquean y leen las reservas del conjunto
+# (selección o filtro del panel) que están en un estado de origen
+# (SELECT ... FOR UPDATE, solo los campos necesarios); luego un UPDATE por cada
+# LOTE de ids, con el estado de origen también en el WHERE. Las reservas creadas
+# mientras tanto no entran aunque cumplan el filtro. Con las filas leídas se:
+#   - devuelven sus cupos a las salidas al cancelar (una escritura por salida);
+#   - ajustan las estadísticas por día y tour (una escritura por fila del resumen).
+# update() no dispara señales ni auto_now: por eso se hace aquí a mano, igual que
+# renovar la versión de cambios de Reserva del GET condicional (ver condicional.py).
+
+TRANSICIONES = {
+    'confirmar': (('pendiente',), 'confirmada'),
+    'cancelar': (('pendiente', 'confirmada'), 'cancelada'),
+}
+LOTE = 1000
+
+
+class TransicionInterrumpida(Exception):
+    """Otra escritura cambió alguna de las reservas mientras se aplicaba la acción."""
+
+
+def cambiar_estado(reservas, accion):
+    """
+    Aplica 'accion' ('confirmar' o 'cancelar') a las reservas del queryset que estén en
+    un estado de origen válido. Devuelve cuántas cambiaron; las demás se ignoran.
+    """
+    origenes, destino = TRANSICIONES[accion]
+    candidatas = reservas.using(PRIMARIA).filter(estado__in=origenes).order_by()
+    with transaction.atomic(using=PRIMARIA):
+        filas = list(
+            candidatas.select_for_update()
+            .values_list('pk', 'salida_id', *estadisticas.CAMPOS_HUELLA)
+        )
+        if not filas:
+            return 0
+        ahora = timezone.now()
+        cambiadas = 0
+        for inicio in range(0, len(filas), LOTE):
+            ids = [fila[0] for fila in filas[inicio:inicio + LOTE]]
+            cambiadas += Reserva.objects.using(PRIMARIA).filter(pk__in=ids, estado__in=origenes).update(
+                estado=destino, fecha_actualizacion=ahora
+            )
+        if cambiadas != len(filas):
+            # Sin bloqueo de filas (sqlite) otra escritura pudo colarse: se deshace todo
+            raise TransicionInterrumpida(f"se esperaban {len(filas)} reservas y cambiaron {cambiadas}")
+
+        if destino == 'cancelada':
+            # Ninguna estaba cancelada (no es estado de origen): todas ocupaban cupo
+            por_salida = Counter()
+            for _, salida_id, _, _, _, personas in filas:
+                por_salida[salida_id] += personas
+            for salida_id, personas in por_salida.items():
+                liberar(salida_id, personas)
+
+        estadisticas.registrar(
+            ((fecha, tour_id, estado, personas), (fecha, tour_id, destino, personas))
+            for _, _, fecha, tour_id, estado, personas in filas
+        )
+        transaction.on_commit(lambda: registrar_cambio(Reserva), using=PRIMARIA)
+    return cambiadas
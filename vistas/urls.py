@@ -24,10 +24,13 @@ urlpatterns = [
     path('usuarios/', views.user_register, name='user_register'), # Lista de usuarios (Admin)
     path('usuario/editar/<int:user_id>/', views.editar_usuario, name='editar_usuario'), # Editar otro usuario
     path('configuracion/', views.configuracion_view, name='configuracion'), # Ajustes del sistema
+    path('configuracion/estado-bd/', views.estado_bd_view, name='estado_bd'), # Conexiones a la BD del worker (Admin, JSON)
+    path('configuracion/limites/', views.estado_limites_view, name='estado_limites'), # Intentos rechazados por el límite (Admin, JSON)
     path('perfil/', views.perfil_view, name='perfil'), # Editar mi propio perfil
     path('sobre-nosotros/', views.sobre_nosotros_view, name='sobre_nosotros'), # Página sobre nosotros
     path('reservas/', views.reservas_view, name='reservas'), # Formulario de reservas
     path('reservas-admin/', views.reservas_admin_view, name='reservas_admin'), # Gestión de reservas (Admin)
+    path('reservas-admin/exportar/', views.exportar_reservas_view, name='exportar_reservas'), # Exportar reservas CSV/JSON (Admin)
     
     # --- Vistas Simples / Legacy ---
     path('saludo/', views.saludo, name='saludo'),
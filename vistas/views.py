@@ -1,45 +1,62 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from .models import Practica, Tour, Reserva
-from .forms import LoginForm, RegistroForm, EditarUsuarioForm, TourForm
+from .forms import (LoginForm, RegistroForm, EditarUsuarioForm, TourForm, FiltroReservasForm, FiltroToursForm,
+                    AccionReservasForm)
+from .catalogo import obtener_tours, aobtener_tours
+from .busqueda import buscar_tours
+from .paginacion import paginar_keyset, CursorInvalido
+from .exportacion import FORMATOS, generar as generar_exportacion
+from .autenticacion import iniciar_sesion, buscar_por_identificador
+from . import contrasenas
+from .cupos import reservar, SinCupo
+from .conexiones import estadisticas_conexiones
+from .decorators import login_required, admin_required
+from .condicional import condicional
+from .estadisticas import indicadores
+from .limites import limitar, metricas as metricas_limites
+from .transiciones import cambiar_estado, TransicionInterrumpida
+from . import correos
+from django.db import transaction
 from django.db.models import Q # Import Q for complex queries
-from django.core.mail import send_mail
 from django.conf import settings
 from django.urls import reverse
+from datetime import date
 
 # --- Authentication Views ---
 # Estas vistas manejan el registro, inicio y cierre de sesión de los usuarios.
 
+@limitar('recuperar', campo='identifier')
 def forgot_password_view(request):
     """
     Vista para manejar la recuperación de contraseña.
     1. Muestra un formulario para ingresar usuario o correo.
     2. Busca al usuario en la base de datos.
-    3. Simula el envío de un correo (imprimiendo en consola) con un enlace de reset.
+    3. Encola un correo con el enlace de reset (lo envía 'manage.py enviar_correos',
+       no la petición; sin EMAIL_HOST se imprime en la consola).
     """
     if request.method == "POST":
         identifier = request.POST.get('identifier')
         try:
             # Find user
-            user = Practica.objects.get(Q(username=identifier) | Q(email=identifier))
+            user = buscar_por_identificador(identifier)
             
             # Create a simple "token" (In production, use proper token generators)
             # For this simple project, we will just direct them to the reset page with their ID
             # WARNING: This isn't secure for production but fits the current scope "custom system"
             reset_url = request.build_absolute_uri(reverse('reset_password', args=[user.id]))
             
-            # Send Email (to Console for now)
+            # Encolar el correo (la bandeja de salida lo envía fuera de la petición)
             message = f"Hola {user.username},\n\nPara restablecer tu contraseña, haz clic aquí:\n{reset_url}\n\nSi no fuiste tú, ignora este mensaje."
-            send_mail(
+            correos.encolar(
                 'Restablecer Contraseña - Travel Web',
                 message,
-                'noreply@travelweb.com',
                 [user.email if user.email else 'unknown@example.com'],
-                fail_silently=False,
             )
             
-            messages.success(request, f'Se envió un enlace de recuperación a la consola (simulación de correo).')
+            messages.success(request, f'Te enviaremos por correo un enlace de recuperación en unos instantes.')
             return redirect('login')
             
         except Practica.DoesNotExist:
@@ -63,7 +80,7 @@ def reset_password_view(request, user_id):
         p2 = request.POST.get('confirm_password')
         
         if p1 == p2:
-            user.password = p1 # Note: Should hash in production
+            user.password = contrasenas.cifrar(p1)
             user.save()
             messages.success(request, 'Contraseña actualizada correctamente. Inicia sesión.')
             return redirect('login')
@@ -72,19 +89,19 @@ def reset_password_view(request, user_id):
             
     return render(request, "password_reset_confirm.html")
 
-def home_view(request):
+@login_required
+@condicional(Tour)
+async def home_view(request):
     """
     Vista principal para usuarios normales (NO administradores).
     Verifica que el usuario esté logueado (sesión activa) antes de mostrar la página.
     Muestra la página principal con tours organizados por categoría.
+    Vista async: bajo ASGI no ocupa un hilo mientras espera caché/BD.
     """
-    if 'user_id' not in request.session: 
-        return redirect('login')
-    
-    # Obtener tours por categoría
-    tours_lugares = Tour.objects.filter(categoria='lugar')
-    tours_ciudades = Tour.objects.filter(categoria='ciudad')
-    nombre_usuario = request.session.get('username')
+    # Obtener tours por categoría (desde la caché del catálogo)
+    tours_lugares = await aobtener_tours('lugar')
+    tours_ciudades = await aobtener_tours('ciudad')
+    nombre_usuario = await request.session.aget('username')
     
     contexto = {
         'tours_lugares': tours_lugares,
@@ -92,8 +109,9 @@ def home_view(request):
         'nombre_usuario': nombre_usuario
     }
     
-    return render(request, "pagina_principal.html", contexto)
+    return await _arender(request, "pagina_principal.html", contexto)
 
+@limitar('login', campo='username')
 def login_view(request):
     """
     Vista de inicio de sesión general.
@@ -108,12 +126,11 @@ def login_view(request):
             username_input = form.cleaned_data['username']
             password = form.cleaned_data['password']
             try:
-                # Check for either username OR email
-                usuario = Practica.objects.get(Q(username=username_input) | Q(email=username_input))
+                # Check for either username OR email (índices únicos, sin distinguir mayúsculas)
+                usuario = buscar_por_identificador(username_input)
                 
-                if usuario.password == password:
-                    request.session['user_id'] = usuario.id
-                    request.session['username'] = usuario.username
+                if contrasenas.verificar(usuario, password):
+                    iniciar_sesion(request, usuario)
                     
                     if usuario.is_admin:
                         messages.success(request, f'Bienvenido Admin {usuario.username}!')
@@ -126,14 +143,14 @@ def login_view(request):
                     form.add_error('password', 'Contraseña incorrecta')
             except Practica.DoesNotExist:
                 form.add_error('username', 'Usuario o Email no encontrado')
-            except Practica.MultipleObjectsReturned:
-                # Fallback if both email and username match identical string (unlikely but possible)
-                form.add_error('username', 'Error: Multiples usuarios encontrados')
+            except contrasenas.ServicioOcupado:
+                form.add_error(None, 'Hay muchos inicios de sesión en este momento, intenta de nuevo.')
                 
     else:
         form = LoginForm()
     return render(request, "login.html", {'form': form})
 
+@limitar('login', campo='username')
 def login_admin_view(request):
     """Vista exclusiva para administradores"""
     if request.method == "POST":
@@ -142,13 +159,12 @@ def login_admin_view(request):
             username_input = form.cleaned_data['username']
             password = form.cleaned_data['password']
             try:
-                # Check for either username OR email
-                usuario = Practica.objects.get(Q(username=username_input) | Q(email=username_input))
+                # Check for either username OR email (índices únicos, sin distinguir mayúsculas)
+                usuario = buscar_por_identificador(username_input)
                 
-                if usuario.password == password:
+                if contrasenas.verificar(usuario, password):
                     if usuario.is_admin:
-                        request.session['user_id'] = usuario.id
-                        request.session['username'] = usuario.username
+                        iniciar_sesion(request, usuario)
                         messages.success(request, f'Bienvenido al Panel, {usuario.username}')
                         return redirect('dashboard')
                     else:
@@ -157,6 +173,8 @@ def login_admin_view(request):
                     form.add_error('password', 'Contraseña incorrecta')
             except Practica.DoesNotExist:
                 form.add_error('username', 'Usuario o Email no encontrado')
+            except contrasenas.ServicioOcupado:
+                form.add_error(None, 'Hay muchos inicios de sesión en este momento, intenta de nuevo.')
     else:
         form = LoginForm()
     return render(request, "login_admin.html", {'form': form})
@@ -171,6 +189,7 @@ def logout_view(request):
     messages.success(request, f'{username}, has cerrado sesión correctamente')
     return redirect("login")
 
+@limitar('registro', campo='email')
 def formulario(request): # Register View
     """
     Vista de Registro de nuevos usuarios.
@@ -182,7 +201,7 @@ def formulario(request): # Register View
         form = RegistroForm(request.POST)
         if form.is_valid():
             usuario = form.save(commit=False)
-            usuario.password = form.cleaned_data['password1']
+            usuario.password = contrasenas.cifrar(form.cleaned_data['password1'])
             
             # Form automatically handles username, email, nombre, apellido via Meta.fields
             # Just handling custom manual saves if needed, or let form.save() do it.
@@ -200,32 +219,24 @@ def formulario(request): # Register View
 
 # --- Dashboard & Tour Views ---
 
+@admin_required
 def dashboard(request):
     """
     Panel de Control Principal (Dashboard) - Solo para Administradores.
     - Verifica que el usuario esté logueado y sea admin.
     - Obtiene estadísticas y listas (Toures, Personas recientes) para mostrar.
+    - KPIs de reservas de los últimos 30 días, leídos del resumen por día y tour.
     - Búsqueda de tours por nombre.
     """
-    if 'user_id' not in request.session:
-         return redirect('login')
-    
-    # Security: Ensure only admins can access dashboard
-    try:
-        user = Practica.objects.get(id=request.session['user_id'])
-        if not user.is_admin:
-            return redirect('home') # Redirect non-admins to home
-    except Practica.DoesNotExist:
-         return redirect('login')
-
     # Get search query from GET parameters
     search_query = request.GET.get('buscar', '')
     
-    # Filter tours by name if search query exists
+    # Filter tours by name/description (ranked, accent-insensitive) if search query exists
+    # La plantilla recorre los tours dos veces (slice y lista): se evalúa una sola consulta
     if search_query:
-        tours = Tour.objects.filter(nombre__icontains=search_query)
+        tours = list(buscar_tours(search_query, Tour.objects.all()))
     else:
-        tours = Tour.objects.all()
+        tours = obtener_tours()
     
     personas = Practica.objects.all().order_by('-id')[:5] # Last 5 users
     username = request.session.get('username')
@@ -235,9 +246,11 @@ def dashboard(request):
         'personas': personas,
         'username': username,
         'search_query': search_query,  # Pass search query to template
+        'kpis': indicadores(),
     }
     return render(request, "dashboard.html", context)
 
+@admin_required(redireccion='tours')
 def crear_tour(request):
     """
     Vista para crear un nuevo Tour.
@@ -245,14 +258,6 @@ def crear_tour(request):
     - Usa 'TourForm' para facilitar la creación y validación.
     - Maneja la subida de archivos (imágenes).
     """
-    if 'user_id' not in request.session: return redirect('login')
-    
-    # Secure: Only Admin
-    try:
-        user = Practica.objects.get(id=request.session['user_id'])
-        if not user.is_admin: return redirect('tours') # or home
-    except Practica.DoesNotExist: return redirect('login')
-
     if request.method == 'POST':
         form = TourForm(request.POST, request.FILES)
         if form.is_valid():
@@ -266,15 +271,8 @@ def crear_tour(request):
         form = TourForm()
     return render(request, "tour_form.html", {'form': form, 'title': 'Crear Tour'})
 
+@admin_required(redireccion='tours')
 def editar_tour(request, pk):
-    if 'user_id' not in request.session: return redirect('login')
-    
-    # Secure: Only Admin
-    try:
-        user = Practica.objects.get(id=request.session['user_id'])
-        if not user.is_admin: return redirect('tours')
-    except Practica.DoesNotExist: return redirect('login')
-
     tour = get_object_or_404(Tour, pk=pk)
     if request.method == 'POST':
         form = TourForm(request.POST, request.FILES, instance=tour)
@@ -285,21 +283,15 @@ def editar_tour(request, pk):
         form = TourForm(instance=tour)
     return render(request, "tour_form.html", {'form': form, 'title': 'Editar Tour'})
 
+@admin_required(redireccion='tours')
 def eliminar_tour(request, pk):
-    if 'user_id' not in request.session: return redirect('login')
-    
-    # Secure: Only Admin
-    try:
-        user = Practica.objects.get(id=request.session['user_id'])
-        if not user.is_admin: return redirect('tours')
-    except Practica.DoesNotExist: return redirect('login')
-
     tour = get_object_or_404(Tour, pk=pk)
     tour.delete()
     return redirect('tours')
 
 # --- User Management Views (Legacy/Admin) ---
 
+@login_required
 def user_register(request):
     """
     Vista de gestión de usuarios (Admin).
@@ -307,7 +299,6 @@ def user_register(request):
     - Permite eliminar usuarios
     - Incluye funcionalidad de búsqueda por username, email o nombre
     """
-    if 'user_id' not in request.session: return redirect("login")
     if request.method == "POST":
         user_id = request.POST.get("user_id")
         try:
@@ -330,17 +321,18 @@ def user_register(request):
         ).order_by('username')
     else:
         usuarios = Practica.objects.all().order_by('username')
+    usuarios = list(usuarios)  # la lista se muestra completa: el total sale de ella, sin COUNT aparte
     
     usuario_actual_id = request.session.get('user_id')
     return render(request, "UserRegister.html", {
         'usuarios': usuarios,
         'usuario_actual_id': usuario_actual_id,
-        'total_usuarios': usuarios.count(),
+        'total_usuarios': len(usuarios),
         'query': query
     })
 
+@login_required
 def editar_usuario(request, user_id):
-    if 'user_id' not in request.session: return redirect("login")
     try: usuario = Practica.objects.get(id=user_id)
     except Practica.DoesNotExist: return redirect("user_register")
 
@@ -348,7 +340,7 @@ def editar_usuario(request, user_id):
         form = EditarUsuarioForm(request.POST, instance=usuario)
         if form.is_valid():
             u = form.save(commit=False)
-            if form.cleaned_data.get('password1'): u.password = form.cleaned_data['password1']
+            if form.cleaned_data.get('password1'): u.password = contrasenas.cifrar(form.cleaned_data['password1'])
             if form.cleaned_data.get('imagen_url'): u.imagen_url = form.cleaned_data.get('imagen_url')
             u.save()
             return redirect("user_register")
@@ -362,52 +354,63 @@ def despedida(request): return HttpResponse("Hasta luego")
 def anime(request): return render(request, "./anime.html")
 def mundo(request): return render(request, "./plantilla.html")
 
-def tours_view(request):
+async def _alista(queryset):
+    """Evalúa un queryset de forma asíncrona (las plantillas no pueden consultar la BD en vistas async)."""
+    return [objeto async for objeto in queryset]
+
+async def _arender(request, plantilla, contexto):
+    """
+    render() en un hilo: {% tarjetas %} y {% avatar %} usan la caché y el almacenamiento
+    síncronos y no deben bloquear el bucle de eventos.
+    """
+    return await sync_to_async(render)(request, plantilla, contexto)
+
+@login_required
+@condicional(Tour)
+async def tours_view(request):
     """
     Vista pública/mixta para ver el listado de Tours.
     - Separa los tours en categorías (Ciudad, Lugar) para mostrarlos organizados.
     - Pasa la variable 'is_admin' para mostrar botones de edición solo a admins.
     - Incluye funcionalidad de búsqueda por nombre o descripción
+    - Orden y rangos de precio/duración resueltos en la base de datos
+    Vista async (ORM y sesión asíncronos).
     """
-    if 'user_id' not in request.session:
-         return redirect('login')
-    
-    # Determine if Admin
-    is_admin = False
-    try:
-        user = Practica.objects.get(id=request.session['user_id'])
-        is_admin = user.is_admin
-    except Practica.DoesNotExist:
-        pass
+    # Determine if Admin (rol guardado en la sesión)
+    is_admin = await request.usuario.aes_admin()
 
     # Obtener término de búsqueda
     query = request.GET.get('q', '').strip()
     
-    # Filtrar tours si hay búsqueda
-    if query:
-        tours_ciudades = Tour.objects.filter(
-            Q(nombre__icontains=query) | Q(descripcion__icontains=query),
-            categoria='ciudad'
-        )
-        tours_lugares = Tour.objects.filter(
-            Q(nombre__icontains=query) | Q(descripcion__icontains=query),
-            categoria='lugar'
-        )
-    else:
+    filtros = FiltroToursForm(request.GET or None)
+
+    # Filtrar tours si hay búsqueda (ordenados por relevancia, sin importar tildes)
+    # y/o filtros de precio, duración u orden
+    if query or filtros.activo():
         tours_ciudades = Tour.objects.filter(categoria='ciudad')
         tours_lugares = Tour.objects.filter(categoria='lugar')
+        if query:
+            tours_ciudades = buscar_tours(query, tours_ciudades)
+            tours_lugares = buscar_tours(query, tours_lugares)
+        tours_ciudades = await _alista(filtros.filtrar(tours_ciudades))
+        tours_lugares = await _alista(filtros.filtrar(tours_lugares))
+    else:
+        tours_ciudades = await aobtener_tours('ciudad')
+        tours_lugares = await aobtener_tours('lugar')
     
-    username = request.session.get('username')
+    username = await request.session.aget('username')
     
     context = {
         'tours_ciudades': tours_ciudades,
         'tours_lugares': tours_lugares,
         'username': username,
         'is_admin': is_admin,
-        'query': query
+        'query': query,
+        'filtros': filtros,
     }
-    return render(request, "tours.html", context)
+    return await _arender(request, "tours.html", context)
 
+@login_required
 def perfil_view(request):
     """
     Vista de 'Mi Perfil'.
@@ -415,18 +418,15 @@ def perfil_view(request):
     - Maneja cambios de contraseña, imagen y datos personales.
     - Actualiza la sesión si cambia el nombre de usuario.
     """
-    if 'user_id' not in request.session: return redirect('login')
-    
-    try:
-        usuario = Practica.objects.get(id=request.session['user_id'])
-    except Practica.DoesNotExist:
+    usuario = request.usuario.practica
+    if usuario is None:
         return redirect('login')
 
     if request.method == "POST":
         form = EditarUsuarioForm(request.POST, instance=usuario)
         if form.is_valid():
             u = form.save(commit=False)
-            if form.cleaned_data.get('password1'): u.password = form.cleaned_data['password1']
+            if form.cleaned_data.get('password1'): u.password = contrasenas.cifrar(form.cleaned_data['password1'])
             if form.cleaned_data.get('imagen_url'): u.imagen_url = form.cleaned_data.get('imagen_url')
             u.save()
             messages.success(request, 'Perfil actualizado correctamente')
@@ -437,68 +437,72 @@ def perfil_view(request):
     
     return render(request, "perfil.html", {'form': form, 'username': usuario.username, 'usuario': usuario})
 
+@login_required
 def configuracion_view(request):
     """
     Vista de Configuración del Sistema.
     - Muestra opciones globales como Idioma y Notificaciones.
     - Por ahora es visual, la lógica se maneja en el frontend o se guardará en futuras versiones.
     """
-    if 'user_id' not in request.session: return redirect('login')
-    
     # Just render the template, settings will be handled via JS/LocalStorage for now or simple form if backend needed
-    try:
-        usuario = Practica.objects.get(id=request.session['user_id'])
-    except Practica.DoesNotExist:
+    usuario = request.usuario.practica
+    if usuario is None:
         return redirect('login')
         
     return render(request, "configuracion.html", {'username': usuario.username, 'usuario': usuario})
 
-def explorar_toures_view(request):
+@login_required
+@condicional(Tour)
+async def explorar_toures_view(request):
     """
     Vista de exploración de tours para usuarios.
     Muestra todos los tours disponibles con detalles de reserva.
     Accesible para usuarios logueados (admin y usuarios normales).
+    Permite ordenar y filtrar por precio y duración (en la base de datos).
+    Vista async (ORM y sesión asíncronos).
     """
-    if 'user_id' not in request.session:
-        return redirect('login')
-    
-    # Obtener todos los tours disponibles
-    tours = Tour.objects.all()
-    nombre_usuario = request.session.get('username')
+    filtros = FiltroToursForm(request.GET or None)
+    if filtros.activo():
+        tours = await _alista(filtros.filtrar(Tour.objects.all()))
+    else:
+        # Obtener todos los tours disponibles (catálogo en caché)
+        tours = await aobtener_tours()
+    nombre_usuario = await request.session.aget('username')
     
     contexto = {
         'tours': tours,
+        'filtros': filtros,
         'nombre_usuario': nombre_usuario
     }
     
-    return render(request, "explorar_toures.html", contexto)
+    return await _arender(request, "explorar_toures.html", contexto)
 
-def sobre_nosotros_view(request):
+async def sobre_nosotros_view(request):
     """
     Vista de 'Sobre Nosotros'.
     Muestra información de la empresa, logros, testimonios y ventajas.
     Accesible para todos los usuarios (con o sin login para facilitar acceso público).
     """
-    nombre_usuario = request.session.get('username', None)
+    nombre_usuario = await request.session.aget('username', None)
     
     contexto = {
         'nombre_usuario': nombre_usuario
     }
     
-    return render(request, "sobre_nosotros.html", contexto)
+    return await _arender(request, "sobre_nosotros.html", contexto)
 
+@login_required
 def reservas_view(request):
     """
     Vista de Reservas.
     Permite a los usuarios hacer reservas de tours.
     Muestra un formulario simple con selección de tour y datos básicos.
-    Guarda la reserva en la base de datos.
+    Guarda la reserva en la base de datos apartando cupos de la salida
+    (tour + fecha) de forma atómica: nunca se vende más de la capacidad.
+    El correo de confirmación se encola en la misma transacción.
     """
-    if 'user_id' not in request.session:
-        return redirect('login')
-    
     # Obtener todos los tours disponibles para el selector
-    tours = Tour.objects.all()
+    tours = obtener_tours()
     nombre_usuario = request.session.get('username')
     
     if request.method == 'POST':
@@ -508,31 +512,36 @@ def reservas_view(request):
             nombre_cliente = request.POST.get('nombre')
             email_cliente = request.POST.get('email')
             telefono_cliente = request.POST.get('telefono')
-            fecha_inicio = request.POST.get('fecha')
-            numero_personas = request.POST.get('personas')
+            fecha_inicio = date.fromisoformat(request.POST.get('fecha', ''))
+            numero_personas = int(request.POST.get('personas', 1))
             observaciones = request.POST.get('observaciones', '')
             
             # Obtener tour y usuario
             tour = Tour.objects.get(id=tour_id)
-            usuario = Practica.objects.get(id=request.session['user_id'])
+            usuario = request.usuario.practica
             
-            # Crear la reserva
-            reserva = Reserva.objects.create(
-                tour=tour,
-                usuario=usuario,
-                nombre_cliente=nombre_cliente,
-                email_cliente=email_cliente,
-                telefono_cliente=telefono_cliente,
-                fecha_inicio=fecha_inicio,
-                numero_personas=numero_personas,
-                observaciones=observaciones
-            )
+            # Crear la reserva (aparta los cupos de la salida en la misma transacción)
+            # y encolar su correo: o quedan los dos o ninguno
+            with transaction.atomic():
+                reserva = reservar(
+                    tour,
+                    fecha_inicio,
+                    numero_personas,
+                    usuario=usuario,
+                    nombre_cliente=nombre_cliente,
+                    email_cliente=email_cliente,
+                    telefono_cliente=telefono_cliente,
+                    observaciones=observaciones
+                )
+                correos.confirmacion_reserva(reserva)
             
             messages.success(request, f'¡Reserva creada exitosamente para {nombre_cliente}! Tu reserva está pendiente de confirmación.')
             return redirect('reservas')
             
         except Tour.DoesNotExist:
             messages.error(request, 'El tour seleccionado no existe.')
+        except SinCupo as e:
+            messages.error(request, f'No hay cupos suficientes para esa fecha (quedan {e.disponibles}).')
         except Exception as e:
             messages.error(request, f'Error al crear la reserva: {str(e)}')
     
@@ -543,30 +552,122 @@ def reservas_view(request):
     
     return render(request, "reservas.html", contexto)
 
+RESERVAS_POR_PAGINA = 50
+
+@admin_required
+@condicional(Reserva, Tour)
 def reservas_admin_view(request):
     """
     Vista de Gestión de Reservas para Administradores.
-    Muestra todas las reservas realizadas por los usuarios.
+    Muestra las reservas realizadas por los usuarios, filtrables por estado,
+    tour y rango de fechas, paginadas por cursor sobre (fecha_creacion, id).
+    Por POST confirma o cancela en bloque las marcadas o todas las del filtro.
     Solo accesible para administradores.
     """
-    if 'user_id' not in request.session:
-        return redirect('login')
-    
-    # Verificar que sea administrador
+    if request.method == "POST":
+        return _cambiar_estado_reservas(request)
+
+    # Filtros opcionales (estado, tour, fechas)
+    reservas = Reserva.objects.select_related('tour', 'usuario')
+    filtros = FiltroReservasForm(request.GET or None)
+    if filtros.is_valid():
+        reservas = filtros.filtrar(reservas)
+
+    # Página actual: las reservas posteriores al cursor, de la más reciente a la más antigua
+    cursor = request.GET.get('cursor')
+    parametros = request.GET.copy()
+    parametros.pop('cursor', None)
+    consulta_filtros = parametros.urlencode()
+    url_primera = f"?{consulta_filtros}"
     try:
-        user = Practica.objects.get(id=request.session['user_id'])
-        if not user.is_admin:
-            return redirect('home')
-    except Practica.DoesNotExist:
-        return redirect('login')
-    
-    # Obtener todas las reservas ordenadas por fecha de creación
-    reservas = Reserva.objects.all().select_related('tour', 'usuario')
-    
+        reservas, siguiente = paginar_keyset(reservas, cursor, RESERVAS_POR_PAGINA)
+    except CursorInvalido:
+        # Cursor manipulado o truncado: primera página con los mismos filtros
+        return redirect(reverse('reservas_admin') + url_primera)
+
+    url_siguiente = None
+    if siguiente:
+        parametros['cursor'] = siguiente
+        url_siguiente = f"?{parametros.urlencode()}"
+
     contexto = {
         'reservas': reservas,
+        'filtros': filtros,
+        'acciones': AccionReservasForm(),
+        'es_primera_pagina': not cursor,
+        'url_primera': url_primera,
+        'url_siguiente': url_siguiente,
+        'consulta_filtros': consulta_filtros,
         'username': request.session.get('username')
     }
     
     return render(request, "reservas_admin.html", contexto)
 
+def _cambiar_estado_reservas(request):
+    """Acción en bloque del panel de reservas; vuelve a la misma página con el resultado."""
+    accion = AccionReservasForm(request.POST)
+    if not accion.is_valid():
+        for error in accion.errors.values():
+            messages.error(request, ' '.join(error))
+        return redirect(request.get_full_path())
+    datos = accion.cleaned_data
+
+    reservas = Reserva.objects.all()
+    if datos['alcance'] == 'filtro':
+        filtros = FiltroReservasForm(request.GET)
+        if not filtros.is_valid():
+            messages.error(request, 'Los filtros no son válidos: no se cambió ninguna reserva.')
+            return redirect(request.get_full_path())
+        reservas = filtros.filtrar(reservas)
+    else:
+        reservas = reservas.filter(pk__in=datos['ids'])
+
+    try:
+        cambiadas = cambiar_estado(reservas, datos['accion'])
+    except TransicionInterrumpida:
+        messages.error(request, 'Otras reservas cambiaron al mismo tiempo: no se aplicó la acción, inténtelo de nuevo.')
+        return redirect(request.get_full_path())
+    participio = 'confirmadas' if datos['accion'] == 'confirmar' else 'canceladas'
+    messages.success(request, f'{cambiadas} reservas {participio}.')
+    if datos['alcance'] == 'seleccion' and cambiadas < len(datos['ids']):
+        messages.warning(request, f'{len(datos["ids"]) - cambiadas} reservas seleccionadas no admitían ese cambio de estado.')
+    return redirect(request.get_full_path())
+
+@admin_required
+def exportar_reservas_view(request):
+    """
+    Exporta las reservas (con el tour y los datos de contacto del cliente) en CSV o JSON.
+    - Respeta los mismos filtros del panel de reservas.
+    - La respuesta se envía en streaming: la memoria no crece con el número de filas.
+    Solo accesible para administradores.
+    """
+    formato = request.GET.get('formato', 'csv')
+    if formato not in FORMATOS:
+        formato = 'csv'
+    tipo_contenido, extension = FORMATOS[formato]
+
+    reservas = Reserva.objects.all()
+    filtros = FiltroReservasForm(request.GET or None)
+    if filtros.is_valid():
+        reservas = filtros.filtrar(reservas)
+
+    respuesta = StreamingHttpResponse(generar_exportacion(formato, reservas), content_type=tipo_contenido)
+    respuesta['Content-Disposition'] = f'attachment; filename="reservas.{extension}"'
+    return respuesta
+
+@admin_required
+def estado_bd_view(request):
+    """
+    Estadísticas de conexiones a la base de datos del worker que atiende la petición
+    (modo, aperturas, peticiones y, con DB_POOL=1, el estado del pool de psycopg).
+    Solo accesible para administradores.
+    """
+    return JsonResponse(estadisticas_conexiones())
+
+@admin_required
+def estado_limites_view(request):
+    """
+    Intentos de login, registro y recuperación admitidos y rechazados (429) por
+    el límite de intentos, sumados entre todos los workers. Solo administradores.
+    """
+    return JsonResponse(metricas_limites())